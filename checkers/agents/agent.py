@@ -1,50 +1,163 @@
+import time
 from abc import ABC, abstractmethod
-from typing import Tuple
+from typing import Callable, List, Optional, Tuple
 
-from checkers import Game, GameState, PlayerColor, _next_player_color, Action
+from checkers import Game, GameState, Move, PlayerColor, _next_player_color, Action
+from game_state import Node
+from move_ordering import _is_capture
+from opening_book import OpeningBook
+from search_stats import SearchStats
+from tablebase import Tablebase
+from vectorized_eval_fns import board_masks, masks_to_array
 
 
 class Agent(ABC):
     color: PlayerColor = None  # which color does this agent play for
     game: Game = None
+    full_jumps: bool = False  # whether to search and play whole capture paths as one Move, see Node.full_jumps
+    opening_book: OpeningBook = None  # plays booked moves without searching
+    tablebase: Tablebase = None  # plays straight from the endgame tables once they cover the position
+    last_move: Optional[Action] = None  # what the last make_move() played, None if it passed
 
     def __init__(self, color: PlayerColor, game: Game, eval_fn):
         self.color = color
         self.game = game
         self.adversary_color = _next_player_color(self.color)
         self.eval_fn = eval_fn
+        self.stats = SearchStats()  # what the searches of every move cost, see search_stats.py
 
     def make_move(self) -> int:
-        move, nodes_explored = self._get_move(start_from=self.game.state.last_hop_to)
+        start = time.perf_counter()
+        table = getattr(self, 'transposition_table', None)
+        tt_probes, tt_hits = (table.probes, table.hits) if table is not None else (0, 0)
+
+        found = self._look_up_move()
+        move, nodes_explored = found if found is not None else self._get_move(start_from=self.game.state.last_hop_to)
+        self.last_move = move
         if move is not None:
             _action(action=move, state=self.game.state)
         else:
             self.game.end_turn()
+
+        if table is not None:
+            self.stats.tt_probes += table.probes - tt_probes
+            self.stats.tt_hits += table.hits - tt_hits
+        self.stats.end_move(time.perf_counter() - start, nodes_explored)
         return nodes_explored
 
+    def _look_up_move(self) -> Optional[Tuple[Action, int]]:
+        """
+        The move the opening book or the endgame tables have for the current position, and the nodes probed to
+        find it. None if neither covers the position.
+        """
+        if self.opening_book is None and self.tablebase is None:
+            return None
+        node = Node(state=self.game.state, start_from=self.game.state.last_hop_to, full_jumps=self.full_jumps)
+        if self.opening_book is not None:
+            action = self.opening_book.probe(node)
+            if action is not None:
+                return action, 0
+        if self.tablebase is not None:
+            return self.tablebase.best_move(node)
+        return None
+
     @abstractmethod
     def _get_move(self, start_from: Tuple = None) -> Tuple[Action, int]:
         pass
 
+    def _new_search(self, state: GameState = None):
+        """
+        Readies the agent's transposition table and move orderer, if it has them, for the search of a new move from
+        state, the game's state by default. The searching agents call this at the start of _get_move(), and the
+        workers of the parallel agents on the first root child of a move they search.
+        """
+        table = getattr(self, 'transposition_table', None)
+        if table is not None:
+            table.new_search()
+            (state if state is not None else self.game.state).reset_zobrist_key()
+        move_orderer = getattr(self, 'move_orderer', None)
+        if move_orderer is not None:
+            move_orderer.new_search()
 
-def _action(action: Action, state: GameState):
-    current_pos, final_pos = (action.from_x, action.from_y), (action.to_x, action.to_y)
 
-    if (state.board.location(final_pos[0], final_pos[1]).occupant is not None
-            and state.board.location(final_pos[0], final_pos[1]).occupant.color == state.turn):
-        state.end_turn()
-        return
+def _action(action: Action, state: GameState):
+    if isinstance(action, Move):
+        state.apply_move(action)
+    else:
+        state.apply_action(action)
 
-    state.board.move_piece(current_pos[0], current_pos[1], final_pos[0], final_pos[1])
-    if final_pos not in state.board.adjacent(current_pos[0], current_pos[1]):  # hop
-        state.board.remove_piece(current_pos[0] + (final_pos[0] - current_pos[0]) // 2,
-                                 current_pos[1] + (final_pos[1] - current_pos[1]) // 2)
 
-        if state.board.legal_moves(final_pos[0], final_pos[1], mid_hop=True):
-            # More legal moves to make, we are mid-hop
-            state.mid_hop = True
+def _leaf_values(node: Node, actions: List[Action], batch_eval_fn: Callable, color: PlayerColor,
+                 stats: SearchStats = None) -> List[float]:
+    """
+    Values of the children of a node just above the search horizon, in the order of actions. Children where the
+    game is over get the usual +/-24, all the others are scored by batch_eval_fn in a single call.
+    """
+    values = [None] * len(actions)
+    leaves, masks = [], []
+    for i, action in enumerate(actions):
+        child, undo = node.push(action)
+        if child.state.game_over:
+            values[i] = 24 if child.state.whoWon() == color else -24
         else:
-            # No more legal moves now
-            state.end_turn()
+            leaves.append(i)
+            masks.append(board_masks(child.state.board))
+        node.pop(undo)
+
+    if stats is not None:
+        stats.node(node.depth + 1, len(actions))
+        stats.eval_calls += len(masks)
+    if masks:
+        for i, value in zip(leaves, batch_eval_fn(masks_to_array(masks), color).tolist()):
+            values[i] = value
+    return values
+
+
+def _quiescence(node: Node, color: PlayerColor, eval_fn: Callable, alpha: float, beta: float,
+                win_value: float, stats: SearchStats = None) -> Tuple[float, int]:
+    """
+    The value of a node at the search horizon once the captures available there have played out, and the nodes
+    explored past the horizon to find it. Captures are not forced, so the side to move can stand pat on eval_fn
+    instead, except in the middle of a multi-jump, where the piece has to keep hopping.
+    The nodes below the horizon are counted in stats, as the agent's own search counts the horizon node.
+    """
+    state = node.state
+    if state.game_over:
+        return (win_value if state.whoWon() == color else -win_value), 0
+
+    maximizing = state.turn == color
+    if state.mid_hop:
+        best = float('-inf') if maximizing else float('inf')
     else:
-        state.end_turn()
+        best = eval_fn(state.board, color)
+        if stats is not None:
+            stats.eval_calls += 1
+        if (maximizing and best > beta) or (not maximizing and best < alpha):
+            return best, 0
+
+    nodes_explored = 0
+    if stats is not None:
+        stats.movegen_calls += 1
+    captures = [action for action in node.next_actions() if _is_capture(action)]
+    for i, action in enumerate(captures):
+        child, undo = node.push(action)
+        if stats is not None:
+            stats.node(child.depth)
+        value, explored = _quiescence(child, color, eval_fn, alpha, beta, win_value, stats)
+        node.pop(undo)
+        nodes_explored += explored + 1
+        if maximizing:
+            best = max(best, value)
+            if best > beta:
+                if stats is not None:
+                    stats.cutoff(beta=True, first_move=i == 0)
+                break
+            alpha = max(alpha, best)
+        else:
+            best = min(best, value)
+            if best < alpha:
+                if stats is not None:
+                    stats.cutoff(beta=False, first_move=i == 0)
+                break
+            beta = min(beta, best)
+    return best, nodes_explored
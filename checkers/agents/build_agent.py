@@ -1,29 +1,100 @@
-from collections import Callable
-from typing import Tuple
+from typing import Callable, Tuple
 
 import checkers
 from agents.agent import Agent
+from agents.iterative_deepening_agent import IterativeDeepeningAgent
 from agents.minimax_agent import MinimaxAgent
 from agents.minimax_alpha_beta_agent import MinimaxAlphaBetaAgent
 from agents.minimax_alpha_beta_jumps_first_agent import MinimaxAlphaBetaJumpsFirstAgent
 from agents.minimax_alpha_beta_jumps_first_variable_depth_agent import MinimaxAlphaBetaJumpsFirstVariableDepthAgent
 from agents.minimax_alpha_beta_random_ordering_agent import MinimaxAlphaBetaRandomAgent
+from agents.parallel_pvs_agent import ParallelPVSAgent
 from agents.random_agent import RandomAgent
+from agents.root_parallel_agent import RootParallelAgent
+from move_ordering import MoveOrderer
+from opening_book import OpeningBook
+from tablebase import Tablebase
+from transposition_table import TranspositionTable
+
+PARALLEL_AGENTS = ('minimax_ab', 'minimax_ab_random', 'minimax_ab_jumps_first')
 
 
 def build_agent(game: checkers.Game, agent: str, color: Tuple, depth: int = None, eval_fn: Callable = None,
-                tiebreaker_fn: Callable = None) -> Agent:
+                tiebreaker_fn: Callable = None, tt_size: int = None, time_budget_ms: int = None,
+                batch_leaves: bool = False, parallel: str = None, workers: int = None,
+                move_ordering: bool = False, full_jumps: bool = False, tablebase: str = None,
+                opening_book: str = None, quiescence: bool = False) -> Agent:
+    # full_jumps makes the agent search and play whole capture paths as single moves, so depth counts turns
+    # tablebase is a directory of endgame tables (see tablebase.py): the agent plays from them once they cover the
+    # position, and the alpha-beta agents stop searching at any node they cover
+    built = _build_agent(game=game, agent=agent, color=color, depth=depth, eval_fn=eval_fn, tiebreaker_fn=tiebreaker_fn,
+                         tt_size=tt_size, time_budget_ms=time_budget_ms, batch_leaves=batch_leaves, parallel=parallel,
+                         workers=workers, move_ordering=move_ordering, full_jumps=full_jumps, tablebase=tablebase,
+                         quiescence=quiescence)
+    built.full_jumps = full_jumps
+    built.tablebase = Tablebase(tablebase) if tablebase else None
+    # opening_book is a book file built by build_opening_book.py, its moves are played without searching
+    built.opening_book = OpeningBook.load(opening_book) if opening_book else None
+    return built
+
+
+def _build_agent(game: checkers.Game, agent: str, color: Tuple, depth: int, eval_fn: Callable,
+                 tiebreaker_fn: Callable, tt_size: int, time_budget_ms: int, batch_leaves: bool, parallel: str,
+                 workers: int, move_ordering: bool, full_jumps: bool, tablebase: str, quiescence: bool) -> Agent:
+    # tt_size gives the alpha-beta agents a transposition table with that many slots
+    # batch_leaves makes minimax and minimax_ab score horizon nodes with vectorized_eval_fns, a batch at a time
+    transposition_table = TranspositionTable(tt_size) if tt_size else None
+    # move_ordering gives the alpha-beta agents a MoveOrderer (hash move, captures, killers, history)
+    move_orderer = MoveOrderer(transposition_table) if move_ordering else None
+    # quiescence makes the alpha-beta agents play out captures past depth before scoring a position
+
+    # parallel='root' searches the root's children with `workers` processes (all cores by default), each running
+    # the serial alpha-beta agent built from the other arguments.
+    # parallel='pvs' is minimax_ab_jumps_first with the root's younger children scouted in parallel.
+    if parallel == 'pvs':
+        if agent != 'minimax_ab_jumps_first':
+            raise ValueError(f'{agent} cannot search with parallel PVS, only minimax_ab_jumps_first can')
+        return ParallelPVSAgent(color=color, game=game, depth=depth, eval_fn=eval_fn, tiebreaker_fn=tiebreaker_fn,
+                                transposition_table=transposition_table, move_orderer=move_orderer, workers=workers,
+                                quiescence=quiescence)
+    if parallel is not None:
+        if agent not in PARALLEL_AGENTS:
+            raise ValueError(f'{agent} cannot search in parallel, expected one of {PARALLEL_AGENTS}')
+        searcher = build_agent(game=None, agent=agent, color=color, depth=depth, eval_fn=eval_fn,
+                               tiebreaker_fn=tiebreaker_fn, tt_size=tt_size, batch_leaves=batch_leaves,
+                               move_ordering=move_ordering, full_jumps=full_jumps, tablebase=tablebase,
+                               quiescence=quiescence)
+        if parallel == 'root':
+            return RootParallelAgent(color=color, game=game, searcher=searcher, workers=workers)
+        raise ValueError(f'unknown parallel mode {parallel}')
+
     if agent == 'minimax':
-        return MinimaxAgent(color=color, game=game, depth=depth, eval_fn=eval_fn)
+        return MinimaxAgent(color=color, game=game, depth=depth, eval_fn=eval_fn, batch_leaves=batch_leaves)
     elif agent == 'minimax_ab':
-        return MinimaxAlphaBetaAgent(color=color, game=game, depth=depth, eval_fn=eval_fn)
+        return MinimaxAlphaBetaAgent(color=color, game=game, depth=depth, eval_fn=eval_fn,
+                                     transposition_table=transposition_table, batch_leaves=batch_leaves,
+                                     move_orderer=move_orderer, quiescence=quiescence)
     elif agent == 'minimax_ab_random':
-        return MinimaxAlphaBetaRandomAgent(color=color, game=game, depth=depth, eval_fn=eval_fn)
+        return MinimaxAlphaBetaRandomAgent(color=color, game=game, depth=depth, eval_fn=eval_fn,
+                                           transposition_table=transposition_table, move_orderer=move_orderer,
+                                           quiescence=quiescence)
     elif agent == 'minimax_ab_jumps_first':
         return MinimaxAlphaBetaJumpsFirstAgent(color=color, game=game, depth=depth, eval_fn=eval_fn,
-                                               tiebreaker_fn=tiebreaker_fn)
+                                               tiebreaker_fn=tiebreaker_fn, transposition_table=transposition_table,
+                                               move_orderer=move_orderer, quiescence=quiescence)
     elif agent == 'minimax_ab_jumps_first_variable_depth':
         return MinimaxAlphaBetaJumpsFirstVariableDepthAgent(color=color, game=game, depth=depth, eval_fn=eval_fn,
-                                                            tiebreaker_fn=tiebreaker_fn)
+                                                            tiebreaker_fn=tiebreaker_fn,
+                                                            transposition_table=transposition_table,
+                                                            move_orderer=move_orderer, quiescence=quiescence)
+    elif agent == 'minimax_ab_iterative_deepening':
+        # depth is optional here and caps how deep the search may go within time_budget_ms
+        if time_budget_ms is None or time_budget_ms <= 0:
+            raise ValueError(f'{agent} needs a positive time_budget_ms, got {time_budget_ms}')
+        return IterativeDeepeningAgent(color=color, game=game, time_budget_ms=time_budget_ms, depth=depth,
+                                       eval_fn=eval_fn, tiebreaker_fn=tiebreaker_fn,
+                                       transposition_table=transposition_table, move_orderer=move_orderer,
+                                       quiescence=quiescence)
     elif agent == 'random':
         return RandomAgent(color=color, game=game, eval_fn=None)
+    raise ValueError(f'unknown agent {agent}')
@@ -0,0 +1,86 @@
+import time
+from copy import deepcopy
+from typing import List, Tuple, Union
+
+from agents.minimax_alpha_beta_jumps_first_agent import MinimaxAlphaBetaJumpsFirstAgent
+from checkers import Action, Game
+from eval_fns import piece2val
+from game_state import Node, PlayerColor
+from move_ordering import MoveOrderer
+from transposition_table import TranspositionTable
+
+MAX_DEPTH = 64
+WIN_SCORE = 99999999  # what MinimaxAlphaBetaJumpsFirstAgent scores a finished game as
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class IterativeDeepeningAgent(MinimaxAlphaBetaJumpsFirstAgent):
+    """
+    Searches to depth 1, 2, 3, ... until the time budget for the move runs out, and plays the best move of the
+    deepest search that finished. Each search tries the moves the previous search found best first.
+    """
+
+    def __init__(self, color: PlayerColor, game: Game, time_budget_ms: int, depth: int = None, eval_fn=piece2val,
+                 tiebreaker_fn=None, transposition_table: TranspositionTable = None, move_orderer: MoveOrderer = None,
+                 quiescence: bool = False):
+        super().__init__(color, game, depth=1, eval_fn=eval_fn, tiebreaker_fn=tiebreaker_fn,
+                         transposition_table=transposition_table, move_orderer=move_orderer, quiescence=quiescence)
+        self.time_budget_ms = time_budget_ms
+        self.max_depth = depth if depth is not None else MAX_DEPTH
+
+        self._deadline = 0
+        self._nodes_explored = 0
+        self._best_moves = {}  # zobrist key -> best action found there by the running iteration
+        self._previous_best_moves = {}  # the same, from the last iteration that finished
+
+    def _get_move(self, start_from: Tuple = None) -> Tuple[Action, int]:
+        self._deadline = time.perf_counter() + self.time_budget_ms / 1000
+        self._nodes_explored = 0
+        self._previous_best_moves = {}
+        self._new_search()
+
+        # A search that times out stops half way down the tree, so search a copy instead of the game's state
+        state = deepcopy(self.game.state)
+        state.reset_zobrist_key()
+
+        best_action = None
+        for depth in range(1, self.max_depth + 1):
+            self.depth_limit = depth
+            self._best_moves = {}
+            starting_state = Node(state=state, eval_fn=self.eval_fn, start_from=start_from,
+                                  full_jumps=self.full_jumps)
+            try:
+                value, action, _ = self.minimax(starting_state=starting_state, depth=depth)
+            except SearchTimeout:
+                break
+
+            best_action = action
+            self._previous_best_moves = self._best_moves
+            if abs(value) >= WIN_SCORE or time.perf_counter() >= self._deadline:
+                break
+
+        return best_action, self._nodes_explored
+
+    def minimax(self, starting_state: Node, depth=10,
+                alpha=float('-inf'), beta=float('inf')) -> Tuple[float, Union[Action, None], int]:
+        # depth 1 always finishes, so there is always a move to play
+        if self.depth_limit > 1 and time.perf_counter() >= self._deadline:
+            raise SearchTimeout()
+        if starting_state.depth > 0:
+            self._nodes_explored += 1
+
+        value, action, nodes_explored = super().minimax(starting_state, depth, alpha, beta)
+        if action is not None:
+            self._best_moves[starting_state.state.zobrist_key] = action
+        return value, action, nodes_explored
+
+    def _order_actions(self, state: Node, actions: List[Action]) -> List[Action]:
+        actions = super()._order_actions(state, actions)
+        previous_best = self._previous_best_moves.get(state.state.zobrist_key)
+        if previous_best in actions:
+            actions.remove(previous_best)
+            actions.insert(0, previous_best)
+        return actions
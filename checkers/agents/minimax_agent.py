@@ -1,37 +1,45 @@
 import random
 from typing import Tuple, Union
 
+from agents.agent import _leaf_values
 from agents.build_agent import Agent
 from checkers import Game, Action
 from eval_fns import piece2val
 from game_state import Node, PlayerColor
+from vectorized_eval_fns import batch_eval_fn
 
 
 class MinimaxAgent(Agent):
     depth_limit: int = 0
 
-    def __init__(self, color: PlayerColor, game: Game, depth: int, eval_fn=piece2val):
+    def __init__(self, color: PlayerColor, game: Game, depth: int, eval_fn=piece2val, batch_leaves: bool = False):
         super().__init__(color, game, eval_fn)
         self.depth_limit = depth
+        # with batch_leaves, the children of a node just above the horizon are scored with one vectorized call
+        self.batch_eval_fn = batch_eval_fn(eval_fn) if batch_leaves else None
 
     def _get_move(self, start_from: Tuple = None) -> Tuple[Action, int]:
         starting_state = Node(
             state=self.game.state,
             eval_fn=self.eval_fn,
             start_from=start_from,
+            full_jumps=self.full_jumps,
         )
         value, action, nodes_explored = self.minimax(starting_state=starting_state, depth=self.depth_limit)
         return action, nodes_explored
 
     def minimax(self, starting_state: Node, depth=10) -> Tuple[float, Union[Action, None], int]:
+        self.stats.node(starting_state.depth)
         if starting_state.state.game_over:
             # print('game over state eval')
             return (24 if starting_state.state.whoWon() == self.color else -24), None, 0
 
         if starting_state.depth >= depth:
             # return starting_state.value(), None
+            self.stats.eval_calls += 1
             return self.eval_fn(starting_state.state.board, self.color), None, 0
 
+        self.stats.movegen_calls += 1
         if starting_state.state.turn == self.color:
             # print('running max')
             return self.run_max(starting_state)
@@ -39,15 +47,26 @@ class MinimaxAgent(Agent):
             # print('running min')
             return self.run_min(starting_state)
 
+    def _leaf_values(self, state: Node, actions):
+        if self.batch_eval_fn is None or state.depth + 1 < self.depth_limit:
+            return None
+        return _leaf_values(state, actions, self.batch_eval_fn, self.color, self.stats)
+
     def run_max(self, state: Node) -> Tuple[float, Union[Action, None], int]:
         max_value = float('-inf')
         max_action = None
 
         nodes_explored = 0
-        for action in state.next_actions():
-            new_game_state = state.next_node(action)
+        actions = state.next_actions()
+        leaf_values = self._leaf_values(state, actions)
+        for i, action in enumerate(actions):
             nodes_explored += 1
-            value, _, explored = self.minimax(new_game_state, self.depth_limit)
+            if leaf_values is not None:
+                value, explored = leaf_values[i], 0
+            else:
+                new_game_state, undo = state.push(action)
+                value, _, explored = self.minimax(new_game_state, self.depth_limit)
+                state.pop(undo)
             nodes_explored += explored
             # print(f'MAX: Considering ({action.from_x}, {action.from_y}) => ({action.to_x}, {action.to_y}) '
             #       f'with value {value}')
@@ -67,10 +86,16 @@ class MinimaxAgent(Agent):
         min_action = None
 
         nodes_explored = 0
-        for action in state.next_actions():
-            new_game_state = state.next_node(action)
+        actions = state.next_actions()
+        leaf_values = self._leaf_values(state, actions)
+        for i, action in enumerate(actions):
             nodes_explored += 1
-            value, _, explored = self.minimax(new_game_state, self.depth_limit)
+            if leaf_values is not None:
+                value, explored = leaf_values[i], 0
+            else:
+                new_game_state, undo = state.push(action)
+                value, _, explored = self.minimax(new_game_state, self.depth_limit)
+                state.pop(undo)
             nodes_explored += explored
             # print(f'MIN: Considering ({action.from_x}, {action.from_y}) => ({action.to_x}, {action.to_y}) '
             # f'with value {value}')
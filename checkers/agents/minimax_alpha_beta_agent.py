@@ -1,59 +1,113 @@
 import random
-from typing import Tuple, Union
+from typing import List, Tuple, Union
 
+from agents.agent import _leaf_values, _quiescence
 from agents.build_agent import Agent
 from checkers import Game, Action
 from eval_fns import piece2val
 from game_state import Node, PlayerColor
+from move_ordering import MoveOrderer
+from transposition_table import TranspositionTable
+from vectorized_eval_fns import batch_eval_fn
 
 
 class MinimaxAlphaBetaAgent(Agent):
     depth_limit: int = 0
 
-    def __init__(self, color: PlayerColor, game: Game, depth: int, eval_fn=piece2val):
+    def __init__(self, color: PlayerColor, game: Game, depth: int, eval_fn=piece2val,
+                 transposition_table: TranspositionTable = None, batch_leaves: bool = False,
+                 move_orderer: MoveOrderer = None, quiescence: bool = False):
         super().__init__(color, game, eval_fn)
         self.depth_limit = depth
+        self.transposition_table = transposition_table
+        self.move_orderer = move_orderer
+        # with quiescence, the search keeps playing out captures past the horizon before trusting eval_fn
+        self.quiescence = quiescence
+        # with batch_leaves, the children of a node just above the horizon are scored with one vectorized call
+        self.batch_eval_fn = batch_eval_fn(eval_fn) if batch_leaves else None
 
     def _get_move(self, start_from: Tuple = None) -> Tuple[Action, int]:
+        self._new_search()
         starting_state = Node(
             state=self.game.state,
             eval_fn=self.eval_fn,
             start_from=start_from,
+            full_jumps=self.full_jumps,
         )
         value, action, nodes_explored = self.minimax(starting_state=starting_state, depth=self.depth_limit)
         return action, nodes_explored
 
     def minimax(self, starting_state: Node, depth=10,
                 alpha=float('-inf'), beta=float('inf')) -> Tuple[float, Union[Action, None], int]:
+        self.stats.node(starting_state.depth)
         if starting_state.state.game_over:
             # print('game over state eval')
             return (24 if starting_state.state.whoWon() == self.color else -24), None, 0
 
+        if self.tablebase is not None and starting_state.depth > 0:
+            value = self.tablebase.score(starting_state.state, self.color, win_value=24)
+            if value is not None:
+                return value, None, 0
+
         if starting_state.depth >= depth:
+            if self.quiescence:
+                value, nodes_explored = _quiescence(starting_state, self.color, self.eval_fn, alpha, beta,
+                                                    win_value=24, stats=self.stats)
+                return value, None, nodes_explored
             # return starting_state.value(), None
+            self.stats.eval_calls += 1
             return self.eval_fn(starting_state.state.board, self.color), None, 0
 
+        key = starting_state.state.zobrist_key
+        if self.transposition_table is not None:
+            entry = self.transposition_table.probe(key, depth - starting_state.depth, alpha, beta)
+            if entry is not None:
+                return entry.value, entry.best_action, 0
+
+        self.stats.movegen_calls += 1
         if starting_state.state.turn == self.color:
             # print('running max')
-            return self.run_max(starting_state, alpha=alpha, beta=beta)
+            value, action, nodes_explored = self.run_max(starting_state, alpha=alpha, beta=beta)
         else:
             # print('running min')
-            return self.run_min(starting_state, alpha=alpha, beta=beta)
+            value, action, nodes_explored = self.run_min(starting_state, alpha=alpha, beta=beta)
+
+        if self.transposition_table is not None:
+            self.transposition_table.store(key, depth - starting_state.depth, alpha, beta, value, action)
+        return value, action, nodes_explored
+
+    def _leaf_values(self, state: Node, actions):
+        """
+        Scores all children at once when they are leaves. Children past a cutoff get scored too, which is cheaper
+        in a batch than stopping early one by one.
+        """
+        if self.batch_eval_fn is None or self.quiescence or state.depth + 1 < self.depth_limit:
+            return None
+        return _leaf_values(state, actions, self.batch_eval_fn, self.color, self.stats)
 
     def run_max(self, state: Node, alpha: float, beta: float) -> Tuple[float, Union[Action, None], int]:
         max_value = float('-inf')
         max_action = None
 
         nodes_explored = 0
-        for action in state.next_actions():
-            new_game_state = state.next_node(action)
+        actions = self._order_actions(state, state.next_actions())
+        leaf_values = self._leaf_values(state, actions)
+        for i, action in enumerate(actions):
             nodes_explored += 1
-            value, _, explored = self.minimax(new_game_state, self.depth_limit, alpha=alpha, beta=beta)
+            if leaf_values is not None:
+                value, explored = leaf_values[i], 0
+            else:
+                new_game_state, undo = state.push(action)
+                value, _, explored = self.minimax(new_game_state, self.depth_limit, alpha=alpha, beta=beta)
+                state.pop(undo)
             nodes_explored += explored
             if (value > max_value) or (value == max_value and bool(random.randint(0, 1))):
                 max_value = value
                 max_action = action
                 if max_value > beta:
+                    self.stats.cutoff(beta=True, first_move=i == 0)
+                    if self.move_orderer is not None:
+                        self.move_orderer.cutoff(state, action, self.depth_limit - state.depth)
                     return max_value, max_action, nodes_explored
                 alpha = max(alpha, max_value)
 
@@ -66,18 +120,32 @@ class MinimaxAlphaBetaAgent(Agent):
         min_action = None
 
         nodes_explored = 0
-        for action in state.next_actions():
-            new_game_state = state.next_node(action)
+        actions = self._order_actions(state, state.next_actions())
+        leaf_values = self._leaf_values(state, actions)
+        for i, action in enumerate(actions):
             nodes_explored += 1
-            value, _, explored = self.minimax(new_game_state, self.depth_limit, alpha=alpha, beta=beta)
+            if leaf_values is not None:
+                value, explored = leaf_values[i], 0
+            else:
+                new_game_state, undo = state.push(action)
+                value, _, explored = self.minimax(new_game_state, self.depth_limit, alpha=alpha, beta=beta)
+                state.pop(undo)
             nodes_explored += explored
             if (value < min_value) or (value == min_value and bool(random.randint(0, 1))):
                 min_value = value
                 min_action = action
                 if min_value < alpha:
                     # print('Alpha cutoff')
+                    self.stats.cutoff(beta=False, first_move=i == 0)
+                    if self.move_orderer is not None:
+                        self.move_orderer.cutoff(state, action, self.depth_limit - state.depth)
                     return min_value, min_action, nodes_explored
                 beta = min(beta, min_value)
         if min_action is None:  # if you can't take any actions, your value is 0
             return 0, None, nodes_explored
         return min_value, min_action, nodes_explored
+
+    def _order_actions(self, state: Node, actions: List[Action]) -> List[Action]:
+        if self.move_orderer is not None:
+            return self.move_orderer.order(state, actions)
+        return actions
@@ -7,10 +7,12 @@ from game_state import Node
 
 class MinimaxAlphaBetaJumpsFirstVariableDepthAgent(MinimaxAlphaBetaJumpsFirstAgent):
     def _get_move(self, start_from: Tuple = None) -> Tuple[Action, int]:
+        self._new_search()
         starting_state = Node(
             state=self.game.state,
             eval_fn=self.eval_fn,
             start_from=start_from,
+            full_jumps=self.full_jumps,
         )
         min_players_left = min(len(starting_state.state.board.get_locations_by_color(self.color)),
                                len(starting_state.state.board.get_locations_by_color(_next_player_color(self.color))))
@@ -0,0 +1,95 @@
+"""
+parallel_pvs_agent.py
+
+Principal variation search at the root with Young Brothers Wait: the eldest (first ordered) child is searched
+serially with the full window. Once its value is known, its younger brothers are searched in parallel by worker
+processes with a null window (alpha, alpha), which only tells whether they do better than the eldest.
+The few that do are searched again, still in parallel, with the window (alpha, inf) to get their exact value.
+
+Workers run a serial MinimaxAlphaBetaJumpsFirstAgent, using the pool from root_parallel_agent. Below the root the
+search is the serial one.
+"""
+
+import multiprocessing as mp
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Tuple, Union
+
+from agents.minimax_alpha_beta_jumps_first_agent import MinimaxAlphaBetaJumpsFirstAgent
+from agents.root_parallel_agent import _new_pool, _pick_best, _search_root_child
+from checkers import Action, Game
+from eval_fns import piece2val
+from game_state import Node, PlayerColor
+from move_ordering import MoveOrderer
+from transposition_table import TranspositionTable
+
+
+class ParallelPVSAgent(MinimaxAlphaBetaJumpsFirstAgent):
+    def __init__(self, color: PlayerColor, game: Game, depth: int, eval_fn=piece2val, tiebreaker_fn=None,
+                 transposition_table: TranspositionTable = None, move_orderer: MoveOrderer = None,
+                 workers: int = None, quiescence: bool = False):
+        super().__init__(color, game, depth=depth, eval_fn=eval_fn, tiebreaker_fn=tiebreaker_fn,
+                         transposition_table=transposition_table, move_orderer=move_orderer, quiescence=quiescence)
+        self.workers = workers or mp.cpu_count()
+        # what every worker runs, each with its own transposition table and move orderer
+        worker_table = TranspositionTable(transposition_table.size) if transposition_table else None
+        self.searcher = MinimaxAlphaBetaJumpsFirstAgent(
+            color, None, depth=depth, eval_fn=eval_fn, tiebreaker_fn=tiebreaker_fn,
+            transposition_table=worker_table, move_orderer=MoveOrderer(worker_table) if move_orderer else None,
+            quiescence=quiescence)
+
+        self._pool = None
+        self._search_id = 0  # one per move, see root_parallel_agent._search_root_child()
+
+    def run_max(self, state: Node, alpha: float, beta: float) -> Tuple[float, Union[Action, None], int]:
+        next_actions = self._order_actions(state, state.next_actions())
+        if state.depth > 0 or len(next_actions) < 2:
+            return super().run_max(state, alpha, beta)
+
+        eldest, younger = next_actions[0], next_actions[1:]
+        new_game_state, undo = state.push(eldest)
+        value, _, explored = self.minimax(new_game_state, self.depth_limit, alpha=alpha, beta=beta)
+        state.pop(undo)
+        nodes_explored = explored + 1
+        values = {eldest: value}
+        alpha = max(alpha, value)
+
+        pool = self._get_pool()
+        self._search_id += 1
+        scout_alpha = alpha
+        scouts = {pool.submit(_search_root_child, state.state, action, self._search_id, scout_alpha,
+                              scout_alpha): action
+                  for action in younger}
+        re_searches = {}
+        while scouts or re_searches:
+            done, _ = wait(list(scouts) + list(re_searches), return_when=FIRST_COMPLETED)
+            for future in done:
+                value, explored, stats = future.result()
+                nodes_explored += explored
+                self.stats.merge(stats)
+                if future in scouts:
+                    action = scouts.pop(future)
+                    # With the strict cutoffs of run_max and run_min, a null window search returns the exact value
+                    # when it is scout_alpha, and a lower bound when it is above. Only the latter are searched again.
+                    if value > scout_alpha:
+                        re_searches[pool.submit(_search_root_child, state.state, action, self._search_id,
+                                                alpha)] = action
+                        continue
+                else:
+                    action = re_searches.pop(future)
+                    alpha = max(alpha, value)
+                values[action] = value
+
+        max_value, max_action = _pick_best(state, next_actions, [values[action] for action in next_actions],
+                                           self.color, self.tiebreaker_fn)
+        return max_value, max_action, nodes_explored
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self.searcher.full_jumps = self.full_jumps
+            self._pool = _new_pool(self.workers, self.searcher, mp.Value('d', float('-inf')))
+        return self._pool
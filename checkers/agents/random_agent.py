@@ -13,6 +13,7 @@ class RandomAgent(Agent):
             state=self.game.state,
             eval_fn=self.eval_fn,
             start_from=start_from,
+            full_jumps=self.full_jumps,
         )
         actions = starting_state.next_actions()
         return random.choice(actions), 0
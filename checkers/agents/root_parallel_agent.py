@@ -0,0 +1,155 @@
+"""
+root_parallel_agent.py
+
+Spreads the children of the root over a pool of worker processes. Every worker holds its own copy of a serial
+alpha-beta agent (the searcher) and searches one root child at a time with it.
+
+The best root value found so far is kept in shared memory. A worker reads it as alpha when it starts on a child, and
+raises it when it finishes one, so children started later are searched with a tighter window, like they would be
+in a serial search.
+
+The pool is started on the first move and reused afterwards. It cannot be used from inside another process pool
+(e.g. competition.parallel_main), since pool workers are not allowed to start processes of their own.
+"""
+
+import multiprocessing as mp
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Union
+
+from agents.agent import Agent
+from checkers import Action, Game, GameState
+from game_state import Node, PlayerColor
+from search_stats import SearchStats
+
+_searcher: Agent = None  # the worker's own serial searcher
+_shared_alpha = None  # the best root value found so far during this move, shared by all workers
+_search_id = None  # which move the worker's searcher last searched a child of
+
+
+class RootParallelAgent(Agent):
+    def __init__(self, color: PlayerColor, game: Game, searcher: Agent, workers: int = None):
+        """
+        searcher is the serial alpha-beta agent to run in every worker, its game is never used.
+        workers defaults to the number of cores.
+        """
+        super().__init__(color, game, searcher.eval_fn)
+        self.searcher = searcher
+        self.depth_limit = searcher.depth_limit
+        self.workers = workers or mp.cpu_count()
+
+        self._alpha = mp.Value('d', float('-inf'))
+        self._pool = None
+        self._search_id = 0  # one per move, see _search_root_child()
+
+    def _get_move(self, start_from: Tuple = None) -> Tuple[Action, int]:
+        self.game.state.reset_zobrist_key()
+        starting_state = Node(state=self.game.state, eval_fn=self.eval_fn, start_from=start_from,
+                              full_jumps=self.full_jumps)
+        value, action, nodes_explored = self.search(starting_state)
+        return action, nodes_explored
+
+    def search(self, starting_state: Node) -> Tuple[float, Union[Action, None], int]:
+        """
+        Returns the root value, the move to play and the number of nodes explored, like the searcher's minimax().
+        """
+        self.stats.node(starting_state.depth)
+        self.stats.movegen_calls += 1
+        actions = self._order_actions(starting_state, starting_state.next_actions())
+        if not actions:  # if you can't take any actions, your value is 0
+            return 0, None, 0
+
+        self._alpha.value = float('-inf')
+        self._search_id += 1
+        pool = self._get_pool()
+        futures = [pool.submit(_search_root_child, starting_state.state, action, self._search_id)
+                   for action in actions]
+        results = [future.result() for future in futures]
+        for _, _, stats in results:
+            self.stats.merge(stats)
+
+        max_value, max_action = _pick_best(starting_state, actions, [value for value, _, _ in results], self.color,
+                                           getattr(self.searcher, 'tiebreaker_fn', None))
+        return max_value, max_action, sum(explored for _, explored, _ in results)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _order_actions(self, state: Node, actions: List[Action]) -> List[Action]:
+        # the most promising children go first, so their values tighten alpha for the rest
+        if hasattr(self.searcher, '_order_actions'):
+            return self.searcher._order_actions(state, actions)
+        return actions
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = _new_pool(self.workers, self.searcher, self._alpha)
+        return self._pool
+
+
+def _new_pool(workers: int, searcher: Agent, shared_alpha) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(searcher, shared_alpha))
+
+
+def _init_worker(searcher: Agent, shared_alpha):
+    global _searcher, _shared_alpha
+    _searcher = searcher
+    _shared_alpha = shared_alpha
+
+
+def _pick_best(state: Node, actions: List[Action], values: List[float], color: PlayerColor,
+               tiebreaker_fn=None) -> Tuple[float, Union[Action, None]]:
+    """
+    Picks the root move from the values of its children the way run_max does, ties included. Children that failed
+    low scored below the best child, so they can never tie with it.
+    """
+    max_value = float('-inf')
+    max_action = None
+    for action, value in zip(actions, values):
+        if value > max_value or (value == max_value and (
+                (tiebreaker_fn is not None and tiebreaker_fn(max_action, action, state, color))
+                or bool(random.randint(0, 1)))):
+            max_value = value
+            max_action = action
+    return max_value, max_action
+
+
+def _search_root_child(state: GameState, action: Action, search_id: int, alpha: float = None,
+                       beta: float = float('inf')) -> Tuple[float, int, SearchStats]:
+    """
+    Runs in a worker. Returns the value of playing action in state, the nodes explored to find it and the search
+    stats of this child alone. Searches with the shared alpha unless given a window.
+    search_id tells the moves apart: the worker's transposition table and move orderer start a new search on the
+    first child of a move it gets, not on every child, which would age out what the children before searched during
+    the same move.
+    """
+    global _search_id
+    _searcher.stats = SearchStats()
+    table = getattr(_searcher, 'transposition_table', None)
+    if search_id != _search_id:
+        _search_id = search_id
+        _searcher._new_search(state)
+    tt_counts = (table.probes, table.hits) if table is not None else (0, 0)
+
+    root = Node(state=state, eval_fn=_searcher.eval_fn, full_jumps=_searcher.full_jumps)
+    child, _ = root.push(action)
+    if alpha is not None:
+        value, _, nodes_explored = _searcher.minimax(child, _searcher.depth_limit, alpha=alpha, beta=beta)
+        return value, nodes_explored + 1, _child_stats(table, tt_counts)
+
+    value, _, nodes_explored = _searcher.minimax(child, _searcher.depth_limit, alpha=_shared_alpha.value, beta=beta)
+    with _shared_alpha.get_lock():
+        if value > _shared_alpha.value:
+            _shared_alpha.value = value
+    return value, nodes_explored + 1, _child_stats(table, tt_counts)
+
+
+def _child_stats(table, tt_counts: Tuple[int, int]) -> SearchStats:
+    # the worker's table lives on between children, so only count its probes and hits since tt_counts were read
+    stats = _searcher.stats
+    if table is not None:
+        stats.tt_probes = table.probes - tt_counts[0]
+        stats.tt_hits = table.hits - tt_counts[1]
+    return stats
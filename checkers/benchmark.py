@@ -0,0 +1,266 @@
+"""
+benchmark.py
+
+Times the hot paths of the engine on a fixed corpus of positions (the opening, a midgame, a multi-jump and a king
+endgame), so that a change to move generation, evaluation or search can be checked for speed regressions:
+- Board.legal_moves for every piece of the side to move, on both Board and BitBoard, and on Board the way it was
+  before the move tables (with rel() and on_board(), see reference_legal_moves())
+- Node.next_actions, and Node.next_node for every one of those actions
+- every heuristic in EVAL_FNS
+- a SEARCH_DEPTH search by every agent in SEARCH_SETUPS, with the nodes it explored
+- perft to PERFT_DEPTH (see perft.py), with the positions it counted
+
+Each number is the fastest of REPEATS runs. The results are saved to RESULTS_FILE and compared with BASELINE_FILE,
+if there is one: anything more than REGRESSION_THRESHOLD slower is reported, and so is a search that explored a
+different number of nodes or perft positions, which means its move generation or ordering changed. Set
+SAVE_BASELINE to make a run the new baseline. Timings only compare between runs on the same machine.
+"""
+
+import json
+import os
+import platform
+import random
+import time
+import timeit
+from copy import deepcopy
+from typing import Callable, Dict, List
+
+from agents.build_agent import build_agent
+from bitboard import BitBoard, _INDEX
+from checkers import BLUE, GameState, NORTHEAST, NORTHWEST, RED, SOUTHEAST, SOUTHWEST
+from eval_fns import furthest_king, piece2val, piece2val_favor_kings, piece2val_keep_back_row, \
+    piece2val_move_to_opponent
+from game_state import Node
+from headless import HeadlessGame
+from perft import perft, root
+
+RESULTS_FILE = 'results/benchmarks/benchmark.json'
+BASELINE_FILE = 'results/benchmarks/benchmark_baseline.json'
+SAVE_BASELINE = False
+REGRESSION_THRESHOLD = 0.15  # slowdown beyond timing noise
+
+REPEATS = 5
+MIN_SECONDS = 0.05  # the micro benchmarks repeat a call until a run takes at least this long
+SEARCH_DEPTH = 4
+EVAL_FNS = [piece2val, piece2val_keep_back_row, piece2val_favor_kings, piece2val_move_to_opponent, furthest_king]
+SEARCH_SETUPS = {
+    'minimax': {'agent': 'minimax'},
+    'minimax_ab': {'agent': 'minimax_ab'},
+    'minimax_ab_random': {'agent': 'minimax_ab_random'},
+    'minimax_ab_jumps_first': {'agent': 'minimax_ab_jumps_first'},
+    'minimax_ab_jumps_first_variable_depth': {'agent': 'minimax_ab_jumps_first_variable_depth'},
+    # SEARCH_DEPTH caps the deepening, the time budget is never the limit
+    'minimax_ab_iterative_deepening': {'agent': 'minimax_ab_iterative_deepening', 'time_budget_ms': 10 ** 9},
+    'random': {'agent': 'random'},
+}
+PERFT_DEPTH = 4
+MIDGAME_PLIES = 20
+
+
+def corpus() -> Dict[str, GameState]:
+    """
+    The benchmark positions, on BitBoards. None of them is over or in the middle of a multi-jump.
+    """
+    return {
+        'opening': GameState(board=BitBoard()),
+        'midgame': _playout(MIDGAME_PLIES),
+        # the blue man on (5, 5) can take two red men, and has a choice of two ways to take the second
+        'multi_jump': GameState(board=BitBoard(blue=_mask((5, 5), (6, 6), (7, 7), (1, 5)),
+                                               red=_mask((4, 4), (2, 2), (4, 2), (0, 0), (7, 1)), kings=0),
+                                turn=BLUE),
+        'king_endgame': GameState(board=BitBoard(blue=_mask((2, 2), (5, 5), (6, 6)), red=_mask((1, 7), (6, 0), (3, 1)),
+                                                 kings=_mask((2, 2), (5, 5), (1, 7), (6, 0))),
+                                  turn=BLUE),
+    }
+
+
+def _mask(*squares) -> int:
+    return sum(1 << _INDEX[x][y] for x, y in squares)
+
+
+def _playout(plies: int, seed: int = 4100) -> GameState:
+    """
+    The first position after plies random plies where the game is not over and no piece is mid-hop.
+    """
+    rng = random.Random(seed)
+    node = Node(GameState(board=BitBoard()))
+    while True:
+        actions = node.next_actions()
+        if node.state.move_count >= plies and not node.state.mid_hop:
+            return node.state
+        node.push(rng.choice(actions))
+
+
+def _fastest(fn: Callable[[], object]) -> float:
+    """
+    Seconds per call of fn, the fastest of REPEATS runs.
+    """
+    timer = timeit.Timer(fn)
+    number = 1
+    while timer.timeit(number) < MIN_SECONDS:
+        number *= 2
+    return min(timer.repeat(repeat=REPEATS, number=number)) / number
+
+
+def _pieces(state: GameState) -> List:
+    return [(x, y) for x in range(8) for y in range(8)
+            if state.board.piece_at(x, y) is not None and state.board.piece_at(x, y).color == state.turn]
+
+
+# legal_moves() and blind_legal_moves() as they were before the move tables, kept to time against here and to check
+# them against in test_move_tables.py
+def reference_rel(direction, x, y):
+    if direction == NORTHWEST:
+        return (x - 1, y - 1)
+    elif direction == NORTHEAST:
+        return (x + 1, y - 1)
+    elif direction == SOUTHWEST:
+        return (x - 1, y + 1)
+    elif direction == SOUTHEAST:
+        return (x + 1, y + 1)
+
+
+def reference_blind_legal_moves(board, x, y):
+    occupant = board.matrix[x][y].occupant
+    if occupant is None:
+        return []
+    if not occupant.king and occupant.color == BLUE:
+        return [reference_rel(NORTHWEST, x, y), reference_rel(NORTHEAST, x, y)]
+    if not occupant.king and occupant.color == RED:
+        return [reference_rel(SOUTHWEST, x, y), reference_rel(SOUTHEAST, x, y)]
+    return [reference_rel(NORTHWEST, x, y), reference_rel(NORTHEAST, x, y), reference_rel(SOUTHWEST, x, y),
+            reference_rel(SOUTHEAST, x, y)]
+
+
+def reference_legal_moves(board, x, y, mid_hop=False):
+    legal_moves = []
+    for move in reference_blind_legal_moves(board, x, y):
+        if not board.on_board(move[0], move[1]):
+            continue
+        if board.location(move[0], move[1]).occupant is None:
+            if not mid_hop:
+                legal_moves.append(move)
+        elif (board.location(move[0], move[1]).occupant.color != board.location(x, y).occupant.color
+              and board.on_board(move[0] + (move[0] - x), move[1] + (move[1] - y))
+              and board.location(move[0] + (move[0] - x), move[1] + (move[1] - y)).occupant is None):
+            legal_moves.append((move[0] + (move[0] - x), move[1] + (move[1] - y)))
+    return legal_moves
+
+
+def time_move_generation(state: GameState) -> Dict[str, Dict]:
+    results = {}
+    pieces = _pieces(state)
+    board = state.board.to_board()
+    all_legal_moves = {
+        'Board': board.legal_moves,
+        'BitBoard': state.board.legal_moves,
+        'Board without move tables': lambda x, y, mid_hop: reference_legal_moves(board, x, y, mid_hop),
+    }
+    for board_name, legal_moves in all_legal_moves.items():
+        results[f'legal_moves/{board_name}'] = {
+            'seconds': _fastest(lambda: [legal_moves(x, y, state.mid_hop) for x, y in pieces])}
+
+    node = Node(deepcopy(state))
+    actions = node.next_actions()
+    results['next_actions'] = {'seconds': _fastest(node.next_actions)}
+    results['next_node'] = {'seconds': _fastest(lambda: [node.next_node(action) for action in actions])}
+    return results
+
+
+def time_eval_fns(state: GameState) -> Dict[str, Dict]:
+    board = state.board.to_board()  # the heuristics are written against Board
+    return {f'eval/{eval_fn.__name__}': {'seconds': _fastest(lambda: eval_fn(board, state.turn))}
+            for eval_fn in EVAL_FNS}
+
+
+def time_searches(state: GameState) -> Dict[str, Dict]:
+    results = {}
+    for name, setup in SEARCH_SETUPS.items():
+        game = HeadlessGame()
+        agent = build_agent(game=game, color=state.turn, depth=SEARCH_DEPTH, eval_fn=piece2val, **setup)
+        seconds = []
+        for _ in range(REPEATS):
+            random.seed(4100)  # ties are broken at random, so every run searches the same tree
+            game.state = deepcopy(state)
+            start = time.perf_counter()
+            _, nodes_explored = agent._get_move()
+            seconds.append(time.perf_counter() - start)
+        results[f'search/{name}'] = {'seconds': min(seconds), 'nodes': nodes_explored}
+    return results
+
+
+def time_perft(state: GameState) -> Dict[str, Dict]:
+    seconds = []
+    for _ in range(REPEATS):
+        node = root(deepcopy(state))
+        start = time.perf_counter()
+        leaves = perft(node, PERFT_DEPTH)
+        seconds.append(time.perf_counter() - start)
+    return {f'perft/{PERFT_DEPTH}': {'seconds': min(seconds), 'nodes': leaves}}
+
+
+def run() -> Dict[str, Dict]:
+    """
+    Every benchmark on every corpus position, keyed by benchmark/position.
+    """
+    results = {}
+    for position_name, state in corpus().items():
+        for measure in (time_move_generation, time_eval_fns, time_searches, time_perft):
+            for name, result in measure(state).items():
+                results[f'{name}/{position_name}'] = result
+                print(f'{name}/{position_name}: {_describe(result)}')
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict],
+            threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """
+    The regressions of results against baseline, one line each. Benchmarks only one of them has are skipped.
+    """
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        ratio = result['seconds'] / before['seconds']
+        if ratio > 1 + threshold:
+            regressions.append(f'{name}: {_describe(result)}, {ratio:.2f}x the baseline {_describe(before)}')
+        if result.get('nodes') != before.get('nodes'):
+            regressions.append(f'{name}: explored {result.get("nodes")} nodes instead of {before.get("nodes")}')
+    return regressions
+
+
+def _describe(result: Dict) -> str:
+    seconds = result['seconds']
+    described = f'{seconds * 1000:.1f}ms' if seconds >= 0.001 else f'{seconds * 1e6:.2f}us'
+    if 'nodes' in result:
+        described += f', {result["nodes"]} nodes'
+    return described
+
+
+def main():
+    results = run()
+    file_contents = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'search_depth': SEARCH_DEPTH,
+        'results': results,
+    }
+    filenames = [RESULTS_FILE, BASELINE_FILE] if SAVE_BASELINE else [RESULTS_FILE]
+    for filename in filenames:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, 'w') as fp:
+            json.dump(file_contents, fp, indent=2)
+
+    if SAVE_BASELINE or not os.path.exists(BASELINE_FILE):
+        return
+    with open(BASELINE_FILE) as fp:
+        baseline = json.load(fp)
+    regressions = compare(results, baseline['results'])
+    print(f'{len(regressions)} regressions against {BASELINE_FILE}')
+    for regression in regressions:
+        print(f'  {regression}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,375 @@
+"""
+bitboard.py
+
+A Board that keeps the 32 playable squares in three integer masks instead of an 8x8 matrix of Squares.
+
+Square (x, y) is playable when x + y is even. Bits are numbered column by column, bit = x * 4 + y // 2, so walking
+the bits from low to high visits squares in the same (x, y) order as the loops over Board.matrix.
+
+The masks are:
+- blue: squares holding a blue piece
+- red: squares holding a red piece
+- kings: squares holding a king of either color
+
+BitBoard is a drop-in replacement for Board inside GameState. location() and matrix hand out read-only snapshots:
+writing to them does not change the board, use move_piece(), remove_piece() and king() instead.
+"""
+
+from collections import namedtuple
+from typing import Dict, List, Tuple
+
+from checkers import BLACK, BLUE, Board, GameState, NORTHEAST, NORTHWEST, Piece, PlayerColor, RED, SOUTHEAST, SOUTHWEST, \
+    Square, WHITE
+
+FULL_MASK = (1 << 32) - 1
+
+_INDEX = [[x * 4 + y // 2 if (x + y) % 2 == 0 else None for y in range(8)] for x in range(8)]
+_COORDS = [(x, y) for x in range(8) for y in range(8) if (x + y) % 2 == 0]
+
+_DELTAS = {
+    NORTHWEST: (-1, -1),
+    NORTHEAST: (1, -1),
+    SOUTHWEST: (-1, 1),
+    SOUTHEAST: (1, 1),
+}
+
+# Same direction order as Board.blind_legal_moves, so both boards list moves identically
+BLUE_MAN_DIRECTIONS = (NORTHWEST, NORTHEAST)
+RED_MAN_DIRECTIONS = (SOUTHWEST, SOUTHEAST)
+KING_DIRECTIONS = (NORTHWEST, NORTHEAST, SOUTHWEST, SOUTHEAST)
+
+
+def _build_shifts():
+    """
+    For every direction, returns (even column shift, odd column shift, even column mask, odd column mask).
+    A mask holds the squares whose neighbour in that direction is on the board.
+    """
+    shifts = {}
+    for direction, (dx, dy) in _DELTAS.items():
+        shift_by_parity = [None, None]
+        mask_by_parity = [0, 0]
+        for index, (x, y) in enumerate(_COORDS):
+            if 0 <= x + dx <= 7 and 0 <= y + dy <= 7:
+                shift = _INDEX[x + dx][y + dy] - index
+                assert shift_by_parity[x % 2] in (None, shift)
+                shift_by_parity[x % 2] = shift
+                mask_by_parity[x % 2] |= 1 << index
+        shifts[direction] = (shift_by_parity[0], shift_by_parity[1], mask_by_parity[0], mask_by_parity[1])
+    return shifts
+
+
+_SHIFTS = _build_shifts()
+_OPPOSITE = {NORTHWEST: SOUTHEAST, NORTHEAST: SOUTHWEST, SOUTHWEST: NORTHEAST, SOUTHEAST: NORTHWEST}
+
+
+def _build_steps(distance: int):
+    """
+    For every direction, the bit index reached from each bit index after `distance` diagonal steps, or None.
+    """
+    steps = {}
+    for direction, (dx, dy) in _DELTAS.items():
+        steps[direction] = [_INDEX[x + dx * distance][y + dy * distance]
+                            if 0 <= x + dx * distance <= 7 and 0 <= y + dy * distance <= 7 else None
+                            for x, y in _COORDS]
+    return steps
+
+
+_NEIGHBOURS = _build_steps(1)
+_LANDINGS = _build_steps(2)
+_BLUE_KING_ROW = sum(1 << _INDEX[x][0] for x in range(0, 8, 2))
+_RED_KING_ROW = sum(1 << _INDEX[x][7] for x in range(1, 8, 2))
+
+
+def _shift(bits: int, direction: str) -> int:
+    """
+    Moves every set bit one square in the given direction. Bits that would fall off the board are dropped.
+    """
+    even_shift, odd_shift, even_mask, odd_mask = _SHIFTS[direction]
+    even = bits & even_mask
+    odd = bits & odd_mask
+    even = even << even_shift if even_shift > 0 else even >> -even_shift
+    odd = odd << odd_shift if odd_shift > 0 else odd >> -odd_shift
+    return even | odd
+
+
+def _iter_bits(bits: int):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def _build_flyweights():
+    squares = {}
+    for color in (BLUE, RED):
+        for king in (False, True):
+            piece = Piece(color)
+            if king:
+                piece.crown()
+            squares[(color, king)] = Square(BLACK, piece)
+    return squares
+
+
+_OCCUPIED_SQUARES = _build_flyweights()
+_EMPTY_SQUARE = Square(BLACK)
+_WHITE_SQUARE = Square(WHITE)
+
+
+class BitBoard(Board):
+    __slots__ = ('blue', 'red', 'kings')
+
+    def __init__(self, blue: int = None, red: int = None, kings: int = None):
+        if blue is None and red is None:
+            blue, red, kings = self.new_masks()
+        self.blue = blue or 0
+        self.red = red or 0
+        self.kings = kings or 0
+
+    @classmethod
+    def from_board(cls, board: Board) -> 'BitBoard':
+        """
+        Builds a BitBoard holding the same pieces as any other Board.
+        """
+        blue = sum(1 << _INDEX[x][y] for x, y in board.get_locations_by_color(BLUE))
+        red = sum(1 << _INDEX[x][y] for x, y in board.get_locations_by_color(RED))
+        kings = sum(1 << _INDEX[x][y] for color in (BLUE, RED) for x, y in board.get_king_locations(color))
+        return cls(blue=blue, red=red, kings=kings)
+
+    def to_board(self) -> Board:
+        """
+        Builds a matrix-backed Board holding the same pieces.
+        """
+        board = Board()
+        board.matrix = self.matrix
+        board.count_pieces()
+        return board
+
+    def new_masks(self) -> Tuple[int, int, int]:
+        red = sum(1 << _INDEX[x][y] for x, y in _COORDS if y < 3)
+        blue = sum(1 << _INDEX[x][y] for x, y in _COORDS if y > 4)
+        return blue, red, 0
+
+    def __deepcopy__(self, memodict={}):
+        return BitBoard(blue=self.blue, red=self.red, kings=self.kings)
+
+    def __reduce__(self):
+        # pickle the masks only, the slots inherited from Board are properties here
+        return BitBoard, (self.blue, self.red, self.kings)
+
+    @property
+    def matrix(self):
+        """
+        A snapshot of the board as an 8x8 matrix of Squares, indexed matrix[x][y] like Board.matrix.
+        """
+        matrix = [[Square(WHITE) for y in range(8)] for x in range(8)]
+        for x, y in _COORDS:
+            occupant = self.location(x, y).occupant
+            if occupant is not None:
+                king = occupant.king
+                occupant = Piece(occupant.color)
+                if king:
+                    occupant.crown()
+            matrix[x][y] = Square(BLACK, occupant)
+        return matrix
+
+    def _masks_for(self, color: PlayerColor) -> Tuple[int, int]:
+        if color == BLUE:
+            return self.blue, self.red
+        return self.red, self.blue
+
+    @property
+    def piece_counts(self) -> Dict[PlayerColor, int]:
+        return {BLUE: bin(self.blue).count('1'), RED: bin(self.red).count('1')}
+
+    def count_pieces(self):
+        pass  # piece_counts is always read off the masks
+
+    def get_locations_by_color(self, color: PlayerColor) -> List[Tuple[int, int]]:
+        own, _ = self._masks_for(color)
+        return [_COORDS[index] for index in _iter_bits(own)]
+
+    def get_king_locations(self, color: PlayerColor) -> List[Tuple[int, int]]:
+        own, _ = self._masks_for(color)
+        return [_COORDS[index] for index in _iter_bits(own & self.kings)]
+
+    def location(self, x, y):
+        """
+        Returns a read-only Square for (x, y). Pieces on it are shared between calls and must not be modified.
+        """
+        index = _INDEX[int(x)][int(y)]
+        if index is None:
+            return _WHITE_SQUARE
+        bit = 1 << index
+        if self.blue & bit:
+            return _OCCUPIED_SQUARES[(BLUE, bool(self.kings & bit))]
+        if self.red & bit:
+            return _OCCUPIED_SQUARES[(RED, bool(self.kings & bit))]
+        return _EMPTY_SQUARE
+
+    def piece_at(self, x, y):
+        """
+        Returns a new Piece describing what is at (x,y), or None. Changing it does not change the board.
+        """
+        index = _INDEX[x][y]
+        bit = 1 << index if index is not None else 0
+        if self.blue & bit:
+            piece = Piece(BLUE)
+        elif self.red & bit:
+            piece = Piece(RED)
+        else:
+            return None
+        if self.kings & bit:
+            piece.crown()
+        return piece
+
+    def put_piece(self, x, y, piece):
+        self.remove_piece(x, y)
+        if piece is not None:
+            bit = 1 << _INDEX[x][y]
+            if piece.color == BLUE:
+                self.blue |= bit
+            else:
+                self.red |= bit
+            if piece.king:
+                self.kings |= bit
+
+    def blind_legal_moves(self, x, y):
+        index = _INDEX[x][y]
+        if index is None:
+            return []
+        directions = self._directions(1 << index)
+        return [self.rel(direction, x, y) for direction in directions]
+
+    def _directions(self, bit: int) -> Tuple[str, ...]:
+        if self.kings & bit:
+            return KING_DIRECTIONS
+        if self.blue & bit:
+            return BLUE_MAN_DIRECTIONS
+        if self.red & bit:
+            return RED_MAN_DIRECTIONS
+        return ()
+
+    def legal_moves(self, x, y, mid_hop=False):
+        """
+        Returns a list of legal move locations from (x, y), in the same order as Board.legal_moves().
+        """
+        index = _INDEX[x][y]
+        if index is None:
+            return []
+        bit = 1 << index
+        if self.blue & bit:
+            opponent = self.red
+        elif self.red & bit:
+            opponent = self.blue
+        else:
+            return []
+
+        occupied = self.blue | self.red
+        legal_moves = []
+        for direction in self._directions(bit):
+            to = _NEIGHBOURS[direction][index]
+            if to is None:
+                continue
+            if not occupied & (1 << to):
+                if not mid_hop:
+                    legal_moves.append(_COORDS[to])
+            elif opponent & (1 << to):
+                landing = _LANDINGS[direction][index]
+                if landing is not None and not occupied & (1 << landing):
+                    legal_moves.append(_COORDS[landing])
+
+        return legal_moves
+
+    def has_legal_move(self, color: PlayerColor) -> bool:
+        """
+        Whether any piece of the given color can step or jump, from the masks alone.
+        """
+        own, opponent = self._masks_for(color)
+        empty = ~(self.blue | self.red) & FULL_MASK
+        forward = BLUE_MAN_DIRECTIONS if color == BLUE else RED_MAN_DIRECTIONS
+        for direction in KING_DIRECTIONS:
+            sources = own if direction in forward else own & self.kings
+            if not sources:
+                continue
+            before_empty = _shift(empty, _OPPOSITE[direction])
+            if sources & (before_empty | _shift(before_empty & opponent, _OPPOSITE[direction])):
+                return True
+        return False
+
+    def legal_moves_by_color(self, color: PlayerColor, mid_hop=False) -> List[Tuple[int, int, List[Tuple[int, int]]]]:
+        """
+        Generates the moves of every piece of one color at once with shifts and masks,
+        then only walks the pieces that turned out to have a move.
+        """
+        own, opponent = self._masks_for(color)
+        empty = ~(self.blue | self.red) & FULL_MASK
+        forward = BLUE_MAN_DIRECTIONS if color == BLUE else RED_MAN_DIRECTIONS
+
+        steps, jumps = {}, {}
+        movable = 0
+        for direction in KING_DIRECTIONS:
+            sources = own if direction in forward else own & self.kings
+            back = _OPPOSITE[direction]
+            before_empty = _shift(empty, back)
+            steps[direction] = 0 if mid_hop else sources & before_empty
+            jumps[direction] = sources & _shift(before_empty & opponent, back)
+            movable |= steps[direction] | jumps[direction]
+
+        moves = []
+        for index in _iter_bits(movable):
+            bit = 1 << index
+            legal_moves = []
+            for direction in self._directions(bit):
+                if steps[direction] & bit:
+                    legal_moves.append(_COORDS[_NEIGHBOURS[direction][index]])
+                elif jumps[direction] & bit:
+                    legal_moves.append(_COORDS[_LANDINGS[direction][index]])
+            x, y = _COORDS[index]
+            moves.append((x, y, legal_moves))
+
+        return moves
+
+    def remove_piece(self, x, y):
+        keep = ~(1 << _INDEX[x][y])
+        self.blue &= keep
+        self.red &= keep
+        self.kings &= keep
+
+    def move_piece(self, start_x, start_y, end_x, end_y):
+        start = 1 << _INDEX[start_x][start_y]
+        end = 1 << _INDEX[end_x][end_y]
+        self.remove_piece(end_x, end_y)
+        if self.blue & start:
+            self.blue ^= start | end
+        elif self.red & start:
+            self.red ^= start | end
+        if self.kings & start:
+            self.kings ^= start | end
+
+        self.king(end_x, end_y)
+
+    def king(self, x, y):
+        bit = 1 << _INDEX[x][y]
+        if (self.blue & bit & _BLUE_KING_ROW) or (self.red & bit & _RED_KING_ROW):
+            self.kings |= bit
+
+
+# An immutable snapshot of a GameState: the three masks, whose turn it is and where a hop left off. Positions that are
+# the same game position compare and hash equal, so one can key a dict directly. move_count is left out on purpose.
+Position = namedtuple("Position", "blue red kings turn mid_hop last_hop_to")
+
+
+def to_position(state: GameState) -> Position:
+    board = state.board if isinstance(state.board, BitBoard) else BitBoard.from_board(state.board)
+    return Position(board.blue, board.red, board.kings, state.turn, state.mid_hop, state.last_hop_to)
+
+
+def from_position(position: Position, move_count: int = 0) -> GameState:
+    """
+    A BitBoard-backed GameState for the position.
+    """
+    state = GameState(board=BitBoard(blue=position.blue, red=position.red, kings=position.kings),
+                      turn=position.turn, mid_hop=position.mid_hop, last_hop_to=position.last_hop_to,
+                      move_count=move_count)
+    state.game_over = state.is_game_over()
+    return state
@@ -0,0 +1,77 @@
+"""
+build_opening_book.py
+
+Builds the opening book (see opening_book.py) from self-play. Games start from the usual opening and, for the first
+BOOK_PLIES turns, every position that comes up is searched once with SEARCH_SETUP. Its best move is stored with the
+search value and depth. Each game usually plays the booked move and sometimes a random one, so the book also covers
+the positions other agents steer into.
+"""
+
+import random
+import time
+from typing import Dict
+
+import checkers
+from agents.build_agent import build_agent
+from bitboard import BitBoard
+from checkers import GameState
+from eval_fns import piece2val
+from game_state import Node
+from headless import HeadlessGame
+from opening_book import BOOK_FILE, BOOK_PLIES, BookEntry, OpeningBook
+
+SELF_PLAY_GAMES = 40
+EXPLORATION = 0.3  # how often self-play leaves the book for a random move
+SEARCH_SETUP = {
+    'agent': 'minimax_ab_jumps_first',
+    'depth': 6,
+    'eval_fn': piece2val,
+    'tt_size': 2 ** 18,
+    'move_ordering': True,
+}
+
+
+def _search(searchers: Dict, state: GameState):
+    searcher = searchers[state.turn]
+    if searcher.transposition_table is not None:
+        searcher.transposition_table.new_search()
+    if searcher.move_orderer is not None:
+        searcher.move_orderer.new_search()
+    node = Node(state=state, eval_fn=searcher.eval_fn, start_from=state.last_hop_to)
+    value, action, _ = searcher.minimax(node, searcher.depth_limit)
+    return value, action
+
+
+def build(games: int = SELF_PLAY_GAMES, plies: int = BOOK_PLIES, seed: int = 4100) -> OpeningBook:
+    """
+    Plays games self-play games through the first plies turns, searching every new position on the way.
+    """
+    rng = random.Random(seed)
+    random.seed(seed)  # the searchers break ties with the random module
+    book = OpeningBook(plies=plies)
+    searchers = {color: build_agent(game=HeadlessGame(), color=color, **SEARCH_SETUP)
+                 for color in (checkers.BLUE, checkers.RED)}
+
+    for game in range(games):
+        start = time.perf_counter()
+        searched = 0
+        state = GameState(board=BitBoard())
+        while state.move_count < plies and not state.game_over:
+            key = state.compute_zobrist_key()
+            entry = book.entries.get(key)
+            if entry is None:
+                value, action = _search(searchers, state)
+                entry = BookEntry(action, value, SEARCH_SETUP['depth'], 0)
+                searched += 1
+            book.entries[key] = entry._replace(visits=entry.visits + 1)
+
+            node = Node(state=state, start_from=state.last_hop_to)
+            action = entry.action if rng.random() >= EXPLORATION else rng.choice(node.next_actions())
+            state.apply_action(action)
+        print(f'game {game}: searched {searched} new positions in {time.perf_counter() - start:.1f}s, '
+              f'{len(book.entries)} in the book')
+    return book
+
+
+if __name__ == '__main__':
+    build().save(BOOK_FILE, SEARCH_SETUP)
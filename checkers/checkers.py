@@ -29,15 +29,23 @@ Functionalities include:
 - A silky smoooth 60 FPS!
 """
 
+import random
 import sys
 from collections import namedtuple
 from copy import deepcopy
 from typing import List, Tuple
 
-import pygame
-from pygame.locals import *
+# pygame is imported when the first Graphics window is created, so headless games never load it
+pygame = None
+
+
+def _import_pygame():
+    global pygame
+    if pygame is None:
+        import pygame as _pygame
+        _pygame.font.init()
+        pygame = _pygame
 
-pygame.font.init()
 
 ##COLORS##
 #         R    G    B
@@ -55,10 +63,63 @@ NORTHEAST = "northeast"
 SOUTHWEST = "southwest"
 SOUTHEAST = "southeast"
 
+##ZOBRIST KEYS##
+# Seeded so that keys are the same in every process and every run
+_zobrist_random = random.Random(4100)
+ZOBRIST_PIECES = {(color, king): [[_zobrist_random.getrandbits(64) for y in range(8)] for x in range(8)]
+                  for color in (BLUE, RED) for king in (False, True)}
+ZOBRIST_RED_TO_MOVE = _zobrist_random.getrandbits(64)
+ZOBRIST_MID_HOP = _zobrist_random.getrandbits(64)
+ZOBRIST_HOP_SQUARES = [[_zobrist_random.getrandbits(64) for y in range(8)] for x in range(8)]
+
+##MOVE TABLES##
+DIRECTION_DELTAS = {
+    NORTHWEST: (-1, -1),
+    NORTHEAST: (1, -1),
+    SOUTHWEST: (-1, 1),
+    SOUTHEAST: (1, 1),
+}
+# Directions each kind of piece moves in, keyed by (color, king), in the order blind_legal_moves() lists them
+PIECE_DIRECTIONS = {
+    (BLUE, False): (NORTHWEST, NORTHEAST),
+    (RED, False): (SOUTHWEST, SOUTHEAST),
+    (BLUE, True): (NORTHWEST, NORTHEAST, SOUTHWEST, SOUTHEAST),
+    (RED, True): (NORTHWEST, NORTHEAST, SOUTHWEST, SOUTHEAST),
+}
+DARK_SQUARES = [(x, y) for x in range(8) for y in range(8) if (x + y) % 2 == 0]
+
+
+def _build_move_tables():
+    """
+    Builds, for every kind of piece and square (x, y):
+    - BLIND_MOVES[piece][x][y]: the squares one step away in each of its directions, even those off the board
+    - MOVES[piece][x][y]: (neighbour, landing) for each of its directions with a neighbour on the board, where
+      landing is the square a jump over that neighbour lands on, or None if it is off the board
+    """
+    blind_moves, moves = {}, {}
+    for piece, directions in PIECE_DIRECTIONS.items():
+        blind_moves[piece] = [[None] * 8 for x in range(8)]
+        moves[piece] = [[None] * 8 for x in range(8)]
+        for x in range(8):
+            for y in range(8):
+                deltas = [DIRECTION_DELTAS[direction] for direction in directions]
+                blind_moves[piece][x][y] = tuple((x + dx, y + dy) for dx, dy in deltas)
+                moves[piece][x][y] = tuple(((x + dx, y + dy), (x + 2 * dx, y + 2 * dy)
+                                            if 0 <= x + 2 * dx <= 7 and 0 <= y + 2 * dy <= 7 else None)
+                                           for dx, dy in deltas if 0 <= x + dx <= 7 and 0 <= y + dy <= 7)
+    return blind_moves, moves
+
+
+BLIND_MOVES, MOVES = _build_move_tables()
+ADJACENT = [[BLIND_MOVES[(BLUE, True)][x][y] for y in range(8)] for x in range(8)]
+
 
 class Board:
+    __slots__ = ('matrix', 'piece_counts')
+
     def __init__(self):
         self.matrix = self.new_board()
+        self.count_pieces()
 
     def new_board(self):
         """
@@ -94,22 +155,32 @@ class Board:
 
         return matrix
 
+    def count_pieces(self):
+        """
+        Recounts piece_counts, the number of pieces of each color. The methods that change the board keep it up to
+        date, so this is only needed after editing matrix directly.
+        """
+        self.piece_counts = {BLUE: 0, RED: 0}
+        for x, y in DARK_SQUARES:
+            occupant = self.matrix[x][y].occupant
+            if occupant is not None:
+                self.piece_counts[occupant.color] += 1
+
     def get_locations_by_color(self, color: PlayerColor) -> List[Tuple[int, int]]:
         locations = []
-        for x in range(8):
-            for y in range(8):
-                if self.matrix[x][y] and self.matrix[x][y].occupant and self.matrix[x][y].occupant.color == color:
-                    locations.append((x, y))
+        for x, y in DARK_SQUARES:
+            occupant = self.matrix[x][y].occupant
+            if occupant is not None and occupant.color == color:
+                locations.append((x, y))
 
         return locations
 
     def get_king_locations(self, color: PlayerColor) -> List[Tuple[int, int]]:
         locations = []
-        for x in range(8):
-            for y in range(8):
-                if (self.matrix[x][y] and self.matrix[x][y].occupant
-                        and self.matrix[x][y].occupant.color == color and self.matrix[x][y].occupant.king):
-                    locations.append((x, y))
+        for x, y in DARK_SQUARES:
+            occupant = self.matrix[x][y].occupant
+            if occupant is not None and occupant.color == color and occupant.king:
+                locations.append((x, y))
 
         return locations
 
@@ -149,22 +220,17 @@ class Board:
         >>> board.rel(SOUTHWEST, (2,5))
         (1,6)
         """
-        if dir == NORTHWEST:
-            return (x - 1, y - 1)
-        elif dir == NORTHEAST:
-            return (x + 1, y - 1)
-        elif dir == SOUTHWEST:
-            return (x - 1, y + 1)
-        elif dir == SOUTHEAST:
-            return (x + 1, y + 1)
-        else:
+        if dir not in DIRECTION_DELTAS:
             return 0
+        dx, dy = DIRECTION_DELTAS[dir]
+        return (x + dx, y + dy)
 
     def adjacent(self, x, y):
         """
         Returns a list of squares locations that are adjacent (on a diagonal) to (x,y).
         """
-
+        if 0 <= x <= 7 and 0 <= y <= 7:
+            return list(ADJACENT[x][y])
         return [self.rel(NORTHWEST, x, y), self.rel(NORTHEAST, x, y), self.rel(SOUTHWEST, x, y),
                 self.rel(SOUTHEAST, x, y)]
 
@@ -182,70 +248,92 @@ class Board:
         Returns a list of blind legal move locations from a set of coordinates (x,y) on the board.
         If that location is empty, then blind_legal_moves() return an empty list.
         """
-        # print(x)
-        if self.matrix[x][y].occupant != None:
-            if self.matrix[x][y].occupant.king == False and self.matrix[x][y].occupant.color == BLUE:
-                blind_legal_moves = [self.rel(NORTHWEST, x, y), self.rel(NORTHEAST, x, y)]
-
-            elif self.matrix[x][y].occupant.king == False and self.matrix[x][y].occupant.color == RED:
-                blind_legal_moves = [self.rel(SOUTHWEST, x, y), self.rel(SOUTHEAST, x, y)]
-
-            else:
-                blind_legal_moves = [self.rel(NORTHWEST, x, y), self.rel(NORTHEAST, x, y), self.rel(SOUTHWEST, x, y),
-                                     self.rel(SOUTHEAST, x, y)]
-
-        else:
-            blind_legal_moves = []
-
-        return blind_legal_moves
+        occupant = self.matrix[x][y].occupant
+        if occupant is None:
+            return []
+        return list(BLIND_MOVES[(occupant.color, occupant.king)][x][y])
 
     def legal_moves(self, x, y, mid_hop=False):
         """
         Returns a list of legal move locations from a given set of coordinates (x,y) on the board.
         If that location is empty, then legal_moves() returns an empty list.
         """
-        # print(x, y)
-        blind_legal_moves = self.blind_legal_moves(x, y)
-        # print('BLind Legal moves', blind_legal_moves)
-        legal_moves = []
+        occupant = self.matrix[x][y].occupant
+        if occupant is None:
+            return []
 
-        if not mid_hop:
-            for move in blind_legal_moves:
+        legal_moves = []
+        for neighbour, landing in MOVES[(occupant.color, occupant.king)][x][y]:
+            over = self.matrix[neighbour[0]][neighbour[1]].occupant
+            if over is None:
                 if not mid_hop:
-                    if self.on_board(move[0], move[1]):
-                        if self.location(move[0], move[1]).occupant is None:
-                            legal_moves.append(move)
-
-                        elif (self.location(move[0], move[1]).occupant.color != self.location(x, y).occupant.color
-                              and self.on_board(move[0] + (move[0] - x), move[1] + (move[1] - y))
-                              and self.location(move[0] + (move[0] - x), move[1] + (move[1] - y)).occupant is None):
-                            # is this location filled by an enemy piece?
-                            legal_moves.append((move[0] + (move[0] - x), move[1] + (move[1] - y)))
-
-        else:  # hop == True
-            for move in blind_legal_moves:
-                if self.on_board(move[0], move[1]) and self.location(move[0], move[1]).occupant is not None:
-                    if (self.location(move[0], move[1]).occupant.color != self.location(x, y).occupant.color
-                            and self.on_board(move[0] + (move[0] - x), move[1] + (move[1] - y))
-                            and self.location(move[0] + (move[0] - x), move[1] + (move[1] - y)).occupant is None):
-                        # is this location filled by an enemy piece?
-                        legal_moves.append((move[0] + (move[0] - x), move[1] + (move[1] - y)))
+                    legal_moves.append(neighbour)
+            elif (over.color != occupant.color and landing is not None
+                  and self.matrix[landing[0]][landing[1]].occupant is None):
+                # is this location filled by an enemy piece?
+                legal_moves.append(landing)
 
         return legal_moves
 
+    def has_legal_move(self, color: PlayerColor) -> bool:
+        """
+        Whether any piece of the given color can move. Stops at the first one that can.
+        """
+        for x, y in DARK_SQUARES:
+            occupant = self.matrix[x][y].occupant
+            if occupant is None or occupant.color != color:
+                continue
+            for neighbour, landing in MOVES[(occupant.color, occupant.king)][x][y]:
+                over = self.matrix[neighbour[0]][neighbour[1]].occupant
+                if over is None or (over.color != color and landing is not None
+                                    and self.matrix[landing[0]][landing[1]].occupant is None):
+                    return True
+        return False
+
+    def legal_moves_by_color(self, color: PlayerColor, mid_hop=False) -> List[Tuple[int, int, List[Tuple[int, int]]]]:
+        """
+        Returns (x, y, legal moves) for every piece of the given color that has at least one legal move.
+        """
+        moves = []
+        for x, y in self.get_locations_by_color(color):
+            legal_moves = self.legal_moves(x, y, mid_hop)
+            if legal_moves:
+                moves.append((x, y, legal_moves))
+
+        return moves
+
     def remove_piece(self, x, y):
         """
         Removes a piece from the board at position (x,y).
         """
-        self.matrix[x][y].occupant = None
+        occupant = self.matrix[x][y].occupant
+        if occupant is not None:
+            self.piece_counts[occupant.color] -= 1
+            self.matrix[x][y].occupant = None
+
+    def piece_at(self, x, y):
+        """
+        Returns the Piece at (x,y), or None if the square is empty.
+        """
+        return self.matrix[x][y].occupant
+
+    def put_piece(self, x, y, piece):
+        """
+        Places piece at (x,y), replacing whatever was there. Passing None empties the square.
+        """
+        self.remove_piece(x, y)
+        if piece is not None:
+            self.piece_counts[piece.color] += 1
+            self.matrix[x][y].occupant = piece
 
     def move_piece(self, start_x, start_y, end_x, end_y):
         """
         Move a piece from (start_x, start_y) to (end_x, end_y).
         """
 
-        self.matrix[end_x][end_y].occupant = self.matrix[start_x][start_y].occupant
+        piece = self.matrix[start_x][start_y].occupant
         self.remove_piece(start_x, start_y)
+        self.put_piece(end_x, end_y, piece)
 
         self.king(end_x, end_y)
 
@@ -320,33 +408,132 @@ class Board:
 
 
 class GameState:
-    def __init__(self, board=None, game_over=None, turn=None, mid_hop=None, last_hop_to=None, move_count=None):
+    # like Board, Square and Piece, no per-instance __dict__: searches copy states by the thousand
+    __slots__ = ('board', 'game_over', 'turn', 'mid_hop', 'last_hop_to', 'move_count', 'zobrist_key')
+
+    def __init__(self, board=None, game_over=None, turn=None, mid_hop=None, last_hop_to=None, move_count=None,
+                 zobrist_key=None):
         self.board: Board = board if board is not None else Board()
         self.game_over = game_over if game_over is not None else False
         self.turn = turn if turn is not None else BLUE
         self.mid_hop = mid_hop if mid_hop is not None else False  # are we in the middle of a hop?
         self.last_hop_to = last_hop_to if last_hop_to is not None else None
         self.move_count = move_count if move_count is not None else 0
+        # Kept up to date by apply_action(), undo_action() and end_turn(). Code that edits the board directly
+        # must call reset_zobrist_key() afterwards.
+        if zobrist_key is None:
+            # a new position, possibly set up by editing board.matrix by hand
+            self.board.count_pieces()
+            zobrist_key = self.compute_zobrist_key()
+        self.zobrist_key = zobrist_key
 
     def __deepcopy__(self, memodict={}):
         g = GameState(board=deepcopy(self.board, memodict), game_over=self.game_over, turn=self.turn,
                       mid_hop=self.mid_hop,
-                      last_hop_to=self.last_hop_to, move_count=self.move_count)
+                      last_hop_to=self.last_hop_to, move_count=self.move_count, zobrist_key=self.zobrist_key)
         return g
 
+    def compute_zobrist_key(self) -> int:
+        """
+        Hashes the pieces, kings, side to move and mid-hop square from scratch.
+        """
+        key = self._zobrist_turn_key()
+        for color in (BLUE, RED):
+            kings = set(self.board.get_king_locations(color))
+            for x, y in self.board.get_locations_by_color(color):
+                key ^= ZOBRIST_PIECES[(color, (x, y) in kings)][x][y]
+        return key
+
+    def reset_zobrist_key(self):
+        self.zobrist_key = self.compute_zobrist_key()
+
+    def _zobrist_turn_key(self) -> int:
+        key = ZOBRIST_RED_TO_MOVE if self.turn == RED else 0
+        if self.mid_hop:
+            key ^= ZOBRIST_HOP_SQUARES[self.last_hop_to[0]][self.last_hop_to[1]] if self.last_hop_to else ZOBRIST_MID_HOP
+        return key
+
+    def apply_action(self, action: 'Action') -> 'UndoRecord':
+        """
+        Plays a single move or hop on this state in place, and returns the UndoRecord that undo_action() needs
+        to take it back. This lets a search walk one mutable state instead of copying it for every child.
+        """
+        from_x, from_y, to_x, to_y = action
+        turn, mid_hop, last_hop_to = self.turn, self.mid_hop, self.last_hop_to
+        move_count, game_over, zobrist_key = self.move_count, self.game_over, self.zobrist_key
+
+        occupant = self.board.piece_at(to_x, to_y)
+        if occupant is not None and occupant.color == self.turn:
+            self.end_turn()
+            return UndoRecord(action, None, False, None, None, turn, mid_hop, last_hop_to, move_count, game_over,
+                              zobrist_key)
+
+        moved = self.board.piece_at(from_x, from_y)
+        was_king = moved.king
+        self.board.move_piece(from_x, from_y, to_x, to_y)
+        crowned = not was_king and self.board.piece_at(to_x, to_y).king
+        self.zobrist_key ^= (ZOBRIST_PIECES[(moved.color, was_king)][from_x][from_y]
+                             ^ ZOBRIST_PIECES[(moved.color, was_king or crowned)][to_x][to_y])
+
+        captured, captured_at = None, None
+        if abs(to_x - from_x) == 2:  # hop
+            captured_at = (from_x + (to_x - from_x) // 2, from_y + (to_y - from_y) // 2)
+            captured = self.board.piece_at(captured_at[0], captured_at[1])
+            self.board.remove_piece(captured_at[0], captured_at[1])
+            self.zobrist_key ^= ZOBRIST_PIECES[(captured.color, captured.king)][captured_at[0]][captured_at[1]]
+
+            if self.board.legal_moves(to_x, to_y, mid_hop=True):
+                # More legal moves to make, we are mid-hop
+                self.zobrist_key ^= self._zobrist_turn_key()
+                self.mid_hop = True
+                self.zobrist_key ^= self._zobrist_turn_key()
+            else:
+                # No more legal moves now
+                self.end_turn()
+        else:
+            self.end_turn()
+
+        return UndoRecord(action, moved, crowned, captured, captured_at, turn, mid_hop, last_hop_to, move_count,
+                          game_over, zobrist_key)
+
+    def undo_action(self, record: 'UndoRecord'):
+        """
+        Takes back the action that produced record. Actions must be undone in the reverse order they were applied.
+        """
+        if record.moved is not None:
+            from_x, from_y, to_x, to_y = record.action
+            if record.crowned:
+                record.moved.uncrown()
+            self.board.put_piece(to_x, to_y, None)
+            self.board.put_piece(from_x, from_y, record.moved)
+            if record.captured is not None:
+                self.board.put_piece(record.captured_at[0], record.captured_at[1], record.captured)
+
+        self.turn = record.turn
+        self.mid_hop = record.mid_hop
+        self.last_hop_to = record.last_hop_to
+        self.move_count = record.move_count
+        self.game_over = record.game_over
+        self.zobrist_key = record.zobrist_key
+
+    def apply_move(self, move: 'Move') -> List['UndoRecord']:
+        """
+        Plays every hop of a Move with apply_action(), and returns their UndoRecords for undo_move().
+        """
+        records = []
+        x, y = move.from_x, move.from_y
+        for to_x, to_y in move.path:
+            records.append(self.apply_action(Action(x, y, to_x, to_y)))
+            x, y = to_x, to_y
+        return records
+
+    def undo_move(self, records: List['UndoRecord']):
+        for record in reversed(records):
+            self.undo_action(record)
+
     def whoWon(self):
-        num_red = 0
-        num_blue = 0
-        for i in range(8):
-            for j in range(8):
-                occupant = self.board.location(i, j).occupant
-                if occupant is None:
-                    continue
-
-                if occupant.color == RED:
-                    num_red += 1
-                else:
-                    num_blue += 1
+        num_red = self.board.piece_counts[RED]
+        num_blue = self.board.piece_counts[BLUE]
 
         if num_red == 0 and num_blue > 0:
             return BLUE
@@ -355,6 +542,7 @@ class GameState:
         return None
 
     def end_turn(self):
+        self.zobrist_key ^= self._zobrist_turn_key()
         if self.turn == BLUE:
             self.turn = RED
         else:
@@ -363,6 +551,7 @@ class GameState:
         self.mid_hop = False
         self.last_hop_to = None
         self.move_count += 1
+        self.zobrist_key ^= self._zobrist_turn_key()
 
         if self.is_game_over():
             self.game_over = True
@@ -371,18 +560,8 @@ class GameState:
         """
         Checks to see if either player has run out of moves or pieces. If so, then return True. Else return False.
         """
-        red_has_moves, blue_has_moves = False, False
-
-        for x in range(8):
-            for y in range(8):
-                # if (self.board.location(x, y).color == BLACK and self.board.location(x, y).occupant is not None and
-                #         self.board.location(x, y).occupant.color == self.turn):
-                location = self.board.location(x, y)
-                if location.color == BLACK and location.occupant is not None and self.board.legal_moves(x, y):
-                    if location.occupant.color == BLUE:
-                        blue_has_moves = True
-                    else:
-                        red_has_moves = True
+        blue_has_moves = self.board.has_legal_move(BLUE)
+        red_has_moves = self.board.has_legal_move(RED)
 
         # if only one of them has moves, then the game is over
         return not (red_has_moves and blue_has_moves)
@@ -443,10 +622,10 @@ class Game:
                                                                      mid_hop=self.state.mid_hop)
 
         for event in pygame.event.get():
-            if event.type == QUIT:
+            if event.type == pygame.QUIT:
                 self.terminate_game()
 
-            if event.type == MOUSEBUTTONDOWN:
+            if event.type == pygame.MOUSEBUTTONDOWN:
                 # print(self.hop)
                 if not self.state.mid_hop:
                     if (self.state.board.location(self.mouse_pos[0], self.mouse_pos[1]).occupant is not None and
@@ -512,6 +691,7 @@ class Game:
         end_turn() also checks for and game and resets a lot of class attributes.
         """
         self.state.end_turn()
+        self.state.reset_zobrist_key()  # player_turn() edits the board directly
         self.selected_piece = None
         self.selected_legal_moves = []
 
@@ -526,6 +706,7 @@ class Game:
 
 class Graphics:
     def __init__(self):
+        _import_pygame()
         self.caption = "Checkers"
 
         self.fps = 60
@@ -577,8 +758,8 @@ class Graphics:
         """
         for x in range(8):
             for y in range(8):
-                if board.matrix[x][y].occupant != None:
-                    pygame.draw.circle(self.screen, board.matrix[x][y].occupant.color,
+                if board.location(x, y).occupant != None:
+                    pygame.draw.circle(self.screen, board.location(x, y).occupant.color,
                                        tuple(map(int, self.pixel_coords((x, y)))), int(self.piece_size))
 
                     if board.location(x, y).occupant.king == True:
@@ -625,6 +806,8 @@ class Graphics:
 
 
 class Piece:
+    __slots__ = ('color', 'king', 'value')
+
     def __init__(self, color, king=False):
         self.color = color
         self.king = king
@@ -634,8 +817,14 @@ class Piece:
         self.king = True
         self.value = 2
 
+    def uncrown(self):
+        self.king = False
+        self.value = 1
+
 
 class Square:
+    __slots__ = ('color', 'occupant')
+
     def __init__(self, color, occupant=None):
         self.color = color  # color is either BLACK or WHITE
         self.occupant = occupant  # occupant is a Piece object
@@ -649,3 +838,11 @@ def _next_player_color(color: PlayerColor) -> PlayerColor:
 
 
 Action = namedtuple("Action", "from_x from_y to_x to_y")
+
+# A whole turn: a step, or every hop of a capture path. to_x, to_y is where the piece ends up, path lists every square
+# it lands on (ending with to_x, to_y) and captures the squares of the pieces it takes, in order.
+Move = namedtuple("Move", "from_x from_y to_x to_y path captures")
+
+# Everything GameState.undo_action() needs to restore the state from before GameState.apply_action()
+UndoRecord = namedtuple("UndoRecord", "action moved crowned captured captured_at turn mid_hop last_hop_to move_count "
+                                       "game_over zobrist_key")
@@ -1,22 +1,49 @@
+import hashlib
 import itertools
 import json
 import multiprocessing
 import multiprocessing as mp
 import os
-from typing import Any, Dict, List, Tuple
+import random
+import secrets
+import time
+import traceback
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 import checkers
 from agents.build_agent import build_agent
 from eval_fns import piece2val
+from game_records import GameRecord, GameRecordWriter, encode_moves
 from game_state import _break_ties_by_all_dists, _break_ties_by_king_dist, _break_ties_distance
+from headless import HeadlessGame
+from ratings import sprt_bounds, sprt_llr
+from search_stats import SearchStats, sum_stats
 
 NUM_GAMES = 50
 MAX_MOVES = 150
+# With SPRT set, a match stops as soon as a sequential probability ratio test accepts that red is elo0 Elo stronger
+# than blue (when it is in fact elo1 stronger, with a chance of at most beta) or that it is elo1 stronger (when it is
+# in fact elo0 stronger, with a chance of at most alpha). NUM_GAMES is then the most games to play. The test only
+# counts the games finished in the order they were started (see in_order()): short, decisive games finish first, so
+# the games finished at any one time would lean away from draws.
+SPRT = None  # e.g. {'elo0': 0, 'elo1': 50, 'alpha': 0.05, 'beta': 0.05}
 
 
 def agent_str(agent: Dict) -> str:
     return f'({agent.get("agent")}.{agent.get("depth")}.{agent.get("eval_fn").__name__ if "eval_fn" in agent else ""}' \
-           f'.{agent.get("tiebreaker_fn").__name__ if "tiebreaker_fn" in agent else ""})'
+           f'.{agent.get("tiebreaker_fn").__name__ if "tiebreaker_fn" in agent else ""}' \
+           f'{".full_jumps" if agent.get("full_jumps") else ""}{".tablebase" if agent.get("tablebase") else ""}' \
+           f'{".book" if agent.get("opening_book") else ""})'
+
+
+def setup_hash(*setups: Dict) -> str:
+    """
+    A short hash of the whole of some agent setups. agent_str() leaves out the search options (quiescence, tt_size,
+    parallel, ...), so the games files that runs resume from are named with this as well.
+    """
+    canonical = json.dumps(setups, sort_keys=True, default=lambda o: o.__name__)
+    return hashlib.sha1(canonical.encode()).hexdigest()[:8]
 
 
 AGENT_RED_SETUP = {
@@ -32,6 +59,9 @@ AGENT_BLUE_SETUP = {
     'color': checkers.BLUE,
     'depth': 2,
     'eval_fn': piece2val,
+    # 'full_jumps': True,  # plays whole capture paths as one move, so depth counts turns instead of hops
+    # 'tablebase': 'tablebases',  # endgame tables built by running tablebase.py
+    # 'opening_book': 'resources/opening_book.json',  # book moves built by build_opening_book.py
 }
 
 
@@ -43,62 +73,202 @@ AGENT_BLUE_SETUP = {
 # }
 
 
-def run_game_once(x) -> Tuple[Any, List[int]]:
+def run_game_once(x, red_setup: Dict = None, blue_setup: Dict = None,
+                  seed: int = None) -> Tuple[Any, List[int], Dict, Dict, bytes]:
     """
-    Returns TRUE if red wins, FALSE if blue wins
+    Returns who won, the nodes explored on each turn, each agent's transposition table stats (or None), each
+    agent's search stats and the game's moves (see game_records.py). The setups default to AGENT_RED_SETUP and
+    AGENT_BLUE_SETUP. With a seed, random is seeded with it first, so the game can be played again.
     """
-    game = checkers.Game(loop_mode=True)
-    game.setup()
+    if seed is not None:
+        random.seed(seed)
+    game = HeadlessGame()
     # agent_blue = MinimaxAgent(color=checkers.BLUE, game=game, depth=2, eval_fn=piece2val)
     # agent_red = MinimaxAgent(color=checkers.RED, game=game, depth=1, eval_fn=piece2val_favor_kings)
-    agent_blue = build_agent(**{'game': game, **AGENT_BLUE_SETUP})
-    agent_red = build_agent(**{'game': game, **AGENT_RED_SETUP})
+    agent_blue = build_agent(**{'game': game, **(blue_setup or AGENT_BLUE_SETUP)})
+    agent_red = build_agent(**{'game': game, **(red_setup or AGENT_RED_SETUP)})
     print(f'⏳ Starting run {x}...')
 
-    nodes_explored_counts = [0]
+    who_won, nodes_explored_counts = game.play(agent_blue=agent_blue, agent_red=agent_red, max_moves=MAX_MOVES)
+    return who_won, nodes_explored_counts, _tt_stats(agent_red, agent_blue), \
+        {'red': agent_red.stats, 'blue': agent_blue.stats}, encode_moves(game.moves)
 
-    last_turn = game.state.turn
-    while True and game.state.move_count < MAX_MOVES:  # main game loop
-        same_color = False
-        if game.state.turn == last_turn:
-            same_color = True
-        last_turn = game.state.turn
 
-        if game.state.turn == checkers.BLUE:
-            nodes_explored = agent_blue.make_move()
-        else:
-            nodes_explored = agent_red.make_move()
+def _tt_stats(agent_red, agent_blue) -> Dict:
+    return {
+        'red': agent_red.transposition_table.stats() if getattr(agent_red, 'transposition_table', None) else None,
+        'blue': agent_blue.transposition_table.stats() if getattr(agent_blue, 'transposition_table', None) else None,
+    }
 
-        if same_color:
-            nodes_explored_counts[-1] += nodes_explored
-        else:
-            nodes_explored_counts.append(nodes_explored)
 
-        if game.state.game_over:
-            return game.state.whoWon(), nodes_explored_counts
+def _sum_tt_stats(all_stats: List[Dict]) -> Optional[Dict]:
+    """
+    Adds up the transposition table counters of several games and recomputes the rates.
+    """
+    all_stats = [stats for stats in all_stats if stats is not None]
+    if not all_stats:
+        return None
+    probes = sum(stats['tt_probes'] for stats in all_stats)
+    hits = sum(stats['tt_hits'] for stats in all_stats)
+    cutoffs = sum(stats['tt_cutoffs'] for stats in all_stats)
+    return {
+        'tt_probes': probes,
+        'tt_hits': hits,
+        'tt_cutoffs': cutoffs,
+        'tt_hit_rate': hits / probes if probes else 0,
+        'tt_cutoff_rate': cutoffs / probes if probes else 0,
+    }
 
-        game.update()
 
-    return None, nodes_explored_counts
+def play_game(x, red_setup: Dict = None, blue_setup: Dict = None) -> Dict:
+    """
+    Runs in a worker. Plays game x and returns it as a record for the games file, or the error that stopped it.
+    The moves go in 'game_record', which stream_games() writes to the records file instead.
+    """
+    start = time.perf_counter()
+    seed = secrets.randbits(32)
+    try:
+        who_won, nodes_explored_counts, tt_stats, search_stats, moves = run_game_once(x, red_setup, blue_setup, seed)
+    except Exception:
+        return {'game': x, 'error': traceback.format_exc()}
+    return {
+        'game': x,
+        'winner': _COLOR_NAMES.get(who_won),
+        'seed': seed,
+        'game_record': GameRecord(game=x, red=red_setup or AGENT_RED_SETUP, blue=blue_setup or AGENT_BLUE_SETUP,
+                                  seed=seed, winner=_COLOR_NAMES.get(who_won), moves=moves),
+        'nodes_explored': nodes_explored_counts,
+        'tt_stats': tt_stats,
+        'search_stats': {color: stats.to_dict() for color, stats in search_stats.items()},
+        'seconds': time.perf_counter() - start,
+    }
 
 
-def parallel_main():
-    print('Agent Red: ' + str(AGENT_RED_SETUP))
-    print('Agent Blue: ' + str(AGENT_BLUE_SETUP))
+_COLOR_NAMES = {checkers.RED: 'red', checkers.BLUE: 'blue'}
+
+
+def games_filename(agent_red: Dict, agent_blue: Dict) -> str:
+    return f'results/competitions/games_{agent_str(agent_red)}_vs_{agent_str(agent_blue)}_' \
+           f'{setup_hash(agent_red, agent_blue)}.jsonl'
+
+
+def records_filename(games_file: str) -> str:
+    """
+    The game records file (see game_records.py) that goes with a games file.
+    """
+    return os.path.splitext(games_file)[0] + '.games'
+
+
+def load_games(filename: str) -> Dict[int, Dict]:
+    """
+    The games finished so far in a games file, by game number. Games that failed are left out, so they get played
+    again, and so is a last line cut short by an interrupted run.
+    """
+    games = {}
+    if not os.path.exists(filename):
+        return games
+    with open(filename) as fp:
+        for line in fp:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if 'error' not in record:
+                games[record['game']] = record
+    return games
+
+
+def stream_games(filename: str, tasks: Dict[Any, Tuple], play: Callable = play_game, pool: mp.Pool = None,
+                 score: Callable[[Iterable[Dict]], str] = None,
+                 stop: Callable[[Dict[Any, Dict]], bool] = None) -> Dict[Any, Dict]:
+    """
+    Plays the games in tasks that are not already in the games file, appending each one to the file as soon as it
+    finishes and printing the running score. Returns every finished game of tasks by game id. The moves of the games
+    go to records_filename(filename).
+
+    tasks maps game ids to the arguments play() takes after the id, and games are handed to the workers in that
+    order. Uses pool if given, so that several calls can share one, and a pool of its own otherwise.
+    Stops early once stop() is true for the finished games. Games still being played are then dropped, so only
+    stop a pool of its own.
+    """
+    finished = load_games(filename)
+    games = {game_id: finished[game_id] for game_id in tasks if game_id in finished}
+    to_play = [(play, game_id, args) for game_id, args in tasks.items() if game_id not in finished]
+    print(f'{len(games)} of {len(tasks)} games already in {filename}')
+    if not to_play or (stop is not None and stop(games)):
+        return games
+
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    start = time.perf_counter()
+    nodes_explored = 0
+    cut_short = not _ends_with_newline(filename)
+    with open(filename, 'a') as fp, GameRecordWriter(records_filename(filename)) as records, \
+            _pool_or(pool) as workers:
+        if cut_short:
+            fp.write('\n')  # an interrupted run left half a line
+        for record in workers.imap_unordered(_play_task, to_play):
+            game_record = record.pop('game_record', None)
+            fp.write(json.dumps(record, default=lambda o: o.__name__) + '\n')
+            fp.flush()
+            if game_record is not None:
+                # after the games file, so that recorded moves always belong to the game in the games file: a run
+                # cut off between the two writes leaves that game without moves, it does not play it again
+                records.write(game_record)
+            if 'error' in record:
+                print(f'game {record["game"]} failed, it is played again on the next run:\n{record["error"]}')
+                continue
+            games[record['game']] = record
+            nodes_explored += sum(record['nodes_explored'])
+            print(f'{len(games)}/{len(tasks)} games: {(score or _score)(games.values())}, '
+                  f'{nodes_explored / (time.perf_counter() - start):,.0f} nodes/s')
+            if stop is not None and stop(games):
+                break
+    return games
+
+
+def _ends_with_newline(filename: str) -> bool:
+    """
+    Whether the file is missing, empty or ends with a newline, so that the next line can be appended as it is.
+    """
+    if not os.path.exists(filename) or os.path.getsize(filename) == 0:
+        return True
+    with open(filename, 'rb') as fp:
+        fp.seek(-1, os.SEEK_END)
+        return fp.read(1) == b'\n'
 
-    pool = mp.Pool(processes=multiprocessing.cpu_count())
-    results = pool.map(run_game_once, range(NUM_GAMES))
-    print(results)
 
-    red_wins = 0
-    blue_wins = 0
-    draws = 0
+def _play_task(task: Tuple) -> Dict:
+    play, game_id, args = task
+    return play(game_id, *args)
+
+
+@contextmanager
+def _pool_or(pool: mp.Pool):
+    if pool is not None:
+        yield pool
+        return
+    with mp.Pool(processes=multiprocessing.cpu_count()) as own_pool:
+        yield own_pool
+
+
+def _score(games: Iterable[Dict]) -> str:
+    winners = [game['winner'] for game in games]
+    return f'red {winners.count("red") / len(winners):.0%}, blue {winners.count("blue") / len(winners):.0%}, ' \
+           f'draws {winners.count(None) / len(winners):.0%}'
+
+
+def summarize(games: List[Dict], agent_red: Dict, agent_blue: Dict) -> Dict:
+    """
+    The results file contents for a list of game records.
+    """
+    red_wins = sum(game['winner'] == 'red' for game in games)
+    blue_wins = sum(game['winner'] == 'blue' for game in games)
+    draws = len(games) - red_wins - blue_wins
+
     blue_explored_nodes = []
     red_explored_nodes = []
-
-    for i in range(NUM_GAMES):
-        who_won = results[i][0]
-        nodes_explored_list = results[i][1]
+    for game in games:
+        nodes_explored_list = game['nodes_explored']
         blue_explored_here = [x for idx, x in enumerate(nodes_explored_list) if idx % 2 == 0]  # blue goes first
         red_explored_here = [x for idx, x in enumerate(nodes_explored_list) if idx % 2 == 1]
 
@@ -107,37 +277,78 @@ def parallel_main():
         red_explored_nodes = [sum(x)
                               for x in itertools.zip_longest(red_explored_nodes, red_explored_here, fillvalue=0)]
 
-        if who_won == checkers.RED:
-            red_wins += 1
-        elif who_won == checkers.BLUE:
-            blue_wins += 1
-        else:
-            draws += 1
-
-    avg_red_explored_nodes = [x / NUM_GAMES for x in red_explored_nodes]
-    avg_blue_explored_nodes = [x / NUM_GAMES for x in blue_explored_nodes]
-
-    red_win_rate = red_wins / len(results)
-    blue_win_rate = blue_wins / len(results)
-
-    print(f'Red wins {red_wins} / {len(results)} = {red_win_rate * 100}%')
-    print(f'Blue wins {blue_wins} / {len(results)} = {blue_win_rate * 100}%')
-    print(f'Draws = {draws}')
-
-    file_contents = {
-        'red': AGENT_RED_SETUP,
-        'blue': AGENT_BLUE_SETUP,
-        'num_games': NUM_GAMES,
+    return {
+        'red': agent_red,
+        'blue': agent_blue,
+        'num_games': len(games),
         'red_wins': red_wins,
         'blue_wins': blue_wins,
         'draws': draws,
         'draw_threshold': MAX_MOVES,
-        'red_win_rate': red_win_rate,
-        'blue_win_rate': blue_win_rate,
-        'avg_red_explored_nodes': avg_red_explored_nodes,
-        'avg_blue_explored_nodes': avg_blue_explored_nodes,
+        'red_win_rate': red_wins / len(games),
+        'blue_win_rate': blue_wins / len(games),
+        'avg_red_explored_nodes': [x / len(games) for x in red_explored_nodes],
+        'avg_blue_explored_nodes': [x / len(games) for x in blue_explored_nodes],
+        'red_search_stats': _sum_search_stats(game['search_stats']['red'] for game in games),
+        'blue_search_stats': _sum_search_stats(game['search_stats']['blue'] for game in games),
+        'red_tt_stats': _sum_tt_stats([game['tt_stats']['red'] for game in games]),
+        'blue_tt_stats': _sum_tt_stats([game['tt_stats']['blue'] for game in games]),
     }
 
+
+def _sum_search_stats(all_counters: Iterable[Dict]) -> Dict:
+    return sum_stats(SearchStats.from_dict(counters) for counters in all_counters).summary()
+
+
+def in_order(games: Iterable[Dict]) -> List[Dict]:
+    """
+    Of the finished games, those numbered 0, 1, 2, ... up to the first one that has not finished yet.
+    """
+    by_id = {game['game']: game for game in games}
+    return list(itertools.takewhile(lambda game: game is not None, (by_id.get(x) for x in itertools.count())))
+
+
+def sprt_result(games: Iterable[Dict], sprt: Dict) -> Dict:
+    """
+    Where the SPRT stands for red after games: the log-likelihood ratio, its bounds, and which hypothesis it
+    accepted, 'elo0' or 'elo1', or None while the match has to go on.
+    """
+    winners = [game['winner'] for game in games]
+    llr = sprt_llr(winners.count('red'), winners.count(None), winners.count('blue'), sprt['elo0'], sprt['elo1'])
+    lower, upper = sprt_bounds(sprt['alpha'], sprt['beta'])
+    accepted = 'elo1' if llr >= upper else 'elo0' if llr <= lower else None
+    return {**sprt, 'llr': llr, 'lower_bound': lower, 'upper_bound': upper, 'accepted': accepted}
+
+
+def parallel_main():
+    print('Agent Red: ' + str(AGENT_RED_SETUP))
+    print('Agent Blue: ' + str(AGENT_BLUE_SETUP))
+
+    # Every game is saved to the games file as it finishes. An interrupted run picks up where it stopped when it
+    # is started again, delete the games file to start over.
+    tasks = {x: () for x in range(NUM_GAMES)}
+    filename = games_filename(AGENT_RED_SETUP, AGENT_BLUE_SETUP)
+    if SPRT is None:
+        games = stream_games(filename, tasks)
+    else:
+        def sprt_so_far(finished: Iterable[Dict]) -> Dict:
+            return sprt_result(in_order(finished), SPRT)
+
+        games = stream_games(filename, tasks,
+                             score=lambda finished: f'{_score(finished)}, LLR {sprt_so_far(finished)["llr"]:.2f}',
+                             stop=lambda finished: sprt_so_far(finished.values())['accepted'] is not None)
+    file_contents = summarize([games[x] for x in sorted(games)], AGENT_RED_SETUP, AGENT_BLUE_SETUP)
+    if SPRT is not None:
+        file_contents['sprt'] = sprt_result(in_order(games.values()), SPRT)
+        print(f'SPRT: LLR {file_contents["sprt"]["llr"]:.2f} in [{file_contents["sprt"]["lower_bound"]:.2f}, '
+              f'{file_contents["sprt"]["upper_bound"]:.2f}], accepted {file_contents["sprt"]["accepted"]}')
+
+    print(f'Red wins {file_contents["red_wins"]} / {file_contents["num_games"]} = '
+          f'{file_contents["red_win_rate"] * 100}%')
+    print(f'Blue wins {file_contents["blue_wins"]} / {file_contents["num_games"]} = '
+          f'{file_contents["blue_win_rate"] * 100}%')
+    print(f'Draws = {file_contents["draws"]}')
+
     filename = f'results/competitions/competition_{agent_str(AGENT_RED_SETUP)}_vs_{agent_str(AGENT_BLUE_SETUP)}.json'
     os.makedirs(os.path.dirname(filename), exist_ok=True)
     with open(filename, 'w') as fp:
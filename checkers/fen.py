@@ -0,0 +1,86 @@
+"""
+fen.py
+
+Positions as short strings, after the FEN tags of Portable Draughts Notation, e.g. the usual opening:
+
+    B:B21,22,23,24,25,26,27,28,29,30,31,32:R1,2,3,4,5,6,7,8,9,10,11,12
+
+The fields are separated by colons: the side to move (B for blue, R for red), then the squares of each color's
+pieces, with a K in front of kings. A fourth field H<square> marks a position in the middle of a multi-jump, where
+the piece that just hopped to that square has to keep going. A bare H is a multi-jump where the state does not know
+which piece hopped, like the states GameState.apply_action() leaves. Move counts are not kept.
+
+The 32 playable squares are numbered 1 to 32 in reading order from red's side of the board: square 1 is (0, 0),
+square 4 is (6, 0), square 5 is (1, 1) and square 32 is (7, 7). This is not the numbering of standard checkers,
+where the side that moves first starts on squares 1 to 12.
+"""
+
+from typing import List, Tuple
+
+from bitboard import BitBoard, _INDEX
+from checkers import BLUE, GameState, RED
+
+STARTING_FEN = 'B:B21,22,23,24,25,26,27,28,29,30,31,32:R1,2,3,4,5,6,7,8,9,10,11,12'
+
+SQUARES = [(x, y) for y in range(8) for x in range(8) if (x + y) % 2 == 0]  # square number - 1 -> (x, y)
+_NUMBERS = {square: number for number, square in enumerate(SQUARES, start=1)}
+_COLORS = {'B': BLUE, 'R': RED}
+_LETTERS = {BLUE: 'B', RED: 'R'}
+
+
+def to_fen(state: GameState) -> str:
+    fields = [_LETTERS[state.turn]]
+    board = state.board
+    for color in (BLUE, RED):
+        kings = set(board.get_king_locations(color))
+        pieces = sorted((_NUMBERS[location], location in kings) for location in board.get_locations_by_color(color))
+        fields.append(_LETTERS[color] + ','.join(f'{"K" if king else ""}{number}' for number, king in pieces))
+    if state.mid_hop:
+        fields.append(f'H{_NUMBERS[state.last_hop_to]}' if state.last_hop_to is not None else 'H')
+    return ':'.join(fields)
+
+
+def from_fen(fen: str) -> GameState:
+    """
+    The position fen describes, on a BitBoard. Raises ValueError if fen is not a position.
+    """
+    fields = fen.strip().split(':')
+    if len(fields) not in (3, 4) or fields[0] not in _COLORS:
+        raise ValueError(f'not a position: {fen!r}')
+
+    masks = {BLUE: 0, RED: 0}
+    kings = 0
+    for field in fields[1:3]:
+        color = _COLORS.get(field[:1])
+        if color is None:
+            raise ValueError(f'expected B or R pieces, got {field!r} in {fen!r}')
+        for (x, y), king in _pieces(field[1:], fen):
+            bit = 1 << _INDEX[x][y]
+            if (masks[BLUE] | masks[RED]) & bit:
+                raise ValueError(f'square {_NUMBERS[(x, y)]} is taken twice in {fen!r}')
+            masks[color] |= bit
+            if king:
+                kings |= bit
+
+    mid_hop, last_hop_to = len(fields) == 4, None
+    if mid_hop:
+        if not fields[3].startswith('H'):
+            raise ValueError(f'expected the hopping piece H<square>, got {fields[3]!r} in {fen!r}')
+        if fields[3] != 'H':
+            last_hop_to = _square(fields[3][1:], fen)
+    return GameState(board=BitBoard(blue=masks[BLUE], red=masks[RED], kings=kings), turn=_COLORS[fields[0]],
+                     mid_hop=mid_hop, last_hop_to=last_hop_to)
+
+
+def _pieces(field: str, fen: str) -> List[Tuple[Tuple[int, int], bool]]:
+    pieces = []
+    for piece in filter(None, field.split(',')):
+        king = piece.startswith('K')
+        pieces.append((_square(piece[1:] if king else piece, fen), king))
+    return pieces
+
+
+def _square(number: str, fen: str) -> Tuple[int, int]:
+    if not number.isdigit() or not 1 <= int(number) <= 32:
+        raise ValueError(f'not a square: {number!r} in {fen!r}')
+    return SQUARES[int(number) - 1]
@@ -0,0 +1,175 @@
+"""
+game_records.py
+
+Every move of every game a competition or league plays, in a compact binary file next to its games file, so that
+games can be replayed, analysed or turned into training positions.
+
+A records file starts with MAGIC, then holds records, each a kind byte and the length of what follows:
+- b'S', an agent setup as JSON (functions by name). Setups are numbered in the order they appear, and only written
+  the first time a game uses them.
+- b'G', a game: the numbers of its red and blue setups, the seed the game was played with, who won, the game id as
+  JSON, and then one byte per make_move() of the game.
+
+A move byte is the square the piece moved from (0 to 31, fen.SQUARES minus 1) in its top 5 bits, then whether it
+moved towards a higher x, towards a higher y, and whether it hopped. A capture path played as one Move takes one
+byte per hop. PASS, a player without a move ending their turn, would be a hop off the board from square 32.
+
+A game of 150 turns takes some 200 bytes, so a sweep of 10k games writes a few megabytes, much less than its games
+file. GameRecordWriter appends to the file as competition.stream_games() appends to the games file, and
+read_games() yields the games one at a time from a memory map, so a large file is never read in whole. replay()
+turns a game's moves back into GameStates as it goes.
+"""
+
+import json
+import mmap
+import os
+import struct
+from collections import namedtuple
+from typing import Dict, Iterator, List, Optional
+
+from bitboard import BitBoard
+from checkers import Action, GameState, Move
+from fen import SQUARES, _NUMBERS
+
+MAGIC = b'CKGAMES1'
+PASS = 0xff
+
+# game: the game id, red and blue: the agent setups, seed: what random was seeded with, winner: 'red', 'blue' or
+# None, moves: one byte per make_move(), see replay()
+GameRecord = namedtuple('GameRecord', 'game red blue seed winner moves')
+
+_RECORD = struct.Struct('<cI')  # kind, length of the rest
+_GAME = struct.Struct('<HHIBH')  # red setup, blue setup, seed, winner, length of the game id
+_WINNERS = [None, 'red', 'blue']
+
+
+def encode_moves(moves: List[Optional[Action]]) -> bytes:
+    """
+    The moves of a game as bytes, from HeadlessGame.moves: Actions, Moves, and None for a pass.
+    """
+    encoded = bytearray()
+    for move in moves:
+        if move is None:
+            encoded.append(PASS)
+            continue
+        x, y = move.from_x, move.from_y
+        for to_x, to_y in (move.path if isinstance(move, Move) else ((move.to_x, move.to_y),)):
+            encoded.append((_NUMBERS[(x, y)] - 1) << 3 | (to_x > x) << 2 | (to_y > y) << 1 | (abs(to_x - x) == 2))
+            x, y = to_x, to_y
+    return bytes(encoded)
+
+
+def decode_move(move: int) -> Optional[Action]:
+    """
+    The hop a move byte stands for, None for PASS.
+    """
+    if move == PASS:
+        return None
+    x, y = SQUARES[move >> 3]
+    distance = 2 if move & 1 else 1
+    return Action(x, y, x + (distance if move & 4 else -distance), y + (distance if move & 2 else -distance))
+
+
+def replay(moves: bytes, state: GameState = None) -> Iterator[GameState]:
+    """
+    The positions of a game, from the start (the usual opening by default) to after each of moves, one at a time.
+    Every one is the same state played forward, so deepcopy the ones to keep.
+    """
+    state = state if state is not None else GameState(board=BitBoard())
+    yield state
+    for move in moves:
+        action = decode_move(move)
+        if action is None:
+            state.end_turn()
+        else:
+            state.apply_action(action)
+        yield state
+
+
+def read_games(filename: str) -> Iterator[GameRecord]:
+    """
+    The games in a records file, in the order they were written. A last record cut short by an interrupted run is
+    left out. Raises ValueError if filename is not a records file.
+    """
+    with open(filename, 'rb') as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'{filename} is not a game records file')
+        setups = []
+        for kind, start, end in _records(data):
+            if kind == b'S':
+                setups.append(json.loads(data[start:end]))
+            else:
+                yield _game(data, start, end, setups)
+
+
+def _records(data) -> Iterator:
+    offset = len(MAGIC)
+    while offset + _RECORD.size <= len(data):
+        kind, length = _RECORD.unpack_from(data, offset)
+        start = offset + _RECORD.size
+        if start + length > len(data):
+            return
+        yield kind, start, start + length
+        offset = start + length
+
+
+def _game(data, start: int, end: int, setups: List[Dict]) -> GameRecord:
+    red, blue, seed, winner, id_length = _GAME.unpack_from(data, start)
+    moves_start = start + _GAME.size + id_length
+    return GameRecord(game=json.loads(data[start + _GAME.size:moves_start]), red=setups[red], blue=setups[blue],
+                      seed=seed, winner=_WINNERS[winner], moves=data[moves_start:end])
+
+
+class GameRecordWriter:
+    """
+    Appends games to a records file, creating it if needed. Games whose id is already in the file are not written
+    again, and a record cut short by an interrupted run is cut off the file first.
+    """
+
+    def __init__(self, filename: str):
+        self.setups: Dict[str, int] = {}  # setup as JSON -> its number in the file
+        self.games = set()
+        end = len(MAGIC)
+        if os.path.exists(filename) and os.path.getsize(filename) >= len(MAGIC):
+            with open(filename, 'rb') as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data[:len(MAGIC)] != MAGIC:
+                    raise ValueError(f'{filename} is not a game records file')
+                for kind, start, end in _records(data):
+                    if kind == b'S':
+                        self.setups[data[start:end].decode()] = len(self.setups)
+                    else:
+                        id_length = _GAME.unpack_from(data, start)[-1]
+                        self.games.add(data[start + _GAME.size:start + _GAME.size + id_length].decode())
+            self.fp = open(filename, 'r+b')
+            self.fp.truncate(end)
+            self.fp.seek(end)
+        else:
+            self.fp = open(filename, 'wb')
+            self.fp.write(MAGIC)
+
+    def __enter__(self) -> 'GameRecordWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.fp.close()
+
+    def write(self, record: GameRecord):
+        game_id = json.dumps(record.game)
+        if game_id in self.games:
+            return
+        self.games.add(game_id)
+        game_id = game_id.encode()
+        game = _GAME.pack(self._setup(record.red), self._setup(record.blue), record.seed,
+                          _WINNERS.index(record.winner), len(game_id)) + game_id + record.moves
+        self.fp.write(_RECORD.pack(b'G', len(game)) + game)
+        self.fp.flush()
+
+    def _setup(self, setup: Dict) -> int:
+        encoded = json.dumps(setup, sort_keys=True, default=lambda o: o.__name__)
+        if encoded not in self.setups:
+            self.setups[encoded] = len(self.setups)
+            self.fp.write(_RECORD.pack(b'S', len(encoded.encode())) + encoded.encode())
+        return self.setups[encoded]
@@ -3,23 +3,26 @@ from __future__ import annotations
 import random
 
 from checkers import *
-from checkers import Action, PlayerColor
+from checkers import Action, Move, PlayerColor, UndoRecord
 from eval_fns import _dists_to_all_pieces, furthest_king, piece2val, piece2val_move_to_opponent
 
 MovesForPiece = namedtuple("MovesForPiece", "x y actions")
 
 
 class Node:
-    state: GameState = None
-    depth: int = 0
-    eval_fn = piece2val
-    start_from: Tuple = None
-
-    def __init__(self, state: GameState, depth: int = 0, eval_fn=piece2val, start_from: Tuple = None):
+    __slots__ = ('state', 'depth', 'eval_fn', 'start_from', 'full_jumps')
+    state: GameState
+    depth: int
+    start_from: Tuple
+    full_jumps: bool  # whether actions are whole Moves, with every hop of a capture path, instead of hops
+
+    def __init__(self, state: GameState, depth: int = 0, eval_fn=piece2val, start_from: Tuple = None,
+                 full_jumps: bool = False):
         self.state = state
         self.depth = depth
         self.eval_fn = eval_fn
         self.start_from = start_from
+        self.full_jumps = full_jumps
 
     def is_terminal(self) -> bool:
         return self.state.whoWon() is not None
@@ -34,7 +37,13 @@ class Node:
         actions: List[Action] = []
         for move_from_x, move_from_y, move_tos in moves:
             for move_to in move_tos:
-                actions.append(Action(move_from_x, move_from_y, move_to[0], move_to[1]))
+                action = Action(move_from_x, move_from_y, move_to[0], move_to[1])
+                if not self.full_jumps:
+                    actions.append(action)
+                elif abs(move_to[0] - move_from_x) == 2:
+                    actions.extend(_capture_paths(self.state, action))
+                else:
+                    actions.append(Move(move_from_x, move_from_y, move_to[0], move_to[1], (move_to,), ()))
 
         return actions
 
@@ -46,42 +55,59 @@ class Node:
         next_state = Node(
             state=next_state,
             depth=self.depth + 1,
-            eval_fn=self.eval_fn
+            eval_fn=self.eval_fn,
+            full_jumps=self.full_jumps,
         )
         return next_state
 
+    def push(self, action: Action) -> Tuple[Node, UndoRecord]:
+        """
+        Like next_node(), but plays the action on this node's own state instead of a copy.
+        The returned child shares that state, so pop() the record before using this node again.
+        """
+        if isinstance(action, Move):
+            undo = self.state.apply_move(action)
+        else:
+            undo = self.state.apply_action(action)
+        return Node(state=self.state, depth=self.depth + 1, eval_fn=self.eval_fn, full_jumps=self.full_jumps), undo
+
+    def pop(self, undo: UndoRecord):
+        if isinstance(undo, list):  # the records of a Move's hops
+            self.state.undo_move(undo)
+        else:
+            self.state.undo_action(undo)
+
     def value(self) -> float:
         return self.eval_fn(self.state.board, self.state.turn)
 
     def _generate_moves(self) -> List[MovesForPiece]:
-        for i in range(8):
-            for j in range(8):
-                if (self.state.board.legal_moves(i, j, self.state.mid_hop) != []
-                        and self.state.board.location(i, j).occupant is not None
-                        and self.state.board.location(i, j).occupant.color == self.state.turn):
-                    yield MovesForPiece(i, j, self.state.board.legal_moves(i, j, self.state.mid_hop))
+        for i, j, legal_moves in self.state.board.legal_moves_by_color(self.state.turn, self.state.mid_hop):
+            yield MovesForPiece(i, j, legal_moves)
 
     def _apply_action_to_state(self, state: GameState, action: Action):
-        current_pos, final_pos = (action.from_x, action.from_y), (action.to_x, action.to_y)
-
-        if (state.board.location(final_pos[0], final_pos[1]).occupant is not None
-                and state.board.location(final_pos[0], final_pos[1]).occupant.color == self.state.turn):
-            state.end_turn()
-            return
-
-        state.board.move_piece(current_pos[0], current_pos[1], final_pos[0], final_pos[1])
-        if final_pos not in state.board.adjacent(current_pos[0], current_pos[1]):  # hop
-            state.board.remove_piece(current_pos[0] + (final_pos[0] - current_pos[0]) // 2,
-                                     current_pos[1] + (final_pos[1] - current_pos[1]) // 2)
-
-            if state.board.legal_moves(final_pos[0], final_pos[1], mid_hop=True):
-                # More legal moves to make, we are mid-hop
-                state.mid_hop = True
-            else:
-                # No more legal moves now
-                state.end_turn()
+        if isinstance(action, Move):
+            state.apply_move(action)
         else:
-            state.end_turn()
+            state.apply_action(action)
+
+
+def _capture_paths(state: GameState, hop: Action, path: Tuple = (), captures: Tuple = ()) -> List[Move]:
+    """
+    Every capture path that starts with hop, as Moves. A path keeps hopping for as long as the piece can,
+    like the game makes a player do. path and captures hold the hops made before this one.
+    """
+    undo = state.apply_action(hop)
+    path = path + ((hop.to_x, hop.to_y),)
+    captures = captures + (((hop.from_x + hop.to_x) // 2, (hop.from_y + hop.to_y) // 2),)
+    if state.mid_hop:
+        moves = []
+        for to_x, to_y in state.board.legal_moves(hop.to_x, hop.to_y, mid_hop=True):
+            moves.extend(_capture_paths(state, Action(hop.to_x, hop.to_y, to_x, to_y), path, captures))
+    else:
+        first_x, first_y = captures[0]
+        moves = [Move(2 * first_x - path[0][0], 2 * first_y - path[0][1], hop.to_x, hop.to_y, path, captures)]
+    state.undo_action(undo)
+    return moves
 
 
 def _break_ties_distance(curr_best_action: Action, new_action: Action, node: Node, color: PlayerColor):
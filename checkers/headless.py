@@ -0,0 +1,61 @@
+"""
+headless.py
+
+Plays agents against each other without a window. Unlike checkers.Game this only depends on GameState and the
+boards, so it never imports pygame and never waits for a display frame between moves.
+"""
+
+from typing import Any, List, Optional, Tuple
+
+from agents.agent import Agent
+from bitboard import BitBoard
+from checkers import Action, BLUE, GameState
+
+
+class HeadlessGame:
+    """
+    Stands in for checkers.Game when no human is playing. Agents only use game.state and game.end_turn().
+    """
+    loop_mode = True
+
+    def __init__(self, state: GameState = None):
+        self.state = state if state is not None else GameState(board=BitBoard())
+        self.moves: List[Optional[Action]] = []  # every make_move() of play(), see game_records.encode_moves()
+
+    def setup(self):
+        pass
+
+    def update(self):
+        pass
+
+    def end_turn(self):
+        self.state.end_turn()
+
+    def play(self, agent_blue: Agent, agent_red: Agent, max_moves: int) -> Tuple[Any, List[int]]:
+        """
+        Plays until the game is over or max_moves turns have been played.
+        Returns who won (None for a draw) and the nodes explored on each turn, blue's turns first.
+        """
+        nodes_explored_counts = [0]
+
+        last_turn = self.state.turn
+        while self.state.move_count < max_moves:
+            same_color = False
+            if self.state.turn == last_turn:
+                same_color = True
+            last_turn = self.state.turn
+
+            agent = agent_blue if self.state.turn == BLUE else agent_red
+            nodes_explored = agent.make_move()
+            self.moves.append(agent.last_move)
+
+            # every hop of a multi-jump is a separate make_move(), count them as one turn
+            if same_color:
+                nodes_explored_counts[-1] += nodes_explored
+            else:
+                nodes_explored_counts.append(nodes_explored)
+
+            if self.state.game_over:
+                return self.state.whoWon(), nodes_explored_counts
+
+        return None, nodes_explored_counts
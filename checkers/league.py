@@ -0,0 +1,198 @@
+"""
+league.py
+
+Plays a league between many agent setups, instead of the single matchup of competition.py, and rates them with Elo
+(see ratings.py).
+
+LEAGUE_AGENTS lists the setups, like competition.AGENT_RED_SETUP without the color. With SCHEDULE = 'round_robin'
+every pair of agents plays GAMES_PER_COLOR games with each of them as red. With SCHEDULE = 'swiss' the league plays
+SWISS_ROUNDS rounds instead, each pairing agents with similar scores that have not met yet, for the same number of
+games per pairing.
+
+All games share one process pool. Every agent is first timed on the benchmark positions, and each round hands its
+games to the workers slowest first (longest processing time first), so that a deep agent's games do not start last
+and leave the other workers idle at the end.
+
+Games are streamed to a games file like in competition.py, so an interrupted league resumes where it stopped. The
+games file is named with a hash of all the setups, so a league with a changed setup starts over. The final table is
+printed and saved to results/leagues/.
+"""
+
+import json
+import multiprocessing as mp
+import os
+import time
+from collections import defaultdict
+from copy import deepcopy
+from typing import Dict, List, Set, Tuple
+
+import checkers
+from agents.build_agent import build_agent
+from benchmark import corpus
+from competition import MAX_MOVES, agent_str, play_game, setup_hash, stream_games
+from eval_fns import piece2val, piece2val_favor_kings
+from game_state import _break_ties_by_all_dists
+from headless import HeadlessGame
+from ratings import Results, elo_ratings
+
+LEAGUE_NAME = 'league'
+LEAGUE_AGENTS = [
+    {'agent': 'random'},
+    {'agent': 'minimax', 'depth': 2, 'eval_fn': piece2val},
+    {'agent': 'minimax_ab', 'depth': 3, 'eval_fn': piece2val},
+    {'agent': 'minimax_ab', 'depth': 3, 'eval_fn': piece2val_favor_kings},
+    {'agent': 'minimax_ab_jumps_first', 'depth': 2, 'eval_fn': piece2val, 'tiebreaker_fn': _break_ties_by_all_dists},
+    {'agent': 'minimax_ab_jumps_first', 'depth': 4, 'eval_fn': piece2val},
+]
+SCHEDULE = 'round_robin'  # or 'swiss'
+GAMES_PER_COLOR = 5
+SWISS_ROUNDS = 3
+
+Pairing = Tuple[int, int]  # (red, blue), as indices into the league's setups
+
+
+def move_seconds(setup: Dict) -> float:
+    """
+    The average time the agent takes to pick a move on the benchmark positions, which stands in for the cost of its
+    games.
+    """
+    positions = list(corpus().values())
+    game = HeadlessGame()
+    start = time.perf_counter()
+    for position in positions:
+        game.state = deepcopy(position)
+        build_agent(game=game, color=position.turn, **setup)._get_move()
+    return (time.perf_counter() - start) / len(positions)
+
+
+def round_robin(num_agents: int) -> List[Pairing]:
+    return [(red, blue) for red in range(num_agents) for blue in range(num_agents) if red != blue]
+
+
+def swiss_pairings(points: List[float], met: Set[Pairing]) -> List[Pairing]:
+    """
+    Pairs the agents from the highest score down, each with the next agent it has not met yet (or, if it met them
+    all, the next one), both ways round. With an odd number of agents, the lowest one left sits the round out.
+    """
+    unpaired = sorted(range(len(points)), key=lambda agent: (-points[agent], agent))
+    pairings = []
+    while len(unpaired) > 1:
+        agent = unpaired.pop(0)
+        opponent = next((other for other in unpaired if (agent, other) not in met), unpaired[0])
+        unpaired.remove(opponent)
+        pairings += [(agent, opponent), (opponent, agent)]
+    return pairings
+
+
+def agent_names(setups: List[Dict]) -> List[str]:
+    """
+    The names of the agents in the table and the game ids: their agent_str(), and a hash of the whole setup after it
+    for setups that only differ in what agent_str() leaves out.
+    """
+    names = [agent_str(setup) for setup in setups]
+    return [f'{name}.{setup_hash(setup)}' if names.count(name) > 1 else name for name, setup in zip(names, setups)]
+
+
+def schedule(pairings: List[Pairing], setups: List[Dict], names: List[str], costs: List[float],
+             league_round: int) -> Dict:
+    """
+    The games of a round, as tasks for competition.stream_games, the most expensive first.
+    """
+    tasks = []
+    for red, blue in pairings:
+        for game in range(GAMES_PER_COLOR):
+            game_id = f'{league_round}:{names[red]} vs {names[blue]} #{game}'
+            tasks.append((costs[red] + costs[blue], game_id, red, blue))
+    tasks.sort(key=lambda task: -task[0])
+    return {game_id: ({**setups[red], 'color': checkers.RED}, {**setups[blue], 'color': checkers.BLUE}, names[red],
+                      names[blue])
+            for _, game_id, red, blue in tasks}
+
+
+def play_league_game(game_id: str, red_setup: Dict, blue_setup: Dict, red_name: str, blue_name: str) -> Dict:
+    record = play_game(game_id, red_setup, blue_setup)
+    record.update(red=red_name, blue=blue_name)
+    return record
+
+
+def pairwise_results(games: List[Dict]) -> Results:
+    results = defaultdict(lambda: [0, 0, 0])
+    for game in games:
+        red, blue = game['red'], game['blue']
+        if red > blue:  # one entry per pair of agents, whoever played red
+            red, blue = blue, red
+            outcome = {'red': 2, None: 1, 'blue': 0}[game['winner']]
+        else:
+            outcome = {'red': 0, None: 1, 'blue': 2}[game['winner']]
+        results[(red, blue)][outcome] += 1
+    return {pair: tuple(counts) for pair, counts in results.items()}
+
+
+def standings(games: List[Dict], names: List[str]) -> List[Dict]:
+    """
+    One row per agent, best first: its Elo rating and its wins, draws and losses.
+    """
+    results = pairwise_results(games)
+    ratings = elo_ratings(results)
+    rows = {name: {'agent': name, 'elo': ratings.get(name, 0), 'games': 0, 'wins': 0, 'draws': 0, 'losses': 0}
+            for name in names}
+    for (player, opponent), (wins, draws, losses) in results.items():
+        for name, won, lost in ((player, wins, losses), (opponent, losses, wins)):
+            rows[name]['games'] += wins + draws + losses
+            rows[name]['wins'] += won
+            rows[name]['draws'] += draws
+            rows[name]['losses'] += lost
+    for row in rows.values():
+        row['score'] = (row['wins'] + row['draws'] / 2) / row['games'] if row['games'] else 0
+    return sorted(rows.values(), key=lambda row: -row['elo'])
+
+
+def main():
+    setups = LEAGUE_AGENTS
+    names = agent_names(setups)
+    if len(set(names)) < len(names):
+        raise ValueError('every agent in the league needs a different setup')
+    filename = f'results/leagues/games_{LEAGUE_NAME}_{SCHEDULE}_{setup_hash(*setups)}.jsonl'
+
+    with mp.Pool(processes=mp.cpu_count()) as pool:
+        costs = pool.map(move_seconds, setups)
+        for name, cost in zip(names, costs):
+            print(f'{name}: {cost * 1000:.1f}ms per move')
+
+        games = {}
+        rounds = SWISS_ROUNDS if SCHEDULE == 'swiss' else 1
+        for league_round in range(rounds):
+            if SCHEDULE == 'swiss':
+                table = {row['agent']: row for row in standings(list(games.values()), names)}
+                points = [table[name]['wins'] + table[name]['draws'] / 2 for name in names]
+                met = {(names.index(game['red']), names.index(game['blue'])) for game in games.values()}
+                pairings = swiss_pairings(points, met)
+            else:
+                pairings = round_robin(len(setups))
+            games.update(stream_games(filename, schedule(pairings, setups, names, costs, league_round),
+                                      play=play_league_game, pool=pool))
+
+    table = standings(list(games.values()), names)
+    print(f'{"agent":<72} {"elo":>6} {"games":>6} {"wins":>5} {"draws":>6} {"losses":>7} {"score":>6}')
+    for row in table:
+        print(f'{row["agent"]:<72} {row["elo"]:>6.0f} {row["games"]:>6} {row["wins"]:>5} {row["draws"]:>6} '
+              f'{row["losses"]:>7} {row["score"]:>6.1%}')
+
+    file_contents = {
+        'schedule': SCHEDULE,
+        'games_per_color': GAMES_PER_COLOR,
+        'swiss_rounds': SWISS_ROUNDS if SCHEDULE == 'swiss' else None,
+        'draw_threshold': MAX_MOVES,
+        'agents': setups,
+        'table': table,
+        'results': [{'agent': player, 'opponent': opponent, 'wins': wins, 'draws': draws, 'losses': losses}
+                    for (player, opponent), (wins, draws, losses) in pairwise_results(list(games.values())).items()],
+    }
+    filename = f'results/leagues/{LEAGUE_NAME}_{SCHEDULE}.json'
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, 'w') as fp:
+        json.dump(file_contents, fp, indent=2, default=lambda o: o.__name__)
+
+
+if __name__ == '__main__':
+    main()
@@ -23,6 +23,7 @@ AGENT_RED_SETUP = {
     'color': checkers.RED,
     'depth': 5,
     'eval_fn': piece2val,
+    'opening_book': 'resources/opening_book.json',  # built by build_opening_book.py
 }
 
 
@@ -40,6 +41,9 @@ def main():
                 print('=======================================')
                 nodes_explored = agent.make_move()
                 print(f'Explored {nodes_explored} nodes')
+                if getattr(agent, 'transposition_table', None) is not None:
+                    stats = agent.transposition_table.stats()
+                    print(f'TT hit rate {stats["tt_hit_rate"]:.1%}, cutoff rate {stats["tt_cutoff_rate"]:.1%}')
 
             if game.state.game_over:
                 break
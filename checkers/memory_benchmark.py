@@ -0,0 +1,130 @@
+"""
+memory_benchmark.py
+
+Measures how much memory search takes. Every measurement runs in a fresh process, so that peaks from one run do
+not hide the next:
+- the peak RSS a depth-6 search reaches, above what the process held before searching
+- the peak of Python allocations during the same search, from tracemalloc
+- the bytes per node of a game tree kept in memory, built with Node.next_node() to TREE_DEPTH plies
+Prints the numbers and saves them to results/benchmarks/.
+"""
+
+import json
+import multiprocessing as mp
+import os
+import resource
+import tracemalloc
+from copy import deepcopy
+from typing import Dict, List
+
+import checkers
+from agents.build_agent import build_agent
+from eval_fns import piece2val
+from game_state import Node
+from headless import HeadlessGame
+from scaling_benchmark import benchmark_positions
+
+SEARCH_DEPTH = 6
+SEARCH_SETUPS = {
+    'minimax_ab Board': {'agent': 'minimax_ab', 'board': 'Board'},
+    'minimax_ab BitBoard': {'agent': 'minimax_ab', 'board': 'BitBoard'},
+    'minimax_ab_jumps_first Board': {'agent': 'minimax_ab_jumps_first', 'board': 'Board'},
+    'minimax_ab tt': {'agent': 'minimax_ab', 'board': 'BitBoard', 'tt_size': 2 ** 16},
+}
+NUM_POSITIONS = 2
+TREE_DEPTH = 4
+
+
+def _positions(board: str) -> List[checkers.GameState]:
+    positions = benchmark_positions(NUM_POSITIONS)
+    if board == 'Board':
+        for position in positions:
+            position.board = position.board.to_board()
+    return positions
+
+
+def _peak_rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # kilobytes on Linux
+
+
+def _search(positions: List[checkers.GameState], setup: Dict) -> int:
+    game = HeadlessGame()
+    agent = build_agent(game=game, color=checkers.RED, depth=SEARCH_DEPTH, eval_fn=piece2val, **setup)
+    nodes_explored = 0
+    for position in positions:
+        game.state = deepcopy(position)
+        _, explored = agent._get_move()
+        nodes_explored += explored
+    return nodes_explored
+
+
+def measure_search_rss(setup: Dict) -> Dict:
+    setup = dict(setup)
+    positions = _positions(setup.pop('board'))
+    before = _peak_rss_kb()
+    nodes_explored = _search(positions, setup)
+    return {'peak_rss_kb': _peak_rss_kb(), 'search_rss_kb': _peak_rss_kb() - before, 'nodes_explored': nodes_explored}
+
+
+def measure_search_allocations(setup: Dict) -> Dict:
+    setup = dict(setup)
+    positions = _positions(setup.pop('board'))
+    tracemalloc.start()
+    _search(positions, setup)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'peak_traced_bytes': peak}
+
+
+def measure_tree(board: str) -> Dict:
+    """
+    Keeps every node of the tree below the first position in memory, like a search without make/unmake would.
+    """
+    position = _positions(board)[0]
+    tracemalloc.start()
+    tree = [Node(position)]
+    frontier = tree
+    for _ in range(TREE_DEPTH):
+        frontier = [node.next_node(action) for node in frontier for action in node.next_actions()]
+        tree.extend(frontier)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'nodes': len(tree), 'bytes_per_node': size / len(tree)}
+
+
+def _in_fresh_process(fn, *args) -> Dict:
+    with mp.get_context('spawn').Pool(1) as pool:
+        return pool.apply(fn, args)
+
+
+def main():
+    results = {}
+    for name, setup in SEARCH_SETUPS.items():
+        result = _in_fresh_process(measure_search_rss, setup)
+        result.update(_in_fresh_process(measure_search_allocations, setup))
+        results[name] = result
+        print(f'{name}: peak RSS {result["peak_rss_kb"] / 1024:.1f}MB '
+              f'(+{result["search_rss_kb"] / 1024:.1f}MB while searching), '
+              f'peak traced {result["peak_traced_bytes"] / 1024:.0f}KB, {result["nodes_explored"]} nodes')
+
+    trees = {}
+    for board in ('Board', 'BitBoard'):
+        trees[board] = _in_fresh_process(measure_tree, board)
+        print(f'depth {TREE_DEPTH} tree on {board}: {trees[board]["nodes"]} nodes, '
+              f'{trees[board]["bytes_per_node"]:.0f} bytes per node')
+
+    file_contents = {
+        'search_depth': SEARCH_DEPTH,
+        'num_positions': NUM_POSITIONS,
+        'tree_depth': TREE_DEPTH,
+        'searches': results,
+        'trees': trees,
+    }
+    filename = 'results/benchmarks/memory.json'
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, 'w') as fp:
+        json.dump(file_contents, fp, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+move_ordering.py
+
+Orders the moves of a node for the alpha-beta agents, so that the moves most likely to cause a cutoff are searched
+first. In order:
+1. the hash move: the best move stored in the transposition table for this position, if any
+2. captures, the ones starting the longest chain of hops first
+3. killer moves: quiet moves that caused a cutoff at the same ply elsewhere in the tree
+4. every other move, by its history score: how often and how deep it has caused cutoffs so far
+
+Moves that tie keep the order they came in, so an agent's own ordering (jumps first, random) still breaks ties.
+Killers are forgotten between moves, history is halved.
+"""
+
+from typing import Dict, List, Tuple
+
+from checkers import Action, GameState, Move, PlayerColor
+from game_state import Node
+from transposition_table import TranspositionTable
+
+KILLERS_PER_PLY = 2
+
+##MOVE CLASSES##
+HASH_MOVE = 3
+CAPTURE = 2
+KILLER = 1
+QUIET = 0
+
+
+class MoveOrderer:
+    def __init__(self, transposition_table: TranspositionTable = None):
+        self.transposition_table = transposition_table
+        self.killers: Dict[int, List[Action]] = {}  # ply -> most recent killer first
+        self.history: Dict[Tuple[PlayerColor, Action], int] = {}
+
+    def new_search(self):
+        """
+        Called once per move.
+        """
+        self.killers = {}
+        self.history = {move: score // 2 for move, score in self.history.items() if score > 1}
+
+    def order(self, node: Node, actions: List[Action]) -> List[Action]:
+        hash_move = None
+        if self.transposition_table is not None:
+            hash_move = self.transposition_table.best_action(node.state.zobrist_key)
+        killers = self.killers.get(node.depth, [])
+        turn = node.state.turn
+
+        def sort_key(action: Action) -> Tuple[int, int]:
+            if action == hash_move:
+                return HASH_MOVE, 0
+            if _is_capture(action):
+                return CAPTURE, _capture_chain_length(node.state, action)
+            if action in killers:
+                return KILLER, -killers.index(action)
+            return QUIET, self.history.get((turn, action), 0)
+
+        return sorted(actions, key=sort_key, reverse=True)
+
+    def cutoff(self, node: Node, action: Action, depth_left: int):
+        """
+        Called when action caused a cutoff at node with depth_left plies left to search below it.
+        """
+        if _is_capture(action):
+            return
+
+        killers = self.killers.setdefault(node.depth, [])
+        if action in killers:
+            killers.remove(action)
+        killers.insert(0, action)
+        del killers[KILLERS_PER_PLY:]
+
+        move = (node.state.turn, action)
+        self.history[move] = self.history.get(move, 0) + depth_left * depth_left
+
+
+def _is_capture(action: Action) -> bool:
+    if isinstance(action, Move):
+        return bool(action.captures)
+    return abs(action.to_x - action.from_x) == 2
+
+
+def _capture_chain_length(state: GameState, action: Action) -> int:
+    """
+    The number of pieces the longest chain of hops starting with action captures.
+    """
+    if isinstance(action, Move):
+        return len(action.captures)
+    undo = state.apply_action(action)
+    longest = 0
+    if state.mid_hop:
+        for to_x, to_y in state.board.legal_moves(action.to_x, action.to_y, mid_hop=True):
+            longest = max(longest, _capture_chain_length(state, Action(action.to_x, action.to_y, to_x, to_y)))
+    state.undo_action(undo)
+    return longest + 1
@@ -0,0 +1,70 @@
+"""
+opening_book.py
+
+An opening book: the move a deep search picked for positions from the first few turns of the game, so agents can
+play them without searching.
+
+Positions are keyed by their Zobrist key. Every entry holds the booked move, the value and depth of the search that
+chose it, and how many self-play games reached the position while building the book (see build_opening_book.py).
+Pass the book file to build_agent(opening_book=...) to use it.
+"""
+
+import json
+import os
+from collections import namedtuple
+from typing import Dict, Optional
+
+from checkers import Action, Move
+from game_state import Node
+
+BOOK_FILE = 'resources/opening_book.json'
+BOOK_PLIES = 6  # turns from the start of the game that get booked
+
+BookEntry = namedtuple("BookEntry", "action value depth visits")
+
+
+class OpeningBook:
+    def __init__(self, entries: Dict[int, BookEntry] = None, plies: int = BOOK_PLIES):
+        self.entries = entries if entries is not None else {}
+        self.plies = plies
+
+    @classmethod
+    def load(cls, path: str = BOOK_FILE) -> 'OpeningBook':
+        with open(path) as fp:
+            contents = json.load(fp)
+        entries = {int(key): BookEntry(Action(*action), value, depth, visits)
+                   for key, (action, value, depth, visits) in contents['positions'].items()}
+        return cls(entries, contents['plies'])
+
+    def save(self, path: str = BOOK_FILE, search_setup: Dict = None):
+        contents = {
+            'plies': self.plies,
+            'search': {name: getattr(value, '__name__', value) for name, value in (search_setup or {}).items()},
+            'positions': {str(key): [list(entry.action), entry.value, entry.depth, entry.visits]
+                          for key, entry in self.entries.items()},
+        }
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as fp:
+            json.dump(contents, fp)
+
+    def probe(self, node: Node) -> Optional[Action]:
+        """
+        The booked move for node, as one of node.next_actions(), or None if the position is not in the book.
+        """
+        state = node.state
+        if state.move_count >= self.plies:
+            return None
+        # computed from scratch, the game window edits the board without keeping the key up to date
+        entry = self.entries.get(state.compute_zobrist_key())
+        if entry is None:
+            return None
+
+        matches = [action for action in node.next_actions() if _starts_with(action, entry.action)]
+        # a full jump agent may have several capture paths starting with the booked hop, let it search those
+        return matches[0] if len(matches) == 1 else None
+
+
+def _starts_with(action, booked: Action) -> bool:
+    if isinstance(action, Move):
+        return (action.from_x, action.from_y) == booked[:2] and action.path[0] == booked[2:]
+    return action == booked
@@ -0,0 +1,103 @@
+"""
+perft.py
+
+Counts the positions reached after exactly `depth` plies from a position, walking the tree with Node.next_actions()
+and either Node.next_node() or Node.push()/pop(). Any change to move generation, the boards or make/unmake has to
+leave these counts alone, and the time they take gives one throughput number to follow.
+
+A ply is a single hop, like in the searches, and nothing is counted below a position where the game is over. In the
+middle of a multi-jump only the hopping piece may go on when the state knows which one it is (last_hop_to), the way
+Agent.make_move() plays. With full_jumps every ply is a whole turn instead.
+
+Run this file to count POSITION to every depth up to DEPTH, on Board and BitBoard and both ways of making moves, and
+to split the deepest count by root move when DIVIDE is set. Positions are given as strings, see fen.py.
+"""
+
+import time
+from typing import List, Tuple
+
+from checkers import Action, GameState
+from fen import STARTING_FEN, from_fen
+from game_state import Node
+
+POSITION = STARTING_FEN
+DEPTH = 6
+DIVIDE = True
+FULL_JUMPS = False
+
+
+def perft(node: Node, depth: int, copy: bool = False) -> int:
+    """
+    The number of positions depth plies below node. With copy, children are copies made by next_node(), otherwise
+    they are played on node's own state with push() and taken back with pop().
+    """
+    if depth == 0:
+        return 1
+    if node.state.game_over:
+        return 0
+    actions = node.next_actions()
+    if depth == 1:
+        return len(actions)
+
+    leaves = 0
+    for action in actions:
+        if copy:
+            leaves += perft(_hopping(node.next_node(action)), depth - 1, copy)
+        else:
+            child, undo = node.push(action)
+            leaves += perft(_hopping(child), depth - 1, copy)
+            node.pop(undo)
+    return leaves
+
+
+def divide(node: Node, depth: int, copy: bool = False) -> List[Tuple[Action, int]]:
+    """
+    perft() of every child of node, with the action leading to it.
+    """
+    counts = []
+    for action in node.next_actions():
+        if copy:
+            counts.append((action, perft(_hopping(node.next_node(action)), depth - 1, copy)))
+        else:
+            child, undo = node.push(action)
+            counts.append((action, perft(_hopping(child), depth - 1, copy)))
+            node.pop(undo)
+    return counts
+
+
+def root(state: GameState, full_jumps: bool = False) -> Node:
+    return _hopping(Node(state, full_jumps=full_jumps))
+
+
+def _hopping(node: Node) -> Node:
+    if node.state.mid_hop and node.state.last_hop_to is not None:
+        node.start_from = node.state.last_hop_to
+    return node
+
+
+def main():
+    print(f'{POSITION}, {"turns" if FULL_JUMPS else "hops"} as plies')
+    for depth in range(1, DEPTH + 1):
+        counts = set()
+        for board in ('BitBoard', 'Board'):
+            for copy in (False, True):
+                state = from_fen(POSITION)
+                if board == 'Board':
+                    state.board = state.board.to_board()
+                start = time.perf_counter()
+                leaves = perft(root(state, FULL_JUMPS), depth, copy)
+                seconds = time.perf_counter() - start
+                counts.add(leaves)
+                print(f'depth {depth}, {board} with {"next_node" if copy else "push/pop"}: {leaves} positions in '
+                      f'{seconds:.3f}s ({leaves / seconds if seconds else 0:,.0f}/s)')
+        if len(counts) > 1:
+            print(f'the boards or ways of making moves disagree at depth {depth}: {sorted(counts)}')
+
+    if DIVIDE:
+        print(f'divide at depth {DEPTH}:')
+        for action, leaves in divide(root(from_fen(POSITION), FULL_JUMPS), DEPTH):
+            print(f'  {action}: {leaves}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+position_dataset.py
+
+The positions of recorded games (see game_records.py) as a fixed-width binary file, for tuning the weights of the
+eval functions on millions of positions.
+
+Every position is one POSITION_DTYPE record of 20 bytes: the BitBoard masks of the blue pieces, the red pieces and
+the kings, the number of the game it comes from (in the order it was exported), its ply in that game, the side to
+move (0 for blue, 1 for red, see TURNS), and how the game ended for the side to move: 1 won, 0 drawn, -1 lost.
+Positions in the middle of a multi-jump are left out, as no eval function is asked about those in a search.
+
+load_positions() memory-maps the file like tablebase.py does its tables, so it takes no memory up front whatever its
+size, and every process tuning on the same file shares its pages in the page cache. Slices of it are views of the
+file, and board_arrays() unpacks a batch into the (N, 32) arrays of vectorized_eval_fns, e.g.:
+
+    positions = load_positions(DATASET_FILE)
+    red = positions[positions['turn'] == 1]
+    scores = evaluate_batch(board_arrays(red[:4096]), piece2val_keep_back_row, RED)
+
+Run this file to export every records file under results/ to DATASET_FILE.
+"""
+
+import glob
+import os
+import time
+from typing import Iterable
+
+import numpy as np
+
+from checkers import BLUE, RED
+from game_records import read_games, replay
+from vectorized_eval_fns import board_masks, masks_to_array
+
+RECORDS_FILES = 'results/**/*.games'
+DATASET_FILE = 'results/datasets/positions.bin'
+
+POSITION_DTYPE = np.dtype([('blue', '<u4'), ('red', '<u4'), ('kings', '<u4'), ('game', '<u4'), ('ply', '<u2'),
+                           ('turn', 'u1'), ('result', 'i1')])
+TURNS = (BLUE, RED)  # the colors of the turn field
+
+_RESULTS = {None: 0, 'blue': 1, 'red': -1}  # for blue
+
+
+def export_positions(records_files: Iterable[str], filename: str) -> int:
+    """
+    Writes the positions of every game in records_files to filename, replacing it, and returns how many there were.
+    Each game is written as soon as it is replayed, so the games never have to fit in memory.
+    """
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    count = 0
+    with open(filename, 'wb') as fp:
+        for game, record in enumerate(record for records_file in records_files for record in read_games(records_file)):
+            results = {BLUE: _RESULTS[record.winner], RED: -_RESULTS[record.winner]}
+            positions = [(*board_masks(state.board), game, ply, state.turn == RED, results[state.turn])
+                         for ply, state in enumerate(replay(record.moves)) if not state.mid_hop]
+            np.array(positions, dtype=POSITION_DTYPE).tofile(fp)
+            count += len(positions)
+    return count
+
+
+def load_positions(filename: str) -> np.ndarray:
+    """
+    The positions in filename as a read-only memory-mapped array of POSITION_DTYPE records.
+    """
+    if os.path.getsize(filename) == 0:
+        return np.zeros(0, dtype=POSITION_DTYPE)  # np.memmap cannot map an empty file
+    return np.memmap(filename, dtype=POSITION_DTYPE, mode='r')
+
+
+def board_arrays(positions: np.ndarray) -> np.ndarray:
+    """
+    The boards of some positions as an (N, 32) int8 array, see vectorized_eval_fns.py.
+    """
+    return masks_to_array(np.stack([positions['blue'], positions['red'], positions['kings']], axis=1))
+
+
+def main():
+    records_files = sorted(glob.glob(RECORDS_FILES, recursive=True))
+    start = time.perf_counter()
+    count = export_positions(records_files, DATASET_FILE)
+    positions = load_positions(DATASET_FILE)
+    print(f'{count:,} positions from {len(np.unique(positions["game"])):,} games in {len(records_files)} records '
+          f'files, {time.perf_counter() - start:.1f}s, {os.path.getsize(DATASET_FILE) / 2 ** 20:.1f}MB')
+
+
+if __name__ == '__main__':
+    main()
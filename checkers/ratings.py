@@ -0,0 +1,78 @@
+"""
+ratings.py
+
+Elo ratings from the results of games between many agents, fitted like BayesElo: the ratings are the most likely
+ones under the Bradley-Terry model, where a player rated d Elo above its opponent is expected to score
+expected_score(d), a draw counting as half a win. Every pair of players that met also gets PRIOR_DRAWS virtual
+draws, so that an agent that won or lost all its games still gets a finite rating.
+
+sprt_llr() and sprt_bounds() run a sequential probability ratio test on a match, to stop it as soon as the results
+show which of two Elo differences is the likelier one.
+"""
+
+import math
+from collections import defaultdict
+from typing import Dict, Tuple
+
+PRIOR_DRAWS = 1
+SPRT_PRIOR = 0.5  # virtual games of every outcome in sprt_llr(), so the variance of the score is never 0
+ITERATIONS = 10000
+TOLERANCE = 1e-9
+
+# (player, opponent) -> (player's wins, draws, opponent's wins)
+Results = Dict[Tuple[str, str], Tuple[int, int, int]]
+
+
+def expected_score(elo_difference: float) -> float:
+    return 1 / (1 + 10 ** (-elo_difference / 400))
+
+
+def elo_ratings(results: Results) -> Dict[str, float]:
+    """
+    The rating of every player in results, averaging 0. Found with the minorization-maximization iterations of
+    Hunter (2004), which converge for any results once the prior draws connect the players.
+    """
+    points = defaultdict(float)
+    games = defaultdict(lambda: defaultdict(float))
+    for (player, opponent), (wins, draws, losses) in results.items():
+        played = wins + draws + losses + PRIOR_DRAWS
+        points[player] += wins + (draws + PRIOR_DRAWS) / 2
+        points[opponent] += losses + (draws + PRIOR_DRAWS) / 2
+        games[player][opponent] += played
+        games[opponent][player] += played
+
+    strengths = {player: 1.0 for player in games}
+    for _ in range(ITERATIONS if strengths else 0):
+        updated = {player: points[player] / sum(count / (strengths[player] + strengths[opponent])
+                                                for opponent, count in games[player].items())
+                   for player in strengths}
+        scale = math.exp(sum(math.log(strength) for strength in updated.values()) / len(updated))
+        updated = {player: strength / scale for player, strength in updated.items()}
+        converged = all(abs(updated[player] - strengths[player]) < TOLERANCE * strengths[player]
+                        for player in strengths)
+        strengths = updated
+        if converged:
+            break
+    return {player: 400 * math.log10(strength) for player, strength in strengths.items()}
+
+
+def sprt_llr(wins: float, draws: float, losses: float, elo0: float, elo1: float) -> float:
+    """
+    The log-likelihood ratio of the hypothesis that a player with these results is elo1 stronger than its opponent
+    against the hypothesis that it is elo0 stronger. Uses the generalized SPRT approximation (Van den Bergh), from
+    the mean and variance of the score per game.
+    """
+    wins, draws, losses = wins + SPRT_PRIOR, draws + SPRT_PRIOR, losses + SPRT_PRIOR
+    games = wins + draws + losses
+    mean = (wins + draws / 2) / games
+    variance = (wins * (1 - mean) ** 2 + draws * (0.5 - mean) ** 2 + losses * mean ** 2) / games
+    score0, score1 = expected_score(elo0), expected_score(elo1)
+    return games * (score1 - score0) * (2 * mean - score0 - score1) / (2 * variance)
+
+
+def sprt_bounds(alpha: float, beta: float) -> Tuple[float, float]:
+    """
+    The log-likelihood ratios below which elo0 is accepted, with a chance of beta that elo1 was true, and above which
+    elo1 is accepted, with a chance of alpha that elo0 was true.
+    """
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
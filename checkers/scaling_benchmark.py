@@ -0,0 +1,107 @@
+"""
+scaling_benchmark.py
+
+Times the parallel searches against the serial agent they are built from, on the same positions, for every depth in
+DEPTHS and a growing number of worker processes. Prints the nodes explored and the speedup of each run and saves the
+numbers to results/benchmarks/.
+"""
+
+import json
+import multiprocessing as mp
+import os
+import random
+import time
+from copy import deepcopy
+from typing import Dict, List
+
+import checkers
+from agents.build_agent import build_agent
+from bitboard import BitBoard
+from eval_fns import piece2val
+from game_state import Node
+from headless import HeadlessGame
+
+AGENT_SETUP = {
+    'agent': 'minimax_ab_jumps_first',
+    'eval_fn': piece2val,
+}
+DEPTHS = [4, 5, 6, 7, 8]
+PARALLEL_MODES = ['root', 'pvs']
+NUM_POSITIONS = 8
+OPENING_PLIES = 10  # random plies played to reach each position
+WORKER_COUNTS = sorted({1, 2, 4, 8, mp.cpu_count()})
+
+
+def benchmark_positions(num_positions: int = NUM_POSITIONS, seed: int = 4100) -> List[checkers.GameState]:
+    """
+    Positions reached by short random playouts, with red to move, so that every run searches the same positions.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < num_positions:
+        node = Node(checkers.GameState(board=BitBoard()))
+        for _ in range(OPENING_PLIES):
+            actions = node.next_actions()
+            if node.state.game_over or not actions:
+                break
+            node.push(rng.choice(actions))
+        if not node.state.game_over and not node.state.mid_hop and node.state.turn == checkers.RED:
+            positions.append(node.state)
+    return positions
+
+
+def time_search(positions: List[checkers.GameState], **setup) -> Dict:
+    """
+    Searches every position once and returns the total time and nodes explored.
+    """
+    seconds = 0
+    nodes_explored = 0
+    game = HeadlessGame()
+    agent = build_agent(game=game, color=checkers.RED, **setup)
+    for position in positions:
+        game.state = deepcopy(position)
+        start = time.perf_counter()
+        _, explored = agent._get_move()
+        seconds += time.perf_counter() - start
+        nodes_explored += explored
+
+    if hasattr(agent, 'close'):  # stops the worker processes
+        agent.close()
+    return {'seconds': seconds, 'nodes_explored': nodes_explored}
+
+
+def main():
+    positions = benchmark_positions()
+    print(f'{AGENT_SETUP["agent"]}, {len(positions)} positions, {mp.cpu_count()} cores')
+
+    results = []
+    for depth in DEPTHS:
+        serial = time_search(positions, depth=depth, **AGENT_SETUP)
+        print(f'depth {depth} serial: {serial["seconds"]:.2f}s, {serial["nodes_explored"]} nodes')
+
+        runs = []
+        for parallel in PARALLEL_MODES:
+            for workers in WORKER_COUNTS:
+                run = time_search(positions, depth=depth, parallel=parallel, workers=workers, **AGENT_SETUP)
+                run.update(parallel=parallel, workers=workers, speedup=serial['seconds'] / run['seconds'],
+                           node_ratio=run['nodes_explored'] / serial['nodes_explored'])
+                runs.append(run)
+                print(f'depth {depth} {parallel} with {workers} workers: {run["seconds"]:.2f}s, '
+                      f'{run["nodes_explored"]} nodes ({run["node_ratio"]:.2f}x serial), '
+                      f'speedup {run["speedup"]:.2f}x')
+        results.append({'depth': depth, 'serial': serial, 'parallel_runs': runs})
+
+    file_contents = {
+        'setup': AGENT_SETUP,
+        'num_positions': len(positions),
+        'cpu_count': mp.cpu_count(),
+        'results': results,
+    }
+    filename = f'results/benchmarks/scaling_{AGENT_SETUP["agent"]}.json'
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, 'w') as fp:
+        json.dump(file_contents, fp, indent=2, default=lambda o: o.__name__)
+
+
+if __name__ == '__main__':
+    main()
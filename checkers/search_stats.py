@@ -0,0 +1,126 @@
+"""
+search_stats.py
+
+Where an agent's search time goes. Every agent keeps a SearchStats in agent.stats, counting over all the moves it
+made:
+- the wall time and nodes explored of every make_move()
+- nodes searched at each ply below the root (the root is ply 0), quiescence nodes included
+- positions scored by the eval function, and nodes whose moves were generated
+- beta cutoffs (in run_max) and alpha cutoffs (in run_min), and how many of them the first move searched caused
+- transposition table probes and hits
+
+summary() turns the counters into the numbers competition.py writes to its results, like the effective branching
+factor and the first-move cutoff rate.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+
+class SearchStats:
+    def __init__(self):
+        self.move_seconds: List[float] = []
+        self.move_nodes: List[int] = []
+        self.nodes_by_depth: List[int] = []
+        self.eval_calls = 0
+        self.movegen_calls = 0
+        self.beta_cutoffs = 0
+        self.alpha_cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+
+    def node(self, depth: int, count: int = 1):
+        try:
+            self.nodes_by_depth[depth] += count
+        except IndexError:
+            self.nodes_by_depth += [0] * (depth + 1 - len(self.nodes_by_depth))
+            self.nodes_by_depth[depth] += count
+
+    def cutoff(self, beta: bool, first_move: bool):
+        if beta:
+            self.beta_cutoffs += 1
+        else:
+            self.alpha_cutoffs += 1
+        if first_move:
+            self.first_move_cutoffs += 1
+
+    def end_move(self, seconds: float, nodes_explored: int):
+        self.move_seconds.append(seconds)
+        self.move_nodes.append(nodes_explored)
+
+    def merge(self, other: 'SearchStats'):
+        """
+        Adds the counters of other to these, e.g. those of a worker process that searched part of the tree.
+        """
+        self.move_seconds += other.move_seconds
+        self.move_nodes += other.move_nodes
+        for depth, count in enumerate(other.nodes_by_depth):
+            self.node(depth, count)
+        self.eval_calls += other.eval_calls
+        self.movegen_calls += other.movegen_calls
+        self.beta_cutoffs += other.beta_cutoffs
+        self.alpha_cutoffs += other.alpha_cutoffs
+        self.first_move_cutoffs += other.first_move_cutoffs
+        self.tt_probes += other.tt_probes
+        self.tt_hits += other.tt_hits
+
+    def to_dict(self) -> Dict:
+        """
+        The raw counters, for JSON. from_dict() turns them back into SearchStats, unlike summary().
+        """
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, counters: Dict) -> 'SearchStats':
+        stats = cls()
+        vars(stats).update(counters)
+        return stats
+
+    def branching_by_depth(self) -> List[float]:
+        """
+        Nodes at each ply over nodes at the ply above it.
+        """
+        return [child / parent if parent else 0
+                for parent, child in zip(self.nodes_by_depth, self.nodes_by_depth[1:])]
+
+    def effective_branching_factor(self) -> float:
+        """
+        The geometric mean of branching_by_depth(), the branching factor of a uniform tree as deep as the deepest
+        search with as many nodes at the bottom.
+        """
+        if len(self.nodes_by_depth) < 2 or not self.nodes_by_depth[0]:
+            return 0
+        plies = len(self.nodes_by_depth) - 1
+        return (self.nodes_by_depth[-1] / self.nodes_by_depth[0]) ** (1 / plies)
+
+    def summary(self) -> Dict:
+        moves = len(self.move_seconds)
+        cutoffs = self.beta_cutoffs + self.alpha_cutoffs
+        return {
+            'moves': moves,
+            'total_seconds': sum(self.move_seconds),
+            'avg_move_seconds': sum(self.move_seconds) / moves if moves else 0,
+            'max_move_seconds': max(self.move_seconds, default=0),
+            'nodes': sum(self.move_nodes),
+            'nodes_by_depth': self.nodes_by_depth,
+            'branching_by_depth': self.branching_by_depth(),
+            'effective_branching_factor': self.effective_branching_factor(),
+            'eval_calls': self.eval_calls,
+            'movegen_calls': self.movegen_calls,
+            'beta_cutoffs': self.beta_cutoffs,
+            'alpha_cutoffs': self.alpha_cutoffs,
+            'first_move_cutoff_rate': self.first_move_cutoffs / cutoffs if cutoffs else 0,
+            'tt_probes': self.tt_probes,
+            'tt_hits': self.tt_hits,
+        }
+
+
+def sum_stats(all_stats: Iterable[Optional[SearchStats]]) -> SearchStats:
+    """
+    The counters of several agents (e.g. one per game) added up.
+    """
+    total = SearchStats()
+    for stats in all_stats:
+        if stats is not None:
+            total.merge(stats)
+    return total
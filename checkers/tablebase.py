@@ -0,0 +1,320 @@
+"""
+tablebase.py
+
+Endgame tablebases: the exact outcome of every position with at most a few pieces left, worked out offline by
+retrograde analysis and looked up in constant time during play.
+
+Positions are split by material, the number of blue men, blue kings, red men and red kings on the board. Each
+material is solved into its own file under TABLEBASE_DIR, named after those four counts (e.g. 1011.tb is a blue man
+against a red man and a red king), holding one little-endian int16 per position. The files are memory-mapped the
+first time they are probed. A value is from the point of view of the side to move and counts turns, where a whole
+capture path is one turn:
+- d > 0: the side to move wins, capturing the last opposing piece on its d-th turn from now (counting both sides)
+- d < 0: the side to move loses in -d turns
+- 0: a draw, or a square index no position uses
+
+Only eliminating every opposing piece wins here (see GameState.whoWon), a blocked game is a draw.
+
+Generating is pure Python and grows quickly with the number of pieces: up to 3 pieces takes about a minute,
+every extra piece costs a factor of 20-30 in time. Run this file to build the tables up to MAX_PIECES.
+"""
+
+import os
+import time
+from collections import defaultdict
+from itertools import combinations, product
+from math import comb
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from bitboard import BitBoard, _COORDS, _iter_bits
+from checkers import Action, BLUE, GameState, PlayerColor, RED
+from game_state import Node
+
+TABLEBASE_DIR = 'tablebases'
+MAX_PIECES = 3
+
+DRAW = 0
+
+# Material is (blue men, blue kings, red men, red kings). Men never stand on the row they are crowned on.
+_ALLOWED_SQUARES = (
+    [index for index, (x, y) in enumerate(_COORDS) if y != 0],
+    list(range(32)),
+    [index for index, (x, y) in enumerate(_COORDS) if y != 7],
+    list(range(32)),
+)
+_RANK_OF_SQUARE = [{square: rank for rank, square in enumerate(allowed)} for allowed in _ALLOWED_SQUARES]
+
+Material = Tuple[int, int, int, int]
+
+
+class Tablebase:
+    def __init__(self, directory: str = TABLEBASE_DIR):
+        """
+        Probes the tables found in directory. Positions with more pieces than the largest table are never looked up.
+        """
+        self.directory = directory
+        self.materials = set()
+        if os.path.isdir(directory):
+            for filename in os.listdir(directory):
+                name, extension = os.path.splitext(filename)
+                if extension == '.tb' and len(name) == 4 and name.isdigit():
+                    self.materials.add(tuple(int(count) for count in name))
+        self.max_pieces = max((sum(material) for material in self.materials), default=0)
+        self._tables: Dict[Material, np.ndarray] = {}
+
+    def __getstate__(self):
+        # memory maps are reopened by the process that unpickles the tablebase
+        return self.directory
+
+    def __setstate__(self, directory: str):
+        self.__init__(directory)
+
+    def probe(self, state: GameState) -> Optional[int]:
+        """
+        The value of state for the side to move, or None if the tables do not cover it.
+        """
+        counts = state.board.piece_counts
+        if state.game_over or counts[BLUE] + counts[RED] > self.max_pieces:
+            return None
+        if state.mid_hop:
+            # the hopping piece has to keep going, so this is worth its best way to finish the turn
+            node = Node(state, start_from=state.last_hop_to, full_jumps=True)
+            return _best_value(self._child_values(node))
+
+        board = state.board if isinstance(state.board, BitBoard) else BitBoard.from_board(state.board)
+        material, index = _material_and_index(board.blue, board.red, board.kings, state.turn)
+        if material not in self.materials:
+            return None
+        return int(self._table(material)[index])
+
+    def best_move(self, node: Node) -> Optional[Tuple[Action, int]]:
+        """
+        The action that wins fastest, or draws, or loses slowest, and the number of children probed to find it.
+        None if the tables do not cover every child.
+        """
+        counts = node.state.board.piece_counts
+        if node.state.game_over or counts[BLUE] + counts[RED] > self.max_pieces:
+            return None
+        actions = node.next_actions()
+        values = self._child_values(node, actions)
+        if not actions or None in values:
+            return None
+        best = max(range(len(actions)), key=lambda i: _preference(values[i]))
+        return actions[best], len(actions)
+
+    def score(self, state: GameState, color: PlayerColor, win_value: float) -> Optional[float]:
+        """
+        The search value of state for color: win_value for a win, -win_value for a loss and 0 for a draw.
+        None if the tables do not cover state.
+        """
+        value = self.probe(state)
+        if value is None:
+            return None
+        if value == DRAW:
+            return 0
+        return win_value if (value > 0) == (state.turn == color) else -win_value
+
+    def _child_values(self, node: Node, actions: List[Action] = None) -> List[Optional[int]]:
+        """
+        The value of every child for the side to move at node, None for those the tables do not cover.
+        """
+        turn = node.state.turn  # push() plays on node's own state
+        values = []
+        for action in actions if actions is not None else node.next_actions():
+            child, undo = node.push(action)
+            if child.state.game_over:
+                values.append(1 if child.state.whoWon() == turn else DRAW)
+            else:
+                value = self.probe(child.state)
+                if value is not None and child.state.turn != turn:
+                    value = _parent_value(value)
+                values.append(value)
+            node.pop(undo)
+        return values
+
+    def _table(self, material: Material) -> np.ndarray:
+        if material not in self._tables:
+            self._tables[material] = np.memmap(_table_path(self.directory, material), dtype='<i2', mode='r')
+        return self._tables[material]
+
+
+def _parent_value(child_value: int) -> int:
+    """
+    The value of a move for the side making it, from the value of the position it leads to for the opponent.
+    """
+    if child_value < 0:
+        return -child_value + 1
+    if child_value > 0:
+        return -(child_value + 1)
+    return DRAW
+
+
+def _preference(value: int) -> Tuple[int, int]:
+    # fastest win, then draw, then slowest loss
+    if value > 0:
+        return 2, -value
+    if value == DRAW:
+        return 1, 0
+    return 0, -value
+
+
+def _best_value(values: List[Optional[int]]) -> Optional[int]:
+    if not values or None in values:
+        return None
+    return max(values, key=_preference)
+
+
+def _table_path(directory: str, material: Material) -> str:
+    return os.path.join(directory, ''.join(str(count) for count in material) + '.tb')
+
+
+def _table_size(material: Material) -> int:
+    size = 2  # side to move
+    for count, allowed in zip(material, _ALLOWED_SQUARES):
+        size *= comb(len(allowed), count)
+    return size
+
+
+def _material_and_index(blue: int, red: int, kings: int, turn: PlayerColor) -> Tuple[Material, int]:
+    """
+    Where a position is stored: its material, and its index in that material's table. Every kind of piece is ranked
+    as a set of squares in the combinatorial number system, and the ranks are combined in mixed radix.
+    """
+    masks = (blue & ~kings, blue & kings, red & ~kings, red & kings)
+    material = tuple(bin(mask).count('1') for mask in masks)
+    index = 0
+    for mask, count, ranks in zip(masks, material, _RANK_OF_SQUARE):
+        rank = 0
+        for i, square in enumerate(_iter_bits(mask)):
+            rank += comb(ranks[square], i + 1)
+        index = index * comb(len(ranks), count) + rank
+    return material, index * 2 + (turn == RED)
+
+
+def materials(max_pieces: int) -> List[Material]:
+    """
+    Every material with both sides on the board and at most max_pieces pieces, in an order where anything a move
+    can lead to (a capture, or a man being crowned) comes before it.
+    """
+    found = [material for material in product(range(max_pieces + 1), repeat=4)
+             if sum(material) <= max_pieces and material[0] + material[1] > 0 and material[2] + material[3] > 0]
+    return sorted(found, key=lambda material: (sum(material), material[0] + material[2], material))
+
+
+def _positions(material: Material):
+    """
+    Yields the (blue, red, kings) masks of every way to place the material on the board.
+    """
+    for placement in product(*(combinations(allowed, count) for count, allowed in zip(material, _ALLOWED_SQUARES))):
+        squares = [square for kind in placement for square in kind]
+        if len(set(squares)) < len(squares):
+            continue
+        blue_men, blue_kings, red_men, red_kings = (sum(1 << square for square in kind) for kind in placement)
+        yield blue_men | blue_kings, red_men | red_kings, blue_kings | red_kings
+
+
+def solve(material: Material, tables: Dict[Material, np.ndarray]) -> np.ndarray:
+    """
+    Solves every position of one material, given the solved tables of everything it can lead to.
+
+    Moves that stay within the material are linked backwards, from each position to those that lead to it. Then
+    positions are settled in order of distance: a position is won in d + 1 turns as soon as one child is lost in d,
+    and lost once every child turned out to be won, in one more turn than the slowest of them. Whatever is left
+    never settles and is a draw.
+    """
+    values = np.zeros(_table_size(material), dtype='<i2')
+    predecessors = defaultdict(list)
+    unsettled_children = {}  # index -> children in this material that are not settled yet
+    slowest_loss = {}  # index -> the loss distance if every child is won
+    cannot_lose = set()  # positions with a drawn or won move
+    settled = set()
+    buckets = defaultdict(list)  # distance -> (index, value) to settle at that distance
+
+    for blue, red, kings in _positions(material):
+        for turn in (BLUE, RED):
+            _, index = _material_and_index(blue, red, kings, turn)
+            state = GameState(board=BitBoard(blue=blue, red=red, kings=kings), turn=turn)
+            if state.is_game_over():
+                settled.add(index)  # blocked, a draw
+                continue
+
+            unsettled_children[index] = 0
+            slowest_loss[index] = 0
+            shortest_win = None
+            node = Node(state, full_jumps=True)
+            for move in node.next_actions():
+                child, undo = node.push(move)
+                if child.state.game_over:
+                    value = 1 if child.state.whoWon() == turn else DRAW
+                else:
+                    child_board = child.state.board
+                    child_material, child_index = _material_and_index(child_board.blue, child_board.red,
+                                                                      child_board.kings, child.state.turn)
+                    if child_material == material:
+                        predecessors[child_index].append(index)
+                        unsettled_children[index] += 1
+                        value = None
+                    else:
+                        value = _parent_value(int(tables[child_material][child_index]))
+                node.pop(undo)
+
+                if value is None:
+                    continue
+                if value > 0:
+                    shortest_win = value if shortest_win is None else min(shortest_win, value)
+                elif value < 0:
+                    slowest_loss[index] = max(slowest_loss[index], -value)
+                else:
+                    cannot_lose.add(index)
+
+            if shortest_win is not None:
+                cannot_lose.add(index)
+                buckets[shortest_win].append((index, shortest_win))
+            elif unsettled_children[index] == 0 and index not in cannot_lose:
+                buckets[slowest_loss[index]].append((index, -slowest_loss[index]))
+
+    while buckets:
+        distance = min(buckets)
+        for index, value in buckets.pop(distance):
+            if index in settled:
+                continue
+            settled.add(index)
+            values[index] = value
+            for predecessor in predecessors[index]:
+                if predecessor in settled:
+                    continue
+                if value < 0:
+                    cannot_lose.add(predecessor)
+                    buckets[distance + 1].append((predecessor, distance + 1))
+                    continue
+                unsettled_children[predecessor] -= 1
+                slowest_loss[predecessor] = max(slowest_loss[predecessor], distance + 1)
+                if unsettled_children[predecessor] == 0 and predecessor not in cannot_lose:
+                    buckets[slowest_loss[predecessor]].append((predecessor, -slowest_loss[predecessor]))
+    return values
+
+
+def generate(max_pieces: int = MAX_PIECES, directory: str = TABLEBASE_DIR):
+    """
+    Solves and saves every material with at most max_pieces pieces. Tables already in directory are reused.
+    """
+    os.makedirs(directory, exist_ok=True)
+    tables = {}
+    for material in materials(max_pieces):
+        path = _table_path(directory, material)
+        if os.path.exists(path):
+            tables[material] = np.fromfile(path, dtype='<i2')
+            continue
+        start = time.perf_counter()
+        tables[material] = solve(material, tables)
+        tables[material].tofile(path)
+        values = tables[material]
+        print(f'{os.path.basename(path)}: {len(values)} entries, {(values > 0).sum()} wins, '
+              f'{(values < 0).sum()} losses, longest {np.abs(values).max()} turns, '
+              f'{time.perf_counter() - start:.1f}s')
+
+
+if __name__ == '__main__':
+    generate()
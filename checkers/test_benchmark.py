@@ -0,0 +1,33 @@
+from unittest import TestCase
+
+from benchmark import compare, corpus
+from checkers import Move
+from game_state import Node
+
+
+class TestBenchmark(TestCase):
+    def test_corpus(self):
+        positions = corpus()
+        for state in positions.values():
+            self.assertFalse(state.is_game_over())
+            self.assertFalse(state.mid_hop)
+        moves = Node(positions['multi_jump'], full_jumps=True).next_actions()
+        self.assertEqual(len([move for move in moves if isinstance(move, Move) and len(move.captures) == 2]), 2)
+        self.assertTrue(any(piece.king for piece in _pieces(positions['king_endgame'])))
+
+    def test_compare_flags_slowdowns_and_changed_node_counts(self):
+        baseline = {'next_actions/opening': {'seconds': 1e-5},
+                    'search/minimax_ab/opening': {'seconds': 0.1, 'nodes': 2783},
+                    'search/minimax/opening': {'seconds': 0.1, 'nodes': 3307}}
+        results = {'next_actions/opening': {'seconds': 1.1e-5},
+                   'search/minimax_ab/opening': {'seconds': 0.2, 'nodes': 2783},
+                   'search/minimax/opening': {'seconds': 0.1, 'nodes': 3300},
+                   'next_node/opening': {'seconds': 1.0}}
+        regressions = compare(results, baseline, threshold=0.15)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith('search/minimax_ab/opening: 200.0ms'))
+        self.assertTrue(regressions[1].startswith('search/minimax/opening: explored 3300 nodes'))
+
+
+def _pieces(state):
+    return [state.board.piece_at(x, y) for x in range(8) for y in range(8) if state.board.piece_at(x, y) is not None]
@@ -0,0 +1,90 @@
+import random
+from copy import deepcopy
+from unittest import TestCase
+
+from bitboard import BitBoard, from_position, to_position
+from checkers import BLUE, Board, GameState, RED
+from game_state import Node
+from test_game_state import double_jump_board_plus_ones
+
+
+class TestBitBoard(TestCase):
+    def test_new_board_matches_board(self):
+        board, bitboard = Board(), BitBoard()
+        for color in (BLUE, RED):
+            self.assertEqual(board.get_locations_by_color(color), bitboard.get_locations_by_color(color))
+            self.assertEqual(bitboard.get_king_locations(color), [])
+
+    def test_legal_moves_match_board(self):
+        for state in random_positions(games=10, max_plies=80):
+            board = state.board
+            bitboard = BitBoard.from_board(board)
+            for x in range(8):
+                for y in range(8):
+                    if (x + y) % 2 == 0:
+                        self.assertEqual(board.legal_moves(x, y), bitboard.legal_moves(x, y))
+                        self.assertEqual(board.legal_moves(x, y, mid_hop=True),
+                                         bitboard.legal_moves(x, y, mid_hop=True))
+            for color in (BLUE, RED):
+                self.assertEqual(board.legal_moves_by_color(color), bitboard.legal_moves_by_color(color))
+                self.assertEqual(board.get_king_locations(color), bitboard.get_king_locations(color))
+
+    def test_playout_matches_board(self):
+        random.seed(4100)
+        node = Node(GameState(board=Board()))
+        bit_node = Node(GameState(board=BitBoard()))
+        while not node.state.game_over and node.state.move_count < 150:
+            actions = node.next_actions()
+            self.assertEqual(actions, bit_node.next_actions())
+            action = random.choice(actions)
+            node, bit_node = node.next_node(action), bit_node.next_node(action)
+            for color in (BLUE, RED):
+                self.assertEqual(node.state.board.get_locations_by_color(color),
+                                 bit_node.state.board.get_locations_by_color(color))
+                self.assertEqual(node.state.board.get_king_locations(color),
+                                 bit_node.state.board.get_king_locations(color))
+            self.assertEqual(node.state.game_over, bit_node.state.game_over)
+            self.assertEqual(node.state.whoWon(), bit_node.state.whoWon())
+
+    def test_double_jump(self):
+        node = Node(GameState(board=BitBoard.from_board(double_jump_board_plus_ones()), turn=RED))
+        node = node.next_node(node.next_actions()[0])
+        self.assertTrue(node.state.mid_hop)
+        self.assertEqual(node.state.board.legal_moves(2, 2, mid_hop=True), [(4, 4)])
+
+    def test_king(self):
+        bitboard = BitBoard.from_board(double_jump_board_plus_ones())
+        bitboard.move_piece(0, 6, 1, 7)
+        self.assertEqual(bitboard.get_king_locations(RED), [(1, 7)])
+        self.assertTrue(bitboard.location(1, 7).occupant.king)
+        self.assertEqual(bitboard.legal_moves(1, 7), [(0, 6), (2, 6)])
+
+    def test_to_board(self):
+        bitboard = BitBoard.from_board(double_jump_board_plus_ones())
+        board = bitboard.to_board()
+        for color in (BLUE, RED):
+            self.assertEqual(board.get_locations_by_color(color), bitboard.get_locations_by_color(color))
+
+    def test_position_round_trip(self):
+        positions = {}
+        for state in random_positions(games=5, max_plies=80):
+            position = to_position(state)
+            self.assertEqual(to_position(from_position(position)), position)
+            self.assertEqual(from_position(position).zobrist_key, state.compute_zobrist_key())
+            self.assertEqual(from_position(position).game_over, state.game_over)
+            positions.setdefault(position, state.compute_zobrist_key())
+            self.assertEqual(positions[position], state.compute_zobrist_key())
+
+
+def random_positions(games: int, max_plies: int, seed: int = 4100):
+    random.seed(seed)
+    positions = []
+    for _ in range(games):
+        node = Node(GameState(board=Board()))
+        for _ in range(max_plies):
+            actions = node.next_actions()
+            if node.state.game_over or not actions:
+                break
+            positions.append(deepcopy(node.state))
+            node = node.next_node(random.choice(actions))
+    return positions
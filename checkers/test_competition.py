@@ -0,0 +1,101 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from competition import games_filename, in_order, load_games, records_filename, sprt_result, stream_games, summarize
+from eval_fns import piece2val
+from game_records import GameRecord, read_games
+
+
+class TestCompetition(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, 'games.jsonl')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_resumes_from_a_partial_file(self):
+        with open(self.filename, 'w') as fp:
+            fp.write(json.dumps(fake_game(0)) + '\n')
+            fp.write(json.dumps({'game': 1, 'error': 'Traceback ...'}) + '\n')
+            fp.write(json.dumps(fake_game(2))[:20])  # cut short by an interrupted run
+        self.assertEqual(list(load_games(self.filename)), [0])
+
+        games = stream_games(self.filename, {x: () for x in range(4)}, play=fake_game)
+        self.assertEqual(sorted(games), [0, 1, 2, 3])
+        self.assertEqual(sorted(load_games(self.filename)), [0, 1, 2, 3])
+        with open(self.filename) as fp:
+            self.assertEqual(sum(line.startswith('{"game": 0') for line in fp), 1)  # not played again
+
+        stream_games(self.filename, {x: () for x in range(5)}, play=fake_game)
+        with open(self.filename) as fp:
+            self.assertNotIn('\n\n', fp.read())  # resuming ends the cut line, it adds no blank ones
+
+    def test_records_the_moves_after_the_result(self):
+        stream_games(self.filename, {x: () for x in range(3)}, play=recorded_game)
+        self.assertEqual([record.game for record in read_games(records_filename(self.filename))], [0, 1, 2])
+        self.assertEqual(sorted(load_games(self.filename)), [0, 1, 2])
+        with open(self.filename) as fp:
+            self.assertNotIn('game_record', fp.read())
+
+    def test_sprt_stops_a_one_sided_match(self):
+        sprt = {'elo0': 0, 'elo1': 50, 'alpha': 0.05, 'beta': 0.05}
+        games = stream_games(self.filename, {x: () for x in range(50)}, play=red_wins,
+                             stop=lambda finished: sprt_result(finished.values(), sprt)['accepted'] is not None)
+        self.assertLess(len(games), 50)
+        self.assertEqual(sprt_result(games.values(), sprt)['accepted'], 'elo1')
+        self.assertIsNone(sprt_result([fake_game(x) for x in range(4)], sprt)['accepted'])
+
+        draws = [{'winner': None}] * 40
+        self.assertEqual(sprt_result(draws, sprt)['accepted'], 'elo0')
+
+    def test_games_file_depends_on_the_whole_setup(self):
+        red = {'agent': 'minimax_ab', 'depth': 2, 'eval_fn': piece2val}
+        blue = {**red, 'quiescence': True, 'tt_size': 2 ** 16, 'move_ordering': True, 'parallel': 'root'}
+        self.assertNotEqual(games_filename(red, red), games_filename(red, blue))
+        self.assertNotEqual(games_filename(red, blue), games_filename(blue, red))
+        self.assertEqual(games_filename(red, blue), games_filename(dict(red), dict(reversed(blue.items()))))
+
+    def test_sprt_only_counts_the_games_in_order(self):
+        sprt = {'elo0': 0, 'elo1': 50, 'alpha': 0.05, 'beta': 0.05}
+        games = stream_games(
+            self.filename, {x: () for x in range(50)}, play=fake_game, pool=DecisiveFirstPool(),
+            stop=lambda finished: sprt_result(in_order(finished.values()), sprt)['accepted'] is not None)
+        # the 25 red wins that finish first would stop the match on their own, they must not before the draws count
+        self.assertEqual(sprt_result([red_wins(x) for x in range(25)], sprt)['accepted'], 'elo1')
+        self.assertGreater(len(games), 25)
+        finished = in_order(games.values())
+        self.assertEqual([game['game'] for game in finished], list(range(len(finished))))
+        self.assertIsNone(sprt_result(finished[:-1], sprt)['accepted'])
+
+    def test_summary(self):
+        games = [fake_game(x) for x in range(4)]
+        summary = summarize(games, {'agent': 'minimax'}, {'agent': 'random'})
+        self.assertEqual((summary['red_wins'], summary['blue_wins'], summary['draws']), (2, 0, 2))
+        self.assertEqual(summary['avg_blue_explored_nodes'], [10, 30])
+        self.assertEqual(summary['avg_red_explored_nodes'], [20])
+        self.assertEqual(summary['red_search_stats']['moves'], 0)
+        self.assertIsNone(summary['red_tt_stats'])
+
+
+def fake_game(x):
+    return {'game': x, 'winner': 'red' if x % 2 else None, 'nodes_explored': [10, 20, 30],
+            'tt_stats': {'red': None, 'blue': None}, 'search_stats': {'red': {}, 'blue': {}}, 'seconds': 0.1}
+
+
+def red_wins(x):
+    return {**fake_game(x), 'winner': 'red'}
+
+
+def recorded_game(x):
+    return {**fake_game(x), 'game_record': GameRecord(game=x, red={}, blue={}, seed=0, winner=None, moves=b'')}
+
+
+class DecisiveFirstPool:
+    """
+    Finishes the decisive games before the draws, as short games finish before those that run to MAX_MOVES.
+    """
+    def imap_unordered(self, fn, tasks):
+        return sorted((fn(task) for task in tasks), key=lambda game: game['winner'] is None)
@@ -0,0 +1,52 @@
+import os
+import random
+import tempfile
+from unittest import TestCase
+
+from agents.build_agent import build_agent
+from checkers import BLUE, RED
+from fen import to_fen
+from game_records import GameRecord, GameRecordWriter, encode_moves, read_games, replay
+from headless import HeadlessGame
+
+
+class TestGameRecords(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, 'games.games')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_replays_the_game(self):
+        for full_jumps in (False, True):
+            random.seed(4100)
+            game = HeadlessGame()
+            agent_blue = build_agent(game=game, agent='random', color=BLUE, full_jumps=full_jumps)
+            agent_red = build_agent(game=game, agent='random', color=RED, full_jumps=full_jumps)
+            game.play(agent_blue=agent_blue, agent_red=agent_red, max_moves=150)
+
+            moves = encode_moves(game.moves + [None])
+            self.assertGreaterEqual(len(moves), len(game.moves))
+            *_, before_pass, after_pass = (to_fen(state) for state in replay(moves))
+            game.state.end_turn()
+            self.assertEqual(after_pass, to_fen(game.state))
+            self.assertNotEqual(before_pass, after_pass)
+
+    def test_write_and_read(self):
+        setup = {'agent': 'random'}
+        with GameRecordWriter(self.filename) as writer:
+            writer.write(GameRecord(game=0, red=setup, blue=setup, seed=7, winner='red', moves=b'\x01\x02'))
+            writer.write(GameRecord(game=0, red=setup, blue=setup, seed=7, winner='red', moves=b'\x01\x02'))
+            writer.write(GameRecord(game='1', red=setup, blue={'agent': 'minimax'}, seed=8, winner=None, moves=b''))
+        with open(self.filename, 'ab') as fp:
+            fp.write(b'G\xff\x00')  # cut short by an interrupted run
+
+        games = list(read_games(self.filename))
+        self.assertEqual(games, [GameRecord(0, setup, setup, 7, 'red', b'\x01\x02'),
+                                 GameRecord('1', setup, {'agent': 'minimax'}, 8, None, b'')])
+
+        with GameRecordWriter(self.filename) as writer:
+            writer.write(GameRecord(game=0, red=setup, blue=setup, seed=7, winner='red', moves=b'\x01\x02'))
+            writer.write(GameRecord(game=2, red=setup, blue=setup, seed=9, winner='blue', moves=b'\x03'))
+        self.assertEqual([game.game for game in read_games(self.filename)], [0, '1', 2])  # the cut record is gone
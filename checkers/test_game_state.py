@@ -1,6 +1,8 @@
+import random
 from unittest import TestCase
 
-from checkers import BLUE, Board, GameState, Piece, RED, Action
+from bitboard import BitBoard
+from checkers import BLUE, Board, GameState, Piece, RED, Action, Move
 from game_state import Node
 
 
@@ -66,6 +68,96 @@ class TestNode(TestCase):
         self.assertEqual(set(node.next_actions()), {Action(from_x=5, from_y=3, to_x=4, to_y=2),
                                                     Action(from_x=5, from_y=3, to_x=6, to_y=2)})
 
+    def test_full_jumps_double_jump(self):
+        node = Node(GameState(board=double_jump_board_plus_ones(), turn=RED), full_jumps=True)
+        double_jump = Move(from_x=0, from_y=0, to_x=4, to_y=4, path=((2, 2), (4, 4)), captures=((1, 1), (3, 3)))
+        self.assertEqual(set(node.next_actions()), {double_jump, Move(0, 6, 1, 7, ((1, 7),), ())})
+
+        before = snapshot(node.state)
+        child, undo = node.push(double_jump)
+        self.assertFalse(child.state.mid_hop)
+        self.assertEqual(child.state.turn, BLUE)
+        self.assertEqual(child.state.move_count, 1)
+        self.assertIsNone(child.state.board.piece_at(3, 3))
+        self.assertEqual(child.next_actions(), [Move(5, 3, 4, 2, ((4, 2),), ()), Move(5, 3, 6, 2, ((6, 2),), ())])
+        after = snapshot(child.state)
+        node.pop(undo)
+        self.assertEqual(snapshot(node.state), before)
+        self.assertEqual(snapshot(node.next_node(double_jump).state), after)
+
+
+class TestGameState(TestCase):
+    def test_apply_and_undo_double_jump(self):
+        for board in (double_jump_board_plus_ones(), BitBoard.from_board(double_jump_board_plus_ones())):
+            state = GameState(board=board, turn=RED)
+            before = snapshot(state)
+
+            first = state.apply_action(Action(from_x=0, from_y=0, to_x=2, to_y=2))
+            self.assertTrue(state.mid_hop)
+            self.assertIsNone(state.board.piece_at(1, 1))
+            second = state.apply_action(Action(from_x=2, from_y=2, to_x=4, to_y=4))
+            self.assertEqual(state.turn, BLUE)
+            self.assertEqual(state.move_count, 1)
+
+            state.undo_action(second)
+            state.undo_action(first)
+            self.assertEqual(snapshot(state), before)
+
+    def test_apply_and_undo_crowning(self):
+        state = GameState(board=double_jump_board_plus_ones(), turn=RED)
+        before = snapshot(state)
+        undo = state.apply_action(Action(from_x=0, from_y=6, to_x=1, to_y=7))
+        self.assertTrue(undo.crowned)
+        self.assertTrue(state.board.piece_at(1, 7).king)
+
+        state.undo_action(undo)
+        self.assertEqual(snapshot(state), before)
+        self.assertFalse(state.board.piece_at(0, 6).king)
+
+    def test_push_and_pop_match_next_node(self):
+        random.seed(4100)
+        for board in (Board(), BitBoard()):
+            node = Node(GameState(board=board))
+            while not node.state.game_over and node.state.move_count < 100:
+                before = snapshot(node.state)
+                for action in node.next_actions():
+                    expected = snapshot(node.next_node(action).state)
+                    child, undo = node.push(action)
+                    self.assertEqual(snapshot(child.state), expected)
+                    self.assertEqual(child.state.zobrist_key, child.state.compute_zobrist_key())
+                    node.pop(undo)
+                    self.assertEqual(snapshot(node.state), before)
+                    self.assertEqual(node.state.zobrist_key, node.state.compute_zobrist_key())
+                node, _ = node.push(random.choice(node.next_actions()))
+
+    def test_piece_counts_and_has_legal_move_track_the_board(self):
+        random.seed(4100)
+        for board in (Board(), BitBoard()):
+            node = Node(GameState(board=board))
+            undos = []
+            while not node.state.game_over and node.state.move_count < 100:
+                node, undo = node.push(random.choice(node.next_actions()))
+                undos.append(undo)
+                for color in (BLUE, RED):
+                    self.assertEqual(node.state.board.piece_counts[color],
+                                     len(node.state.board.get_locations_by_color(color)))
+                    self.assertEqual(node.state.board.has_legal_move(color),
+                                     bool(node.state.board.legal_moves_by_color(color)))
+            for undo in reversed(undos):
+                node.pop(undo)
+            self.assertEqual(node.state.board.piece_counts, {BLUE: 12, RED: 12})
+
+    def test_piece_counts_after_editing_matrix(self):
+        state = GameState(board=double_jump_board(), turn=RED)
+        self.assertEqual(state.board.piece_counts, {BLUE: 2, RED: 1})
+        self.assertEqual(BitBoard.from_board(state.board).to_board().piece_counts, {BLUE: 2, RED: 1})
+
+
+def snapshot(state: GameState):
+    pieces = tuple((tuple(state.board.get_locations_by_color(color)), tuple(state.board.get_king_locations(color)))
+                   for color in (BLUE, RED))
+    return pieces, state.turn, state.mid_hop, state.last_hop_to, state.move_count, state.game_over
+
 
 def double_jump_board() -> Board:
     # RED can double jump from (0,0) => (2,2) => (4,4)
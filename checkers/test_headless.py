@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+from agents.build_agent import build_agent
+from checkers import BLUE, RED
+from eval_fns import piece2val
+from headless import HeadlessGame
+
+
+class TestHeadlessGame(TestCase):
+    def test_play(self):
+        game = HeadlessGame()
+        agent_blue = build_agent(game=game, agent='minimax_ab', color=BLUE, depth=2, eval_fn=piece2val)
+        agent_red = build_agent(game=game, agent='random', color=RED)
+
+        who_won, nodes_explored_counts = game.play(agent_blue=agent_blue, agent_red=agent_red, max_moves=150)
+
+        self.assertIn(who_won, (BLUE, RED, None))
+        self.assertTrue(game.state.game_over or game.state.move_count == 150)
+        self.assertEqual(len(nodes_explored_counts), game.state.move_count)
+
+    def test_play_full_jumps(self):
+        game = HeadlessGame()
+        agent_blue = build_agent(game=game, agent='minimax_ab', color=BLUE, depth=2, eval_fn=piece2val,
+                                 full_jumps=True)
+        agent_red = build_agent(game=game, agent='random', color=RED, full_jumps=True)
+
+        game.play(agent_blue=agent_blue, agent_red=agent_red, max_moves=150)
+
+        self.assertTrue(game.state.game_over or game.state.move_count == 150)
+        self.assertFalse(game.state.mid_hop)
+
+    def test_does_not_import_pygame(self):
+        code = "import sys, competition; assert 'pygame' not in sys.modules"
+        subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
@@ -0,0 +1,59 @@
+import random
+from unittest import TestCase
+
+from agents.build_agent import build_agent
+from agents.iterative_deepening_agent import IterativeDeepeningAgent, SearchTimeout
+from checkers import BLUE, RED
+from eval_fns import piece2val
+from fen import from_fen
+from game_state import Node
+from headless import HeadlessGame
+
+
+class TimesOutInDepth3(IterativeDeepeningAgent):
+    """
+    Runs out of time half way through the depth 3 search, whatever the clock says.
+    """
+    def minimax(self, starting_state, depth=10, alpha=float('-inf'), beta=float('inf')):
+        if self.depth_limit == 3 and starting_state.depth == 2:
+            raise SearchTimeout()
+        return super().minimax(starting_state, depth, alpha, beta)
+
+
+class TestIterativeDeepening(TestCase):
+    def test_needs_a_time_budget(self):
+        for time_budget_ms in (None, 0):
+            with self.assertRaises(ValueError):
+                build_agent(game=HeadlessGame(), agent='minimax_ab_iterative_deepening', color=BLUE,
+                            eval_fn=piece2val, time_budget_ms=time_budget_ms)
+
+    def test_plays_the_deepest_finished_search_when_time_runs_out(self):
+        game = HeadlessGame()
+        agent = build_agent(game=game, agent='minimax_ab_iterative_deepening', color=BLUE, eval_fn=piece2val,
+                            time_budget_ms=1)
+        self.assertIn(agent._get_move()[0], Node(game.state).next_actions())
+
+        random.seed(4100)
+        timed_out = TimesOutInDepth3(color=BLUE, game=game, time_budget_ms=60000, eval_fn=piece2val)
+        move, _ = timed_out._get_move()
+        self.assertEqual(timed_out.depth_limit, 3)
+        random.seed(4100)
+        depth_2 = IterativeDeepeningAgent(color=BLUE, game=game, time_budget_ms=60000, depth=2, eval_fn=piece2val)
+        self.assertEqual(move, depth_2._get_move()[0])
+
+    def test_stops_at_the_depth_cap(self):
+        game = HeadlessGame()
+        agent = build_agent(game=game, agent='minimax_ab_iterative_deepening', color=BLUE, depth=2,
+                            eval_fn=piece2val, time_budget_ms=60000)
+        agent.make_move()
+        self.assertEqual(agent.depth_limit, 2)
+        self.assertEqual(len(agent.stats.nodes_by_depth), 3)  # the root and two plies below it
+
+    def test_same_move_as_alpha_beta(self):
+        # capturing is red's only best move, so the random tie breaks cannot tell the agents apart
+        fen = 'R:B14,21,30:R1,3,10'
+        deepening_game, alpha_beta_game = HeadlessGame(from_fen(fen)), HeadlessGame(from_fen(fen))
+        deepening = build_agent(game=deepening_game, agent='minimax_ab_iterative_deepening', color=RED, depth=3,
+                                eval_fn=piece2val, time_budget_ms=60000)
+        alpha_beta = build_agent(game=alpha_beta_game, agent='minimax_ab', color=RED, depth=3, eval_fn=piece2val)
+        self.assertEqual(deepening._get_move()[0], alpha_beta._get_move()[0])
@@ -0,0 +1,40 @@
+from unittest import TestCase
+
+from competition import agent_str
+from eval_fns import piece2val
+from league import agent_names, pairwise_results, schedule, standings, swiss_pairings
+from ratings import elo_ratings
+
+
+class TestLeague(TestCase):
+    def test_elo_follows_the_score(self):
+        ratings = elo_ratings({('a', 'b'): (3, 0, 1)})
+        self.assertAlmostEqual(ratings['a'] + ratings['b'], 0)
+        # 3.5 points to 1.5 with the prior draw
+        self.assertAlmostEqual(10 ** ((ratings['a'] - ratings['b']) / 400), 3.5 / 1.5)
+
+    def test_standings(self):
+        games = [{'red': 'a', 'blue': 'b', 'winner': 'red'}, {'red': 'b', 'blue': 'a', 'winner': 'blue'},
+                 {'red': 'b', 'blue': 'c', 'winner': None}, {'red': 'c', 'blue': 'a', 'winner': 'blue'}]
+        self.assertEqual(pairwise_results(games), {('a', 'b'): (2, 0, 0), ('b', 'c'): (0, 1, 0), ('a', 'c'): (1, 0, 0)})
+        table = standings(games, ['a', 'b', 'c', 'd'])
+        self.assertEqual(table[0]['agent'], 'a')
+        self.assertEqual((table[0]['wins'], table[0]['draws'], table[0]['losses']), (3, 0, 0))
+        self.assertEqual(next(row for row in table if row['agent'] == 'd')['games'], 0)
+
+    def test_swiss_pairs_agents_that_have_not_met(self):
+        pairings = swiss_pairings([3, 2, 2, 0, 1], met={(0, 1), (1, 0)})
+        self.assertEqual(pairings, [(0, 2), (2, 0), (1, 4), (4, 1)])  # agent 3 sits out
+
+    def test_slowest_games_go_first(self):
+        setups = [{'agent': 'random'}, {'agent': 'minimax', 'depth': 1}, {'agent': 'minimax_ab', 'depth': 6}]
+        tasks = schedule([(0, 1), (1, 2), (2, 0)], setups, agent_names(setups), costs=[0.001, 0.01, 1],
+                         league_round=0)
+        self.assertEqual([(red['agent'], blue['agent']) for red, blue, *_ in tasks.values()][::5],
+                         [('minimax', 'minimax_ab'), ('minimax_ab', 'random'), ('random', 'minimax')])
+
+    def test_setups_that_differ_in_search_options_get_different_names(self):
+        setup = {'agent': 'minimax_ab', 'depth': 3, 'eval_fn': piece2val}
+        names = agent_names([setup, {**setup, 'quiescence': True}, {'agent': 'random'}])
+        self.assertEqual(len(set(names)), 3)
+        self.assertEqual(names[2], agent_str({'agent': 'random'}))  # the hash only tells apart those that need it
@@ -0,0 +1,65 @@
+import random
+from copy import deepcopy
+from unittest import TestCase
+
+from agents.build_agent import build_agent
+from checkers import Action, BLUE, Board, GameState, RED
+from eval_fns import piece2val
+from game_state import Node
+from headless import HeadlessGame
+from move_ordering import MoveOrderer
+from scaling_benchmark import benchmark_positions
+from test_game_state import double_jump_board_plus_ones
+from transposition_table import EXACT, TranspositionTable
+
+
+class TestMoveOrderer(TestCase):
+    def test_captures_first(self):
+        node = Node(GameState(board=double_jump_board_plus_ones(), turn=RED))
+        quiet, capture = Action(0, 6, 1, 7), Action(0, 0, 2, 2)
+        self.assertEqual(MoveOrderer().order(node, [quiet, capture]), [capture, quiet])
+
+    def test_hash_move_first(self):
+        table = TranspositionTable()
+        node = Node(GameState(board=Board(), turn=BLUE))
+        actions = node.next_actions()
+        table.store(node.state.zobrist_key, 1, float('-inf'), float('inf'), 0, actions[-1])
+        self.assertEqual(table.entries[node.state.zobrist_key % table.size].flag, EXACT)
+        self.assertEqual(MoveOrderer(table).order(node, actions)[0], actions[-1])
+
+    def test_killers_then_history(self):
+        orderer = MoveOrderer()
+        node = Node(GameState(board=Board(), turn=BLUE))
+        actions = node.next_actions()
+        orderer.cutoff(node, actions[3], depth_left=3)
+        orderer.cutoff(node, actions[5], depth_left=2)
+        self.assertEqual(orderer.order(node, actions)[:2], [actions[5], actions[3]])
+
+        # killers are forgotten between moves, history is kept
+        orderer.new_search()
+        self.assertEqual(orderer.order(node, actions)[:2], [actions[3], actions[5]])
+
+    def test_same_value_as_without_ordering(self):
+        game = HeadlessGame()
+        ordered = build_agent(game=game, agent='minimax_ab', color=RED, depth=4, eval_fn=piece2val,
+                              move_ordering=True)
+        unordered = build_agent(game=game, agent='minimax_ab', color=RED, depth=4, eval_fn=piece2val)
+        for position in benchmark_positions(num_positions=4):
+            random.seed(4100)
+            value, _, _ = unordered.minimax(Node(deepcopy(position)), depth=4)
+            ordered_value, _, _ = ordered.minimax(Node(deepcopy(position)), depth=4)
+            self.assertEqual(ordered_value, value)
+
+    def test_every_agent_starts_a_new_search_per_move(self):
+        game = HeadlessGame()
+        agent = build_agent(game=game, agent='minimax_ab_jumps_first_variable_depth', color=BLUE, depth=2,
+                            eval_fn=piece2val, tt_size=1024, move_ordering=True)
+        killer = Action(0, 0, 1, 1)
+        agent.move_orderer.killers = {5: [killer]}
+        agent.move_orderer.history = {(RED, killer): 8}
+
+        agent.make_move()
+
+        self.assertEqual(agent.transposition_table.generation, 1)
+        self.assertNotIn(killer, [move for killers in agent.move_orderer.killers.values() for move in killers])
+        self.assertEqual(agent.move_orderer.history[(RED, killer)], 4)  # aged, not forgotten
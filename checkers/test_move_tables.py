@@ -0,0 +1,23 @@
+from unittest import TestCase
+
+from benchmark import reference_blind_legal_moves, reference_legal_moves
+from checkers import Board, DARK_SQUARES
+from test_bitboard import random_positions
+
+
+class TestMoveTables(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.boards = [state.board for state in random_positions(games=10, max_plies=120)]
+
+    def test_legal_moves_match_reference(self):
+        for board in self.boards:
+            for x, y in DARK_SQUARES:
+                for mid_hop in (False, True):
+                    self.assertEqual(board.legal_moves(x, y, mid_hop), reference_legal_moves(board, x, y, mid_hop))
+                self.assertEqual(board.blind_legal_moves(x, y), reference_blind_legal_moves(board, x, y))
+
+    def test_adjacent(self):
+        board = Board()
+        self.assertEqual(board.adjacent(0, 0), [(-1, -1), (1, -1), (-1, 1), (1, 1)])
+        self.assertEqual(board.adjacent(-1, 3), [(-2, 2), (0, 2), (-2, 4), (0, 4)])
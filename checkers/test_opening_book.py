@@ -0,0 +1,43 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from agents.build_agent import build_agent
+from checkers import Action, BLUE, GameState
+from eval_fns import piece2val
+from headless import HeadlessGame
+from opening_book import BookEntry, OpeningBook
+
+OPENING_MOVE = Action(from_x=5, from_y=5, to_x=4, to_y=4)
+
+
+class TestOpeningBook(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'book.json')
+        key = GameState().compute_zobrist_key()
+        OpeningBook({key: BookEntry(OPENING_MOVE, 0, 6, 1)}, plies=2).save(self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_save_and_load(self):
+        book = OpeningBook.load(self.path)
+        self.assertEqual(book.plies, 2)
+        self.assertEqual(list(book.entries.values()), [BookEntry(OPENING_MOVE, 0, 6, 1)])
+
+    def test_agent_plays_booked_move_without_searching(self):
+        for full_jumps in (False, True):
+            game = HeadlessGame()
+            agent = build_agent(game=game, agent='minimax_ab', color=BLUE, depth=4, eval_fn=piece2val,
+                                full_jumps=full_jumps, opening_book=self.path)
+            self.assertEqual(agent.make_move(), 0)
+            self.assertIsNotNone(game.state.board.piece_at(4, 4))
+            self.assertIsNone(game.state.board.piece_at(5, 5))
+
+    def test_positions_outside_the_book_are_searched(self):
+        game = HeadlessGame()
+        game.state.move_count = 2  # past the book's plies
+        agent = build_agent(game=game, agent='minimax_ab', color=BLUE, depth=2, eval_fn=piece2val,
+                            opening_book=self.path)
+        self.assertGreater(agent.make_move(), 0)
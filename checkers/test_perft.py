@@ -0,0 +1,42 @@
+from unittest import TestCase
+
+from bitboard import BitBoard
+from checkers import GameState, RED
+from fen import STARTING_FEN, from_fen, to_fen
+from perft import divide, perft, root
+
+OPENING_COUNTS = [7, 49, 379, 2872]
+# blue has just taken the red man on square 19, and the blue man on square 14 can take either of two more
+MID_HOP_FEN = 'B:B14,21,28,32:R1,8,10,11:H14'
+
+
+class TestPerft(TestCase):
+    def test_opening_counts_agree_for_every_board_and_way_of_moving(self):
+        for board in ('BitBoard', 'Board'):
+            for copy in (False, True):
+                state = from_fen(STARTING_FEN)
+                if board == 'Board':
+                    state.board = state.board.to_board()
+                counts = [perft(root(state), depth, copy) for depth in range(1, len(OPENING_COUNTS) + 1)]
+                self.assertEqual(counts, OPENING_COUNTS)
+
+    def test_divide_adds_up_to_perft(self):
+        node = root(from_fen(STARTING_FEN))
+        counts = divide(node, 4)
+        self.assertEqual(len(counts), 7)
+        self.assertEqual(sum(leaves for _, leaves in counts), OPENING_COUNTS[3])
+
+    def test_only_the_hopping_piece_goes_on(self):
+        state = from_fen(MID_HOP_FEN)
+        self.assertEqual(state.last_hop_to, (3, 3))
+        self.assertEqual(perft(root(state), 1), 2)
+        self.assertEqual(perft(root(from_fen(MID_HOP_FEN[:-2])), 1), 2)  # no other blue piece can take
+
+    def test_fen_round_trip(self):
+        self.assertEqual(from_fen(STARTING_FEN).zobrist_key, GameState(board=BitBoard()).zobrist_key)
+        for fen in (STARTING_FEN, MID_HOP_FEN, 'R:BK3,30:R5,K12'):
+            self.assertEqual(to_fen(from_fen(fen)), fen)
+        self.assertEqual(from_fen('R:BK3,30:R5,K12').turn, RED)
+        for fen in ('B:B21,21:R1', 'X:B21:R1', 'B:B33:R1', 'B:B21:R1:19'):
+            with self.assertRaises(ValueError):
+                from_fen(fen)
@@ -0,0 +1,49 @@
+import os
+import random
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from agents.build_agent import build_agent
+from checkers import BLUE, RED
+from game_records import GameRecord, GameRecordWriter, encode_moves, replay
+from headless import HeadlessGame
+from position_dataset import POSITION_DTYPE, TURNS, board_arrays, export_positions, load_positions
+from vectorized_eval_fns import board_to_array
+
+
+class TestPositionDataset(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.records_file = os.path.join(self.directory.name, 'games.games')
+        self.dataset_file = os.path.join(self.directory.name, 'positions.bin')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_export_and_load(self):
+        random.seed(4100)
+        game = HeadlessGame()
+        game.play(agent_blue=build_agent(game=game, agent='random', color=BLUE),
+                  agent_red=build_agent(game=game, agent='random', color=RED), max_moves=40)
+        moves = encode_moves(game.moves)
+        with GameRecordWriter(self.records_file) as writer:
+            writer.write(GameRecord(game=0, red={}, blue={}, seed=0, winner='red', moves=moves))
+            writer.write(GameRecord(game=1, red={}, blue={}, seed=0, winner=None, moves=b''))
+
+        count = export_positions([self.records_file], self.dataset_file)
+        positions = load_positions(self.dataset_file)
+        self.assertIsInstance(positions, np.memmap)
+        self.assertEqual(positions.dtype, POSITION_DTYPE)
+        self.assertEqual(len(positions), count)
+        self.assertEqual(os.path.getsize(self.dataset_file), count * 20)
+
+        quiet = [board_to_array(state.board) for state in replay(moves) if not state.mid_hop]
+        first = positions[positions['game'] == 0]
+        self.assertEqual(len(first), len(quiet))
+        np.testing.assert_array_equal(board_arrays(first), np.array(quiet))
+        for position in first:
+            self.assertEqual(position['result'], 1 if TURNS[position['turn']] == RED else -1)
+        self.assertEqual(positions[-1]['ply'], 0)
+        self.assertEqual(positions[-1]['result'], 0)
@@ -0,0 +1,43 @@
+from unittest import TestCase
+
+from agents.agent import _quiescence
+from agents.build_agent import build_agent
+from checkers import Action, BLUE, Board, GameState, Piece, RED
+from eval_fns import piece2val
+from game_state import Node
+from headless import HeadlessGame
+
+
+class TestQuiescence(TestCase):
+    def test_sees_the_recapture(self):
+        node = Node(GameState(board=exchange_board(), turn=RED))
+        capture = Action(2, 2, 4, 4)
+        child, undo = node.push(capture)
+        self.assertEqual(piece2val(child.state.board, RED), 0)
+        value, nodes_explored = _quiescence(child, RED, piece2val, float('-inf'), float('inf'), win_value=24)
+        node.pop(undo)
+        self.assertEqual(value, -1)  # blue takes back
+        self.assertEqual(nodes_explored, 1)
+
+    def test_agent_scores_horizon_after_captures(self):
+        for quiescence, expected in ((False, 0), (True, -1)):
+            game = HeadlessGame(GameState(board=exchange_board(), turn=RED))
+            agent = build_agent(game=game, agent='minimax_ab', color=RED, depth=1, eval_fn=piece2val,
+                                quiescence=quiescence)
+            value, _, _ = agent.minimax(Node(game.state), depth=1)
+            self.assertEqual(value, expected)
+
+
+def exchange_board() -> Board:
+    # red can take the blue man on (3, 3), and the blue man on (5, 5) can take back. (6, 6) is taken, so red
+    # cannot go on to take the man on (5, 5) too
+    board = Board()
+    for x in range(8):
+        for y in range(8):
+            board.matrix[x][y].occupant = None
+    board.matrix[0][0].occupant = Piece(RED)
+    board.matrix[2][2].occupant = Piece(RED)
+    board.matrix[3][3].occupant = Piece(BLUE)
+    board.matrix[5][5].occupant = Piece(BLUE)
+    board.matrix[6][6].occupant = Piece(BLUE)
+    return board
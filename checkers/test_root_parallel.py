@@ -0,0 +1,68 @@
+import multiprocessing as mp
+import random
+from copy import deepcopy
+from unittest import TestCase
+
+from agents.build_agent import build_agent
+from agents.root_parallel_agent import _init_worker, _search_root_child
+from bitboard import BitBoard
+from checkers import Action, BLUE, GameState, RED
+from eval_fns import piece2val
+from game_state import Node
+from headless import HeadlessGame
+from scaling_benchmark import benchmark_positions
+
+
+class TestParallelSearch(TestCase):
+    def test_same_value_as_serial_search(self):
+        game = HeadlessGame()
+        parallel = build_agent(game=game, agent='minimax_ab', color=RED, depth=3, eval_fn=piece2val,
+                               parallel='root', workers=2)
+        serial = build_agent(game=game, agent='minimax_ab', color=RED, depth=3, eval_fn=piece2val)
+        try:
+            for position in benchmark_positions(num_positions=4):
+                game.state = position
+                random.seed(4100)
+                serial_value, _, _ = serial.minimax(Node(position), depth=3)
+                value, action, _ = parallel.search(Node(position))
+                self.assertEqual(value, serial_value)
+                self.assertIn(action, Node(position).next_actions())
+        finally:
+            parallel.close()
+
+    def test_pvs_same_value_as_serial_search(self):
+        game = HeadlessGame()
+        pvs = build_agent(game=game, agent='minimax_ab_jumps_first', color=RED, depth=3, eval_fn=piece2val,
+                          parallel='pvs', workers=2)
+        serial = build_agent(game=game, agent='minimax_ab_jumps_first', color=RED, depth=3, eval_fn=piece2val)
+        try:
+            for position in benchmark_positions(num_positions=4):
+                game.state = position
+                serial_value, _, _ = serial.minimax(Node(position), depth=3)
+                value, action, _ = pvs.minimax(Node(position), depth=3)
+                self.assertEqual(value, serial_value)
+                self.assertIn(action, Node(position).next_actions())
+        finally:
+            pvs.close()
+
+    def test_needs_an_alpha_beta_agent(self):
+        with self.assertRaises(ValueError):
+            build_agent(game=HeadlessGame(), agent='minimax', color=RED, depth=3, parallel='root')
+
+    def test_worker_starts_one_search_per_move(self):
+        searcher = build_agent(game=None, agent='minimax_ab', color=RED, depth=2, eval_fn=piece2val, tt_size=1024,
+                               move_ordering=True)
+        _init_worker(searcher, mp.Value('d', float('-inf')))  # this process stands in for a worker
+        state = GameState(board=BitBoard())
+        actions = Node(state).next_actions()
+        unplayed = Action(0, 0, 9, 9)  # a ply and a move no search here can overwrite
+        for action in actions:
+            _search_root_child(deepcopy(state), action, search_id=1)  # workers get a copy of the state
+            searcher.move_orderer.killers[50] = [unplayed]
+            searcher.move_orderer.history[(BLUE, unplayed)] = 8
+        self.assertEqual(searcher.transposition_table.generation, 1)
+        self.assertEqual(searcher.move_orderer.history[(BLUE, unplayed)], 8)
+        _search_root_child(deepcopy(state), actions[0], search_id=2)
+        self.assertEqual(searcher.transposition_table.generation, 2)
+        self.assertNotIn(50, searcher.move_orderer.killers)
+        self.assertEqual(searcher.move_orderer.history[(BLUE, unplayed)], 4)
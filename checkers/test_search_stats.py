@@ -0,0 +1,43 @@
+from unittest import TestCase
+
+from agents.build_agent import build_agent
+from checkers import BLUE
+from eval_fns import piece2val
+from headless import HeadlessGame
+from search_stats import SearchStats, sum_stats
+
+
+class TestSearchStats(TestCase):
+    def test_counts_every_node_of_the_search(self):
+        for agent in ('minimax', 'minimax_ab', 'minimax_ab_random', 'minimax_ab_jumps_first'):
+            game = HeadlessGame()
+            searcher = build_agent(game=game, agent=agent, color=BLUE, depth=3, eval_fn=piece2val)
+            nodes_explored = searcher.make_move()
+
+            stats = searcher.stats
+            self.assertEqual(len(stats.move_seconds), 1)
+            self.assertEqual(stats.move_nodes, [nodes_explored])
+            self.assertEqual(len(stats.nodes_by_depth), 4)
+            self.assertEqual(stats.nodes_by_depth[0], 1)
+            self.assertEqual(sum(stats.nodes_by_depth[1:]), nodes_explored)
+            self.assertEqual(stats.eval_calls, stats.nodes_by_depth[3])
+            self.assertLessEqual(stats.first_move_cutoffs, stats.beta_cutoffs + stats.alpha_cutoffs)
+            if agent != 'minimax':
+                self.assertGreater(stats.beta_cutoffs + stats.alpha_cutoffs, 0)
+
+    def test_sum_and_summary(self):
+        stats = SearchStats()
+        stats.node(0)
+        stats.node(1, 7)
+        stats.node(2, 28)
+        stats.cutoff(beta=True, first_move=True)
+        stats.cutoff(beta=False, first_move=False)
+        stats.end_move(0.5, 35)
+
+        summary = sum_stats([stats, None, stats]).summary()
+        self.assertEqual(summary['moves'], 2)
+        self.assertEqual(summary['nodes'], 70)
+        self.assertEqual(summary['nodes_by_depth'], [2, 14, 56])
+        self.assertEqual(summary['branching_by_depth'], [7, 4])
+        self.assertAlmostEqual(summary['effective_branching_factor'], 28 ** 0.5)
+        self.assertEqual(summary['first_move_cutoff_rate'], 0.5)
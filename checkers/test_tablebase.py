@@ -0,0 +1,60 @@
+import random
+import tempfile
+from unittest import TestCase
+
+from agents.build_agent import build_agent
+from bitboard import BitBoard, _COORDS, _INDEX
+from checkers import BLUE, GameState, RED
+from eval_fns import piece2val
+from headless import HeadlessGame
+from tablebase import Tablebase, _positions, generate, materials
+
+
+class TestTablebase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        generate(max_pieces=2, directory=cls.directory.name)
+        cls.tablebase = Tablebase(cls.directory.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_capture_wins_at_once(self):
+        # a blue king next to the last red man, with the square behind it empty
+        state = GameState(board=BitBoard(blue=bit(3, 3), red=bit(2, 2), kings=bit(3, 3)), turn=BLUE)
+        self.assertEqual(self.tablebase.probe(state), 1)
+        self.assertEqual(self.tablebase.score(state, RED, win_value=24), -24)
+
+    def test_mirrored_positions_have_the_same_value(self):
+        for material in materials(2):
+            for blue, red, kings in _positions(material):
+                for turn in (BLUE, RED):
+                    state = GameState(board=BitBoard(blue=blue, red=red, kings=kings), turn=turn)
+                    mirrored = GameState(board=BitBoard(blue=mirror(red), red=mirror(blue), kings=mirror(kings)),
+                                         turn=RED if turn == BLUE else BLUE)
+                    self.assertEqual(self.tablebase.probe(state), self.tablebase.probe(mirrored))
+
+    def test_agent_wins_in_the_promised_number_of_turns(self):
+        random.seed(4100)
+        for full_jumps in (False, True):
+            state = GameState(board=BitBoard(blue=bit(4, 4), red=bit(1, 1), kings=bit(4, 4) | bit(1, 1)), turn=BLUE)
+            turns = self.tablebase.probe(state)
+            self.assertGreater(turns, 0)
+
+            game = HeadlessGame(state)
+            blue = build_agent(game=game, agent='minimax_ab', color=BLUE, depth=1, eval_fn=piece2val,
+                               full_jumps=full_jumps, tablebase=self.directory.name)
+            red = build_agent(game=game, agent='random', color=RED)
+            who_won, _ = game.play(agent_blue=blue, agent_red=red, max_moves=turns)
+            self.assertEqual(who_won, BLUE)
+
+
+def bit(x: int, y: int) -> int:
+    return 1 << _INDEX[x][y]
+
+
+def mirror(mask: int) -> int:
+    # turns the board around, so that each side's pieces stand where the other side's would
+    return sum(bit(7 - x, 7 - y) for x, y in _COORDS if mask & bit(x, y))
@@ -0,0 +1,69 @@
+import random
+from unittest import TestCase
+
+import eval_fns
+import vectorized_eval_fns
+from agents.build_agent import build_agent
+from bitboard import BitBoard
+from checkers import BLUE, GameState, RED
+from game_state import Node
+from headless import HeadlessGame
+from test_bitboard import random_positions
+from test_game_state import double_jump_board_plus_ones
+
+HEURISTICS = ['piece2val', 'piece2val_keep_back_row', 'piece2val_favor_kings', 'piece2val_move_to_opponent',
+              'furthest_king']
+
+
+class TestVectorizedEvalFns(TestCase):
+    def test_matches_scalar_heuristics(self):
+        boards = [state.board for state in random_positions(games=10, max_plies=120)]
+        boards.append(double_jump_board_plus_ones())
+        for board in boards:
+            bitboard = BitBoard.from_board(board)
+            for name in HEURISTICS:
+                for color in (BLUE, RED):
+                    expected = getattr(eval_fns, name)(board, color)
+                    self.assertAlmostEqual(getattr(vectorized_eval_fns, name)(board, color), expected)
+                    self.assertAlmostEqual(getattr(vectorized_eval_fns, name)(bitboard, color), expected)
+            self.assertAlmostEqual(vectorized_eval_fns._dists_to_all_pieces(bitboard),
+                                   eval_fns._dists_to_all_pieces(board))
+
+    def test_board_to_array(self):
+        squares = vectorized_eval_fns.board_to_array(BitBoard())
+        self.assertEqual(squares.shape, (32,))
+        self.assertEqual((squares == vectorized_eval_fns.BLUE_MAN).sum(), 12)
+        self.assertEqual((squares == vectorized_eval_fns.RED_MAN).sum(), 12)
+
+    def test_evaluate_batch_matches_scalar_heuristics(self):
+        boards = [state.board for state in random_positions(games=5, max_plies=120)]
+        squares = vectorized_eval_fns.boards_to_array(boards)
+        self.assertEqual(squares.shape, (len(boards), 32))
+        for name in HEURISTICS:
+            for color in (BLUE, RED):
+                values = vectorized_eval_fns.evaluate_batch(squares, getattr(eval_fns, name), color)
+                for board, value in zip(boards, values):
+                    self.assertAlmostEqual(value, getattr(eval_fns, name)(board, color))
+
+    def test_batched_leaves_do_not_change_search(self):
+        state = random_positions(games=1, max_plies=30)[-1]
+        for agent in ('minimax', 'minimax_ab'):
+            results = []
+            for batch_leaves in (False, True):
+                game = HeadlessGame(GameState(board=BitBoard.from_board(state.board), turn=state.turn))
+                searcher = build_agent(game, agent, game.state.turn, depth=3, eval_fn=eval_fns.piece2val_keep_back_row,
+                                       batch_leaves=batch_leaves)
+                random.seed(4100)
+                results.append(searcher.minimax(Node(game.state), depth=3))
+            self.assertEqual(results[0], results[1])
+
+    def test_batch_eval_fn_needs_a_known_heuristic(self):
+        with self.assertRaises(ValueError):
+            vectorized_eval_fns.batch_eval_fn(lambda board, color: 0)
+
+        def piece2val(board, color):  # the name alone does not make it eval_fns.piece2val
+            return 0
+        with self.assertRaises(ValueError):
+            vectorized_eval_fns.batch_eval_fn(piece2val)
+        self.assertIs(vectorized_eval_fns.batch_eval_fn(eval_fns.piece2val),
+                      vectorized_eval_fns.batch_eval_fn(vectorized_eval_fns.piece2val))
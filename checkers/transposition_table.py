@@ -0,0 +1,91 @@
+"""
+transposition_table.py
+
+A fixed-size transposition table for the alpha-beta agents, indexed by GameState.zobrist_key.
+
+Values are stored from the searching agent's point of view, so a table must not be shared between agents.
+"""
+
+from collections import namedtuple
+from typing import Dict, Optional
+
+##BOUND TYPES##
+EXACT = 0
+LOWER_BOUND = 1  # the search failed high, the true value is at least `value`
+UPPER_BOUND = 2  # the search failed low, the true value is at most `value`
+
+TTEntry = namedtuple("TTEntry", "key depth flag value best_action generation")
+
+
+class TranspositionTable:
+    def __init__(self, size: int = 2 ** 16):
+        self.size = size
+        self.entries = [None] * size
+        self.generation = 0
+
+        self.probes = 0
+        self.hits = 0
+        self.cutoffs = 0
+
+    def new_search(self):
+        """
+        Called once per move. Entries from earlier moves are still used, but are the first to be replaced.
+        """
+        self.generation += 1
+
+    def lookup(self, key: int) -> Optional[TTEntry]:
+        self.probes += 1
+        entry = self.entries[key % self.size]
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def best_action(self, key: int):
+        """
+        The best action stored for the position, for move ordering. Not counted as a probe.
+        """
+        entry = self.entries[key % self.size]
+        return entry.best_action if entry is not None and entry.key == key else None
+
+    def probe(self, key: int, depth: int, alpha: float, beta: float) -> Optional[TTEntry]:
+        """
+        Returns the stored entry if it settles a search of `depth` more plies with window (alpha, beta) on its own.
+        """
+        entry = self.lookup(key)
+        if entry is None or entry.depth < depth:
+            return None
+
+        if (entry.flag == EXACT
+                or (entry.flag == LOWER_BOUND and entry.value > beta)
+                or (entry.flag == UPPER_BOUND and entry.value < alpha)):
+            self.cutoffs += 1
+            return entry
+        return None
+
+    def store(self, key: int, depth: int, alpha: float, beta: float, value: float, best_action):
+        """
+        Stores the result of searching `depth` more plies with window (alpha, beta).
+        Replaces the slot's entry if it is for the same position, left over from an earlier move, or shallower.
+        """
+        if value <= alpha:
+            flag = UPPER_BOUND
+        elif value >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+
+        index = key % self.size
+        current = self.entries[index]
+        if (current is None or current.key == key or current.generation != self.generation
+                or depth >= current.depth):
+            self.entries[index] = TTEntry(key, depth, flag, value, best_action, self.generation)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'tt_probes': self.probes,
+            'tt_hits': self.hits,
+            'tt_cutoffs': self.cutoffs,
+            'tt_hit_rate': self.hits / self.probes if self.probes else 0,
+            'tt_cutoff_rate': self.cutoffs / self.probes if self.probes else 0,
+        }
@@ -0,0 +1,225 @@
+"""
+vectorized_eval_fns.py
+
+NumPy versions of the heuristics in eval_fns.py, which work on a compact array of the 32 playable squares instead of
+walking all 64 squares of the board.
+
+evaluate_batch() scores a whole (N, 32) stack of board arrays with one call, which is how search scores the
+children of a node at the horizon and how recorded games can be scored in bulk.
+
+The single-board functions take the same (board, color) arguments as eval_fns and return the same scores. For one
+board a NumPy call costs more than the loops it replaces, so they count pieces straight off the masks of a BitBoard
+instead, and leave any other board, and the heuristics that only walk the pieces there are, to eval_fns.
+
+A board array holds one int8 per playable square, in BitBoard bit order (index = x * 4 + y // 2):
+0 is empty, 1 a blue man, 2 a blue king, -1 a red man and -2 a red king.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Iterable, Sequence, Tuple
+
+import numpy as np
+
+import eval_fns
+from bitboard import BitBoard, _COORDS, _INDEX
+from checkers import BLUE, Board, PlayerColor, RED
+
+EMPTY = 0
+BLUE_MAN = 1
+BLUE_KING = 2
+RED_MAN = -1
+RED_KING = -2
+
+_X = np.array([x for x, y in _COORDS], dtype=np.float64)
+_Y = np.array([y for x, y in _COORDS], dtype=np.float64)
+
+# Like eval_fns.piece2val_keep_back_row, only even columns count. On row 7 those are all light squares,
+# so blue never gets a back row bonus.
+_BACK_ROW = {
+    RED: (_Y == 0) & (_X % 2 == 0),
+    BLUE: (_Y == 7) & (_X % 2 == 0),
+}
+
+_RED_BACK_ROW_MASK = sum(1 << _INDEX[x][0] for x in range(0, 8, 2))  # _BACK_ROW[RED] as a BitBoard mask
+
+_MAX_DISTANCE = (2 * (7 ** 2)) ** .5
+_DISTANCES = np.sqrt((_X[:, None] - _X[None, :]) ** 2 + (_Y[:, None] - _Y[None, :]) ** 2)  # between squares
+
+
+def board_to_array(board: Board) -> np.ndarray:
+    """
+    Packs any Board into a (32,) int8 board array. BitBoards are unpacked without touching individual squares.
+    """
+    blue, red, kings = _unpack(np.array(board_masks(board), dtype=np.uint32))
+    return ((blue - red) * (1 + kings)).astype(np.int8)
+
+
+def board_masks(board: Board) -> Tuple[int, int, int]:
+    """
+    The (blue, red, kings) masks of any Board. Cheap to keep around for a board that is about to change.
+    """
+    if not isinstance(board, BitBoard):
+        board = BitBoard.from_board(board)
+    return board.blue, board.red, board.kings
+
+
+def boards_to_array(boards: Iterable[Board]) -> np.ndarray:
+    """
+    Packs a sequence of Boards into an (N, 32) int8 array of boards.
+    """
+    return masks_to_array([board_masks(board) for board in boards])
+
+
+def masks_to_array(masks: Sequence[Tuple[int, int, int]]) -> np.ndarray:
+    """
+    Turns a sequence of (blue, red, kings) masks, or an (N, 3) integer array of them, into an (N, 32) int8 array.
+    """
+    masks = np.asarray(masks, dtype=np.uint32).reshape(-1, 3)
+    blue, red, kings = (_unpack(masks[:, i]) for i in range(3))
+    return ((blue - red) * (1 + kings)).astype(np.int8)
+
+
+def _unpack(masks: np.ndarray) -> np.ndarray:
+    as_bytes = masks.astype('<u4').view(np.uint8).reshape(-1, 4)
+    return np.unpackbits(as_bytes, axis=1, bitorder='little').astype(np.int8)
+
+
+def evaluate_batch(squares: np.ndarray, eval_fn: Callable, color: PlayerColor) -> np.ndarray:
+    """
+    Scores every board of an (N, 32) array for `color` with the heuristic eval_fn, which can be a function from
+    eval_fns or from this module. Returns an (N,) float array matching eval_fn(board, color) board by board.
+    """
+    return batch_eval_fn(eval_fn)(squares, color)
+
+
+def batch_eval_fn(eval_fn: Callable) -> Callable[[np.ndarray, PlayerColor], np.ndarray]:
+    """
+    Returns the batched version of a heuristic from eval_fns or this module, or raises ValueError if it has none.
+    """
+    if eval_fn not in _BATCH_FNS:
+        raise ValueError(f'no batched version of eval_fn {getattr(eval_fn, "__name__", eval_fn)}, expected one of '
+                         f'{sorted({fn.__module__ + "." + fn.__name__ for fn in _BATCH_FNS})}')
+    return _BATCH_FNS[eval_fn]
+
+
+def _sign(color: PlayerColor) -> int:
+    return 1 if color == BLUE else -1
+
+
+def piece2val(board: Board, color: PlayerColor):
+    if not isinstance(board, BitBoard):
+        return eval_fns.piece2val(board, color)
+    own, opponent = board._masks_for(color)
+    return _count(own) - _count(opponent)
+
+
+def piece2val_keep_back_row(board: Board, color: PlayerColor):
+    if not isinstance(board, BitBoard):
+        return eval_fns.piece2val_keep_back_row(board, color)
+    own, opponent = board._masks_for(color)
+    score = _count(own) - _count(opponent)
+    if color == RED:  # see _BACK_ROW, a king counts twice
+        score += (_count(own & _RED_BACK_ROW_MASK) + _count(own & board.kings & _RED_BACK_ROW_MASK)) * 0.5
+    return score
+
+
+def piece2val_favor_kings(board: Board, color: PlayerColor):
+    if not isinstance(board, BitBoard):
+        return eval_fns.piece2val_favor_kings(board, color)
+    own, opponent = board._masks_for(color)
+    # a king counts as 1 and a man as 5, like in eval_fns
+    return 5 * (_count(own) - _count(opponent)) - 4 * (_count(own & board.kings) - _count(opponent & board.kings))
+
+
+def piece2val_move_to_opponent(board: Board, color: PlayerColor):
+    return eval_fns.piece2val_move_to_opponent(board, color)
+
+
+def furthest_king(board: Board, color: PlayerColor):
+    return eval_fns.furthest_king(board, color)
+
+
+def _count(mask: int) -> int:
+    return bin(mask).count('1')
+
+
+def _dists_to_all_pieces(board: Board) -> float:
+    squares = board_to_array(board)
+    red_kings = squares == RED_KING
+    blue = squares > 0
+    return float((_DISTANCES * np.outer(red_kings, blue)).sum())
+
+
+def _material(squares: np.ndarray, sign: int) -> np.ndarray:
+    return np.sign(squares).sum(axis=-1) * sign
+
+
+def _back_row_bonus(squares: np.ndarray, color: PlayerColor) -> np.ndarray:
+    own_values = np.where(squares * _sign(color) > 0, np.abs(squares), 0)
+    return (own_values * _BACK_ROW[color]).sum(axis=-1) * 0.5
+
+
+def _kings_cheap_material(squares: np.ndarray, sign: int) -> np.ndarray:
+    # eval_fns.piece2val_favor_kings counts a king as 1 and a man as 5
+    values = np.where(np.abs(squares) == 2, 1, 5)
+    return (values * np.sign(squares)).sum(axis=-1) * sign
+
+
+def _center_of_mass_closeness(squares: np.ndarray, sign: int) -> np.ndarray:
+    own = squares * sign > 0
+    opponent = squares * sign < 0
+    own_count = own.sum(axis=-1)
+    opponent_count = opponent.sum(axis=-1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        own_x, own_y = (own * _X).sum(axis=-1) / own_count, (own * _Y).sum(axis=-1) / own_count
+        opponent_x = (opponent * _X).sum(axis=-1) / opponent_count
+        opponent_y = (opponent * _Y).sum(axis=-1) / opponent_count
+    distance = np.sqrt((own_x - opponent_x) ** 2 + (own_y - opponent_y) ** 2)
+
+    # with no pieces on one side there is no center of mass, so fall back to material
+    return np.where((own_count == 0) | (opponent_count == 0), _material(squares, sign), _MAX_DISTANCE - distance)
+
+
+def _furthest_king(squares: np.ndarray, sign: int) -> np.ndarray:
+    own_kings = squares * sign == 2
+    opponent = squares * sign < 0
+    pairs = own_kings[..., :, None] & opponent[..., None, :]
+    max_distance = np.where(pairs, _DISTANCES, 0).max(axis=(-2, -1))
+    return _MAX_DISTANCE - max_distance
+
+
+def _batch_piece2val(squares: np.ndarray, color: PlayerColor) -> np.ndarray:
+    return _material(squares, _sign(color)).astype(np.float64)
+
+
+def _batch_piece2val_keep_back_row(squares: np.ndarray, color: PlayerColor) -> np.ndarray:
+    return _material(squares, _sign(color)) + _back_row_bonus(squares, color)
+
+
+def _batch_piece2val_favor_kings(squares: np.ndarray, color: PlayerColor) -> np.ndarray:
+    return _kings_cheap_material(squares, _sign(color)).astype(np.float64)
+
+
+def _batch_piece2val_move_to_opponent(squares: np.ndarray, color: PlayerColor) -> np.ndarray:
+    return _center_of_mass_closeness(squares, _sign(color))
+
+
+def _batch_furthest_king(squares: np.ndarray, color: PlayerColor) -> np.ndarray:
+    return _furthest_king(squares, _sign(color))
+
+
+# heuristic, from eval_fns or this module -> its batched version
+_BATCH_FNS = {
+    eval_fns.piece2val: _batch_piece2val,
+    piece2val: _batch_piece2val,
+    eval_fns.piece2val_keep_back_row: _batch_piece2val_keep_back_row,
+    piece2val_keep_back_row: _batch_piece2val_keep_back_row,
+    eval_fns.piece2val_favor_kings: _batch_piece2val_favor_kings,
+    piece2val_favor_kings: _batch_piece2val_favor_kings,
+    eval_fns.piece2val_move_to_opponent: _batch_piece2val_move_to_opponent,
+    piece2val_move_to_opponent: _batch_piece2val_move_to_opponent,
+    eval_fns.furthest_king: _batch_furthest_king,
+    furthest_king: _batch_furthest_king,
+}